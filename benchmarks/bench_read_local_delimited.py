@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+# Measure the rate at which `read_local_delimited` parses a generated CSV file.
+# Run from the project root with e.g.
+#
+#     PYTHONPATH=src python benchmarks/bench_read_local_delimited.py --rows 100000
+#
+# The file is parsed using the fast-path datetime parser, using
+# `datetime.strptime` for comparison, and using the columnar path.
+
+import argparse
+import csv
+from datetime import datetime, timedelta
+import jiraworklog.read_local_delimited as rld
+from jiraworklog.configuration import Configuration
+import os
+import tempfile
+import time
+
+CONF_RAW = {
+    'jwconfig_version': '0.1.0',
+    'basic_auth': {'server': None, 'user': None, 'api_token': None},
+    'issues_map': {'p1': 'P01', 'p2': 'P02', 'p3': 'P03'},
+    'parse_delimited': {
+        'col_labels': {
+            'description': 'task',
+            'start': 'start',
+            'end': 'end',
+            'duration': 'duration',
+            'tags': 'tags'
+        },
+        'col_formats': {
+            'start': '%Y-%m-%d %H:%M',
+            'end': '%Y-%m-%d %H:%M',
+            'timezone': 'UTC',
+            'delimiter2': ':'
+        }
+    }
+}
+
+DURATIONS = [15, 30, 45, 60, 75, 90, 120]
+
+
+def write_worklogs(path: str, n_rows: int) -> None:
+    start = datetime(2018, 1, 1, 8, 0)
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['task', 'start', 'end', 'duration', 'tags'])
+        for i in range(n_rows):
+            minutes = DURATIONS[i % len(DURATIONS)]
+            end = start + timedelta(minutes=minutes)
+            writer.writerow([
+                f'Task {i % 500}',
+                start.strftime('%Y-%m-%d %H:%M'),
+                end.strftime('%Y-%m-%d %H:%M'),
+                f'{minutes // 60}h {minutes % 60}m',
+                f'p{i % 3 + 1}:other'
+            ])
+            start = end + timedelta(minutes=15)
+
+
+def time_read(path: str, conf: Configuration, n_reps: int) -> float:
+    best = float('inf')
+    for _ in range(n_reps):
+        begin = time.perf_counter()
+        rld.read_local_delimited(path, conf)
+        best = min(best, time.perf_counter() - begin)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--reps', type=int, default=3)
+    args = parser.parse_args()
+
+    conf = Configuration(CONF_RAW)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'worklogs.csv')
+        write_worklogs(path, args.rows)
+        fast_secs = time_read(path, conf, args.reps)
+        fast_parser = rld.parse_datetime_str
+        rld.parse_datetime_str = datetime.strptime
+        try:
+            strptime_secs = time_read(path, conf, args.reps)
+        finally:
+            rld.parse_datetime_str = fast_parser
+        conf.parse_delimited['columnar'] = True
+        columnar_secs = time_read(path, conf, args.reps)
+
+    results = [
+        ('fast path', fast_secs),
+        ('strptime', strptime_secs),
+        ('columnar', columnar_secs)
+    ]
+    for label, secs in results:
+        print(f'{label:>10}: {args.rows / secs:>10,.0f} rows/second ({secs:.2f}s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+
+# Measure a complete run of `sync_worklogs` against a mock Jira server for a
+# grid of generated workloads. Run from the project root with e.g.
+#
+#     PYTHONPATH=src:. python benchmarks/bench_sync_worklogs.py \
+#         --issues 10 50 --worklogs 100 1000 --duplicate-rate 0 0.1 \
+#         --format csv xlsx --latency 0.005 --output bench-sync.jsonl
+#
+# The mock Jira server is either a `JIRAMock` that replaces the Jira client
+# (`--client mock`) or a local HTTP server that the real Jira client talks to
+# (`--client http`), which includes the overhead of the HTTP requests and the
+# request scheduler.
+#
+# A workload has `--issues` issues with `--worklogs` local worklogs each, a
+# fraction of which are copies of the previous worklog. The
+# `--checkedin-fraction` of the worklogs have already been checked in (and so
+# are also on the remote), and another `--removed-fraction` of worklogs have
+# been checked in but since removed from the local file. Every call to the mock
+# Jira server sleeps for `--latency` seconds.
+#
+# Each scenario is run in a new process so that its peak memory usage can be
+# measured, and one JSON record is appended to the output file per run with the
+# parameters of the scenario, the wall time, the time spent in each phase, the
+# peak RSS, and the number of calls to the mock Jira server. Since the records
+# also include the jiraworklog version, the results of multiple releases can be
+# appended to the same file and compared.
+
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+import csv
+from datetime import datetime, timedelta, timezone
+from importlib.metadata import PackageNotFoundError, version
+import itertools
+from jiraworklog.auth_jira import auth_jira
+from jiraworklog.checkedin_store import create_checkedin_store
+from jiraworklog.cmdline_args import parser as cmdline_parser
+from jiraworklog.configuration import Configuration
+from jiraworklog.read_local_worklogs import read_local_worklogs
+from jiraworklog.sync_worklogs import sync_worklogs
+import json
+import multiprocessing
+import openpyxl
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from tests.jiramock import BuildCheckedin, JIRAMock, JIRAWklMock
+from tests.jiraserver import JiraServer
+from typing import Any, Optional
+
+COL_LABELS = {
+    'description': 'task',
+    'start': 'start',
+    'end': 'end',
+    'duration': None,
+    'tags': 'tags'
+}
+
+DURATIONS = [15, 30, 45, 60, 75, 90, 120]
+
+
+class LatencyJIRAMock(JIRAMock):
+    """A Jira mock that sleeps for `latency` seconds on every call and counts
+    the calls. Unlike `JIRAMock` it is safe to use from multiple threads.
+    """
+
+    latency: float
+    calls: Counter
+    lock: threading.Lock
+
+    def __init__(
+        self,
+        remote_wkls: dict[str, list[JIRAWklMock]],
+        latency: float
+    ) -> None:
+        super().__init__(remote_wkls)
+        self.latency = latency
+        self.calls = Counter()
+        self.lock = threading.Lock()
+
+    def record_call(self, name: str) -> None:
+        with self.lock:
+            self.calls[name] += 1
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def add_worklog(self, issue, timeSpentSeconds, comment, started):
+        self.record_call('add_worklog')
+        with self.lock:
+            return super().add_worklog(issue, timeSpentSeconds, comment, started)
+
+    def worklogs(self, issueKey):
+        self.record_call('worklogs')
+        return super().worklogs(issueKey)
+
+
+class LatencyJIRAWklMock(JIRAWklMock):
+    """A worklog mock whose deletions go through `LatencyJIRAMock`."""
+
+    def delete(self) -> None:
+        self.jiraclient.record_call('delete')
+        with self.jiraclient.lock:
+            super().delete()
+
+
+class Scenario:
+    """The parameters of a generated workload."""
+
+    n_issues: int
+    n_worklogs: int
+    duplicate_rate: float
+    checkedin_fraction: float
+    removed_fraction: float
+    fmt: str
+    latency: float
+    read_workers: int
+    push_workers: int
+    backend: str
+    client: str
+
+    def __init__(
+        self,
+        n_issues: int,
+        n_worklogs: int,
+        duplicate_rate: float,
+        checkedin_fraction: float,
+        removed_fraction: float,
+        fmt: str,
+        latency: float,
+        read_workers: int,
+        push_workers: int,
+        backend: str,
+        client: str
+    ) -> None:
+        self.n_issues = n_issues
+        self.n_worklogs = n_worklogs
+        self.duplicate_rate = duplicate_rate
+        self.checkedin_fraction = checkedin_fraction
+        self.removed_fraction = removed_fraction
+        self.fmt = fmt
+        self.latency = latency
+        self.read_workers = read_workers
+        self.push_workers = push_workers
+        self.backend = backend
+        self.client = client
+
+    def to_dict(self) -> dict[str, Any]:
+        return dict(vars(self))
+
+
+def create_conf_raw(scenario: Scenario, fmt: str) -> dict[str, Any]:
+    conf_raw = {
+        'jwconfig_version': '0.1.0',
+        'basic_auth': {'server': None, 'user': None, 'api_token': None},
+        'issues_map': {f'p{i}': f'P{i:04d}' for i in range(scenario.n_issues)},
+        'checked_in_backend': scenario.backend,
+        'remote': {
+            'read_workers': scenario.read_workers,
+            'push_workers': scenario.push_workers
+        }
+    }
+    parse_conf = {'col_labels': COL_LABELS, 'col_formats': {'timezone': 'UTC'}}
+    if fmt == 'csv':
+        parse_conf['col_formats'].update({
+            'start': '%Y-%m-%d %H:%M',
+            'end': '%Y-%m-%d %H:%M'
+        })
+        conf_raw['parse_delimited'] = parse_conf
+    else:
+        conf_raw['parse_excel'] = parse_conf
+    return conf_raw
+
+
+# Generate the rows of the workload. Each row is labeled as either `'local'`
+# (only in the local file), `'checkedin'` (in the local file and already checked
+# in and on the remote), or `'removed'` (checked in and on the remote but no
+# longer in the local file)
+def generate_rows(
+    scenario: Scenario,
+    rng: random.Random
+) -> list[tuple[str, list[Any]]]:
+    rows = []
+    start = datetime(2018, 1, 1, 8, 0)
+    for i in range(scenario.n_issues):
+        prev = None
+        for j in range(scenario.n_worklogs):
+            if prev is not None and rng.random() < scenario.duplicate_rate:
+                rows.append(prev)
+                continue
+            draw = rng.random()
+            if draw < scenario.checkedin_fraction:
+                status = 'checkedin'
+            elif draw < scenario.checkedin_fraction + scenario.removed_fraction:
+                status = 'removed'
+            else:
+                status = 'local'
+            minutes = DURATIONS[j % len(DURATIONS)]
+            end = start + timedelta(minutes=minutes)
+            prev = (status, [f'Task {j % 500}', start, end, f'p{i}'])
+            rows.append(prev)
+            start = end + timedelta(minutes=15)
+    return rows
+
+
+def write_rows_csv(path: str, rows: list[list[Any]]) -> None:
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['task', 'start', 'end', 'tags'])
+        for task, start, end, tags in rows:
+            writer.writerow([
+                task,
+                start.strftime('%Y-%m-%d %H:%M'),
+                end.strftime('%Y-%m-%d %H:%M'),
+                tags
+            ])
+
+
+def write_rows_excel(path: str, rows: list[list[Any]]) -> None:
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(['task', 'start', 'end', 'tags'])
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+
+# Write the local worklogs file, the checked-in worklogs, and the remote
+# worklogs for a scenario, and return the configuration and the path of the
+# local worklogs file. The checked-in worklogs are created from the canonical
+# worklogs as read by jiraworklog itself so that they match the local worklogs
+# exactly
+def create_workload(
+    scenario: Scenario,
+    tmpdir: str,
+    seed: int
+) -> tuple[Configuration, str, dict[str, list[dict[str, Any]]]]:
+    rows = generate_rows(scenario, random.Random(seed))
+    conf = Configuration(create_conf_raw(scenario, scenario.fmt))
+    conf.checked_in_path = os.path.join(tmpdir, 'checkedin.json')
+
+    all_path = os.path.join(tmpdir, 'all-worklogs.csv')
+    write_rows_csv(all_path, [row for _, row in rows])
+    canon_conf = Configuration(create_conf_raw(scenario, 'csv'))
+    canon_wkls = read_local_worklogs(all_path, canon_conf)
+    os.remove(all_path)
+
+    # The canonical worklogs for each issue are in the same order as the rows
+    # for the issue
+    statuses: dict[str, list[str]] = {}
+    for status, row in rows:
+        statuses.setdefault(conf.issues_map[row[3]], []).append(status)
+    builder = BuildCheckedin()
+    builder.curr_id = 1
+    checkedin_full = {nm: [] for nm in conf.issue_nms}
+    for issue_nm, wkls in canon_wkls.items():
+        chk_wkls = [
+            wkl
+            for wkl, status
+            in zip(wkls, statuses[issue_nm])
+            if status != 'local'
+        ]
+        checkedin_full[issue_nm] = [
+            wkl.full for wkl in builder.build_listchk(chk_wkls)
+        ]
+    create_checkedin_store(conf).write_all(checkedin_full)
+
+    local_rows = [row for status, row in rows if status != 'removed']
+    ext = 'csv' if scenario.fmt == 'csv' else 'xlsx'
+    worklogs_path = os.path.join(tmpdir, f'worklogs.{ext}')
+    if scenario.fmt == 'csv':
+        write_rows_csv(worklogs_path, local_rows)
+    else:
+        write_rows_excel(worklogs_path, local_rows)
+    return (conf, worklogs_path, checkedin_full)
+
+
+def run_scenario(scenario: Scenario, seed: int) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        conf, worklogs_path, checkedin_full = create_workload(
+            scenario,
+            tmpdir,
+            seed
+        )
+        stack = contextlib.ExitStack()
+        if scenario.client == 'http':
+            server = stack.enter_context(JiraServer(checkedin_full, scenario.latency))
+            conf.auth_token = {'server': server.url, 'user': '-', 'api_token': '-'}
+            jira = auth_jira(conf)
+            calls = server.requests
+        else:
+            jira = create_jiramock(checkedin_full, scenario.latency)
+            calls = jira.calls
+        trace_path = os.path.join(tmpdir, 'trace.json')
+        cmdline_args = cmdline_parser.parse_args(
+            ['--auto-confirm', '--verbose', '0', '--trace', trace_path]
+        )
+        checkedin_bytes = sum(
+            os.path.getsize(os.path.join(tmpdir, nm))
+            for nm
+            in os.listdir(tmpdir)
+            if nm.startswith('checkedin')
+        )
+        with stack:
+            begin = time.perf_counter()
+            with open(os.devnull, 'w') as devnull:
+                with contextlib.redirect_stdout(devnull):
+                    sync_worklogs(jira, conf, cmdline_args, worklogs_path, True)
+            seconds = time.perf_counter() - begin
+        with open(trace_path) as trace_file:
+            phases = json.load(trace_file)['otherData']['phases']
+        result = {
+            'seconds': seconds,
+            'phases': {nm: stats['seconds'] for nm, stats in phases.items()},
+            'peak_rss_kib': calc_peak_rss_kib(),
+            'calls': dict(calls),
+            'local_bytes': os.path.getsize(worklogs_path),
+            'checkedin_bytes': checkedin_bytes
+        }
+    return result
+
+
+def create_jiramock(
+    checkedin_full: dict[str, list[dict[str, Any]]],
+    latency: float
+) -> LatencyJIRAMock:
+    jiramock = LatencyJIRAMock({}, latency)
+    jiramock.remote_wkls = {
+        issue_nm: [
+            LatencyJIRAWklMock(**full).set_jira(jiramock)
+            for full
+            in full_wkls
+        ]
+        for issue_nm, full_wkls
+        in checkedin_full.items()
+    }
+    return jiramock
+
+
+# `ru_maxrss` is in kibibytes on Linux but in bytes on macOS
+def calc_peak_rss_kib() -> int:
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss // 1024 if sys.platform == 'darwin' else maxrss
+
+
+# The version is only available when jiraworklog is installed rather than run
+# from the source tree
+def find_jiraworklog_version() -> Optional[str]:
+    try:
+        return version('jiraworklog')
+    except PackageNotFoundError:
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--issues', type=int, nargs='+', default=[10])
+    parser.add_argument('--worklogs', type=int, nargs='+', default=[100])
+    parser.add_argument('--duplicate-rate', type=float, nargs='+', default=[0.0])
+    parser.add_argument('--checkedin-fraction', type=float, nargs='+', default=[0.5])
+    parser.add_argument('--removed-fraction', type=float, nargs='+', default=[0.05])
+    parser.add_argument('--format', choices=['csv', 'xlsx'], nargs='+', default=['csv'])
+    parser.add_argument('--latency', type=float, nargs='+', default=[0.0])
+    parser.add_argument('--read-workers', type=int, default=4)
+    parser.add_argument('--push-workers', type=int, default=1)
+    parser.add_argument(
+        '--backend',
+        choices=['json', 'journal', 'sqlite'],
+        nargs='+',
+        default=['json']
+    )
+    parser.add_argument(
+        '--client',
+        choices=['mock', 'http'],
+        nargs='+',
+        default=['mock']
+    )
+    parser.add_argument('--reps', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench-sync-worklogs.jsonl')
+    args = parser.parse_args()
+
+    grid = itertools.product(
+        args.issues,
+        args.worklogs,
+        args.duplicate_rate,
+        args.checkedin_fraction,
+        args.removed_fraction,
+        args.format,
+        args.latency,
+        args.backend,
+        args.client
+    )
+    metadata = {
+        'jiraworklog_version': find_jiraworklog_version(),
+        'python_version': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': datetime.now(timezone.utc).isoformat()
+    }
+    mp_context = multiprocessing.get_context('spawn')
+    with open(args.output, 'a') as output_file:
+        for params in grid:
+            scenario = Scenario(
+                *params[:7],
+                args.read_workers,
+                args.push_workers,
+                *params[7:]
+            )
+            for rep in range(args.reps):
+                with ProcessPoolExecutor(1, mp_context=mp_context) as executor:
+                    result = executor.submit(run_scenario, scenario, args.seed).result()
+                record = dict(metadata, scenario=scenario.to_dict(), rep=rep, **result)
+                output_file.write(json.dumps(record) + '\n')
+                output_file.flush()
+                calls_str = ', '.join(f'{k}: {v}' for k, v in result['calls'].items())
+                print(
+                    f"{scenario.n_issues:>5} issues x {scenario.n_worklogs:>6} "
+                    f"worklogs ({scenario.fmt}, {scenario.client}, "
+                    f"latency {scenario.latency}s): "
+                    f"{result['seconds']:.2f}s, "
+                    f"{result['peak_rss_kib'] / 1024:.0f} MiB, calls ({calls_str})"
+                )
+
+
+if __name__ == '__main__':
+    main()
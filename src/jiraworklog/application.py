@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 from jiraworklog.auth_jira import auth_jira
+from jiraworklog.checkedin_store import migrate_checkedin
 from jiraworklog.cmdline_args import parser
 from jiraworklog.configuration import read_conf
 from jiraworklog.init_config import init_config
@@ -34,6 +35,17 @@ def main() -> Optional[str]:
         init_config()
         return None
 
+    if cmdline_args.migrate_checkedin is not None:
+        try:
+            conf = read_conf(cmdline_args.config_path)
+            path = migrate_checkedin(conf, cmdline_args.migrate_checkedin or None)
+        except Exception as exc:
+            if cmdline_args.verbose >= 2:
+                raise RuntimeError('Error running jiraworklog') from exc
+            return(str(exc))
+        print(f"The checked-in worklogs were migrated to '{path}'")
+        return None
+
     is_need_response = not (cmdline_args.auto_confirm or cmdline_args.dry_run)
     if not cmdline_args.file and is_need_response:
         msg = 'Error: must have set --auto-confirm when reading worklogs from standard input'
@@ -2,6 +2,10 @@
 
 from jira import JIRA, JIRAError
 from jiraworklog.configuration import Configuration
+from jiraworklog.request_scheduler import (
+    create_request_scheduler,
+    install_request_scheduler
+)
 import os
 from typing import Optional
 import prettyprinter
@@ -59,6 +63,7 @@ def auth_jira(conf: Configuration) -> JIRA:
             jira = JIRA(**auth_params, validate=True)
         except JIRAError as exc:
             raise AuthTokenAuthError(auth_params, exc) from exc
+        install_request_scheduler(jira, create_request_scheduler(conf))
     else:
         msg = 'Only authentication via auth token is currently implemented'
         raise RuntimeError(msg)
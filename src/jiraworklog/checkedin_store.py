@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+
+from abc import ABC, abstractmethod
+import hashlib
+from jiraworklog.configuration import Configuration, resolve_checkedin_path
+import json
+import os
+import sqlite3
+from typing import Any, Iterable, Optional, TextIO
+
+# The values allowed for the `checked_in_backend` field of the configuration
+# file
+BACKEND_JSON = 'json'
+BACKEND_JOURNAL = 'journal'
+BACKEND_SQLITE = 'sqlite'
+
+JOURNAL_VERSION = 1
+
+# The number of journal entries that are allowed to accumulate before the
+# journal is folded into a new snapshot at the end of a run
+JOURNAL_COMPACT_ENTRIES = 1000
+
+
+class CheckedinStore(ABC):
+    """The on-disk representation of the checked-in worklogs.
+
+    `read` returns the checked-in worklogs in the same form as the original
+    JSON file (a dict mapping each issue to a list of full worklogs) and raises
+    `FileNotFoundError` if the store doesn't exist yet. Stores are allowed to
+    only return the issues in `issue_nms` when it is provided. `add` and
+    `remove` record a single update as it is made, and `commit` is called once
+    at the end of a run with the final state of the checked-in worklogs.
+    `write_all` replaces the entire contents of the store.
+    """
+
+    path: str
+
+    @abstractmethod
+    def read(
+        self,
+        issue_nms: Optional[list[str]] = None
+    ) -> dict[str, list[dict[str, Any]]]:
+        pass
+
+    def add(self, issue_nm: str, full: dict[str, Any]) -> None:
+        pass
+
+    def remove(self, issue_nm: str, full: dict[str, Any]) -> None:
+        pass
+
+    @abstractmethod
+    def commit(self, checkedin_full: dict[str, list[dict[str, Any]]]) -> None:
+        pass
+
+    @abstractmethod
+    def write_all(self, checkedin_full: dict[str, list[dict[str, Any]]]) -> None:
+        pass
+
+
+class JSONCheckedinStore(CheckedinStore):
+    """A single JSON file that is rewritten in full at the end of every run."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def read(
+        self,
+        issue_nms: Optional[list[str]] = None
+    ) -> dict[str, list[dict[str, Any]]]:
+        with open(self.path) as checkedin_file:
+            worklogs_raw = json.load(checkedin_file)
+        return worklogs_raw
+
+    def commit(self, checkedin_full: dict[str, list[dict[str, Any]]]) -> None:
+        self.write_all(checkedin_full)
+
+    def write_all(self, checkedin_full: dict[str, list[dict[str, Any]]]) -> None:
+        os.makedirs(name=os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'w') as file:
+            json.dump(obj=checkedin_full, fp=file, indent=4)
+
+
+class JournalCheckedinStore(CheckedinStore):
+    """A compact snapshot of the checked-in worklogs together with an
+    append-only journal of the updates made since the snapshot was written.
+
+    Each update is appended to the journal (and flushed) as soon as it is made,
+    so a run only writes the worklogs that changed. Once the journal grows
+    beyond `JOURNAL_COMPACT_ENTRIES` entries it is folded into a new snapshot.
+    Every journal entry records the generation of the snapshot that it applies
+    to, so entries that were left behind by an interrupted compaction are
+    ignored rather than applied twice.
+    """
+
+    snapshot_path: str
+    journal_path: str
+    generation: int
+    n_entries: int
+    journal_file: Optional[TextIO]
+
+    def __init__(self, snapshot_path: str, journal_path: str) -> None:
+        self.path = snapshot_path
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.generation = 0
+        self.n_entries = 0
+        self.journal_file = None
+
+    def read(
+        self,
+        issue_nms: Optional[list[str]] = None
+    ) -> dict[str, list[dict[str, Any]]]:
+        # The snapshot is only missing if the store has never been committed,
+        # so report that the store doesn't exist even if a journal is present
+        with open(self.snapshot_path) as snapshot_file:
+            snapshot = json.load(snapshot_file)
+        self.generation = snapshot['generation']
+        worklogs_raw = snapshot['worklogs']
+        for entry in self.read_journal():
+            if entry['generation'] != self.generation:
+                continue
+            self.n_entries += 1
+            apply_journal_entry(worklogs_raw, entry)
+        return worklogs_raw
+
+    def read_journal(self) -> list[dict[str, Any]]:
+        try:
+            with open(self.journal_path) as journal_file:
+                lines = journal_file.read().split('\n')
+        except FileNotFoundError:
+            return []
+        # An entry that was only partially written when the process was
+        # interrupted is missing its terminating newline, and since the update
+        # that it describes might not have been made it is dropped
+        entries = [json.loads(x) for x in lines[:-1] if x]
+        return entries
+
+    def add(self, issue_nm: str, full: dict[str, Any]) -> None:
+        self.append_entry('add', issue_nm, full)
+
+    def remove(self, issue_nm: str, full: dict[str, Any]) -> None:
+        self.append_entry('remove', issue_nm, full)
+
+    def append_entry(
+        self,
+        op: str,
+        issue_nm: str,
+        full: dict[str, Any]
+    ) -> None:
+        if self.journal_file is None:
+            os.makedirs(name=os.path.dirname(self.journal_path), exist_ok=True)
+            self.journal_file = open(self.journal_path, 'a')
+        entry = {
+            'generation': self.generation,
+            'op': op,
+            'issue': issue_nm,
+            'worklog': full
+        }
+        self.journal_file.write(json.dumps(entry, separators=(',', ':')) + '\n')
+        self.journal_file.flush()
+        self.n_entries += 1
+
+    def commit(self, checkedin_full: dict[str, list[dict[str, Any]]]) -> None:
+        if self.journal_file is not None:
+            self.journal_file.close()
+            self.journal_file = None
+        is_new = not os.path.exists(self.snapshot_path)
+        if is_new or self.n_entries >= JOURNAL_COMPACT_ENTRIES:
+            self.compact(checkedin_full)
+
+    def write_all(self, checkedin_full: dict[str, list[dict[str, Any]]]) -> None:
+        self.compact(checkedin_full)
+
+    def compact(self, checkedin_full: dict[str, list[dict[str, Any]]]) -> None:
+        self.generation += 1
+        snapshot = {
+            'version': JOURNAL_VERSION,
+            'generation': self.generation,
+            'worklogs': checkedin_full
+        }
+        # Write the new snapshot to a temporary file and then move it into
+        # place so that the existing snapshot is never left half-written
+        os.makedirs(name=os.path.dirname(self.snapshot_path), exist_ok=True)
+        tmp_path = self.snapshot_path + '.tmp'
+        with open(tmp_path, 'w') as snapshot_file:
+            json.dump(obj=snapshot, fp=snapshot_file, separators=(',', ':'))
+        os.replace(tmp_path, self.snapshot_path)
+        with open(self.journal_path, 'w'):
+            pass
+        self.n_entries = 0
+
+
+class SQLiteCheckedinStore(CheckedinStore):
+    """A SQLite database with one row per checked-in worklog.
+
+    The rows are indexed by issue, by Jira worklog ID, and by a hash of the
+    canonical form of the worklog, so only the issues that are in use have to
+    be loaded and each update is a single-row write in its own transaction.
+    Since every update is committed as soon as it is made, the database
+    reflects the updates that were pushed to the Jira server even if a run is
+    interrupted.
+    """
+
+    conn: Optional[sqlite3.Connection]
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.conn = None
+
+    def connect(self) -> sqlite3.Connection:
+        if self.conn is None:
+            os.makedirs(name=os.path.dirname(self.path), exist_ok=True)
+            # The connection is shared by the threads that push the remote
+            # updates, which is safe since the updates are serialized by
+            # `checkedin_lock`
+            self.conn = sqlite3.connect(self.path, check_same_thread=False)
+            with self.conn:
+                self.conn.executescript(SQLITE_SCHEMA)
+        return self.conn
+
+    def read(
+        self,
+        issue_nms: Optional[list[str]] = None
+    ) -> dict[str, list[dict[str, Any]]]:
+        # `sqlite3.connect` would silently create a new database
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"No such file: '{self.path}'")
+        conn = self.connect()
+        if issue_nms is None:
+            rows = conn.execute(
+                'SELECT issue_key, full FROM worklogs ORDER BY seq'
+            )
+        else:
+            nms = list(dict.fromkeys(issue_nms))
+            placeholders = ', '.join('?' for _ in nms)
+            rows = conn.execute(
+                'SELECT issue_key, full FROM worklogs '
+                f'WHERE issue_key IN ({placeholders}) ORDER BY seq',
+                nms
+            )
+        worklogs_raw: dict[str, list[dict[str, Any]]] = {}
+        for issue_nm, full_json in rows:
+            worklogs_raw.setdefault(issue_nm, []).append(json.loads(full_json))
+        return worklogs_raw
+
+    def add(self, issue_nm: str, full: dict[str, Any]) -> None:
+        conn = self.connect()
+        with conn:
+            insert_sqlite_rows(conn, [(issue_nm, full)])
+
+    def remove(self, issue_nm: str, full: dict[str, Any]) -> None:
+        conn = self.connect()
+        with conn:
+            cursor = conn.execute(
+                'DELETE FROM worklogs WHERE seq = ('
+                'SELECT seq FROM worklogs '
+                'WHERE issue_key = ? AND canon_hash = ? AND full = ? '
+                'ORDER BY seq LIMIT 1)',
+                (issue_nm, calc_canon_hash(full), dump_full(full))
+            )
+        if cursor.rowcount != 1:
+            raise RuntimeError('Internal logic error. Please file a bug report')
+
+    def commit(self, checkedin_full: dict[str, list[dict[str, Any]]]) -> None:
+        # Every update has already been committed, so all that remains is to
+        # make sure that the database exists for the next run
+        self.connect().close()
+        self.conn = None
+
+    def write_all(self, checkedin_full: dict[str, list[dict[str, Any]]]) -> None:
+        conn = self.connect()
+        with conn:
+            conn.execute('DELETE FROM worklogs')
+            insert_sqlite_rows(
+                conn,
+                (
+                    (issue_nm, full)
+                    for issue_nm, listwkl
+                    in checkedin_full.items()
+                    for full
+                    in listwkl
+                )
+            )
+        self.commit(checkedin_full)
+
+
+SQLITE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS worklogs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    issue_key TEXT NOT NULL,
+    worklog_id TEXT,
+    canon_hash TEXT NOT NULL,
+    full TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS worklogs_issue_key ON worklogs (issue_key);
+CREATE INDEX IF NOT EXISTS worklogs_worklog_id ON worklogs (worklog_id);
+CREATE INDEX IF NOT EXISTS worklogs_canon_hash ON worklogs (canon_hash);
+'''
+
+
+def insert_sqlite_rows(
+    conn: sqlite3.Connection,
+    rows: Iterable[tuple[str, dict[str, Any]]]
+) -> None:
+    conn.executemany(
+        'INSERT INTO worklogs (issue_key, worklog_id, canon_hash, full) '
+        'VALUES (?, ?, ?, ?)',
+        (
+            (issue_nm, full.get('id'), calc_canon_hash(full), dump_full(full))
+            for issue_nm, full
+            in rows
+        )
+    )
+
+
+# The full worklogs are serialized with sorted keys so that two equal worklogs
+# are stored as the same text and can be matched with an equality comparison
+def dump_full(full: dict[str, Any]) -> str:
+    return json.dumps(full, sort_keys=True, separators=(',', ':'))
+
+
+def calc_canon_hash(full: dict[str, Any]) -> str:
+    canon = [full['comment'], full['started'], full['timeSpentSeconds']]
+    return hashlib.sha1(json.dumps(canon).encode('utf-8')).hexdigest()
+
+
+def apply_journal_entry(
+    worklogs_raw: dict[str, list[dict[str, Any]]],
+    entry: dict[str, Any]
+) -> None:
+    listwkl = worklogs_raw.setdefault(entry['issue'], [])
+    if entry['op'] == 'add':
+        listwkl.append(entry['worklog'])
+    elif entry['op'] == 'remove':
+        listwkl.remove(entry['worklog'])
+    else:
+        raise RuntimeError('Internal logic error. Please file a bug report')
+
+
+def create_checkedin_store(conf: Configuration) -> CheckedinStore:
+    checkedin_path = resolve_checkedin_path(conf)
+    checkedin_root, _ = os.path.splitext(checkedin_path)
+    if conf.checked_in_backend == BACKEND_JSON:
+        store = JSONCheckedinStore(checkedin_path)
+    elif conf.checked_in_backend == BACKEND_JOURNAL:
+        store = JournalCheckedinStore(
+            checkedin_root + '.snapshot.json',
+            checkedin_root + '.journal.jsonl'
+        )
+    elif conf.checked_in_backend == BACKEND_SQLITE:
+        store = SQLiteCheckedinStore(checkedin_root + '.sqlite3')
+    else:
+        raise RuntimeError('Internal logic error. Please file a bug report')
+    return store
+
+
+class MigrateCheckedinError(Exception):
+    pass
+
+
+# Copy the checked-in worklogs from a JSON file in the original format into the
+# backend specified by the configuration file
+def migrate_checkedin(conf: Configuration, json_path: Optional[str]) -> str:
+    if conf.checked_in_backend == BACKEND_JSON:
+        msg = (
+            "The configuration file specifies the 'json' checked-in worklogs "
+            "backend, so there is nothing to migrate. Set "
+            "'checked_in_backend' to the backend that you want to migrate to"
+        )
+        raise MigrateCheckedinError(msg)
+    src_path = resolve_checkedin_path(conf) if json_path is None else json_path
+    store = create_checkedin_store(conf)
+    if os.path.exists(store.path):
+        msg = (
+            f"The checked-in worklogs file '{store.path}' already exists. "
+            "Remove it first if you want to replace it"
+        )
+        raise MigrateCheckedinError(msg)
+    checkedin_full = JSONCheckedinStore(src_path).read()
+    store.write_all(checkedin_full)
+    return store.path
@@ -6,9 +6,16 @@ import argparse
 # https://docs.python.org/3/library/argparse.html
 # https://stackoverflow.com/a/18161115
 parser = argparse.ArgumentParser()
-parser.add_argument('-f', '--file')
+parser.add_argument('-f', '--file', action='append')
 parser.add_argument('-a', '--auto-confirm', action='store_true')
 parser.add_argument('-c', '--config-path')
 parser.add_argument('-d', '--dry-run', action='store_true')
 parser.add_argument('-i', '--init-config', action='store_true')
+parser.add_argument('-r', '--full-refresh', action='store_true')
+parser.add_argument('-m', '--migrate-checkedin', nargs='?', const='', metavar='JSON_PATH')
 parser.add_argument('-v', '--verbose', type=int, default=1)
+parser.add_argument('--window-start', metavar='DATETIME')
+parser.add_argument('--window-end', metavar='DATETIME')
+parser.add_argument('--window-from-local', action='store_true')
+parser.add_argument('--trace', metavar='TRACE_PATH')
+parser.add_argument('--profile', metavar='PROFILE_DIR')
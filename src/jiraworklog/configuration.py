@@ -22,9 +22,13 @@ class Configuration:
     issue_nms: list[str]
     checked_in_path: Optional[str]  # TODO: try to convert this to timezone here. <-- Huh?
     # TODO: change to `checkedin_path` for consistency elsewhere
+    checked_in_backend: str
     parse_type: str
     parse_delimited: Optional[dict[str, Any]]
     parse_excel: Optional[dict[str, Any]]
+    local: dict[str, Any]
+    remote: dict[str, Any]
+    sync_window: Optional[dict[str, Any]]
 
     def __init__(self, raw: dict[str, Any]):
 
@@ -41,9 +45,13 @@ class Configuration:
         self.issues_map = raw['issues_map']
         self.issue_nms = list(self.issues_map.values())
         self.checked_in_path = raw.get('checked_in_path')
+        self.checked_in_backend = raw.get('checked_in_backend') or 'json'
         self.parse_type = get_parse_type(raw)
         self.parse_delimited = raw.get('parse_delimited')
         self.parse_excel = raw.get('parse_excel')
+        self.local = raw.get('local') or {}
+        self.remote = raw.get('remote') or {}
+        self.sync_window = raw.get('sync_window')
 
 
 class ResolveConfPath:
@@ -163,11 +171,131 @@ def validate_config(raw: dict[str, Any]) -> tuple[Validator, bool]:
             'required': False,
             'type': 'string'
         },
+        'checked_in_backend': {
+            'nullable': True,
+            'required': False,
+            'type': 'string',
+            'allowed': ['json', 'journal', 'sqlite']
+        },
+        'local': {
+            'nullable': True,
+            'required': False,
+            'type': 'dict',
+            'schema': {
+                'read_workers': {
+                    'nullable': True,
+                    'required': False,
+                    'type': 'integer',
+                    'min': 1
+                }
+            }
+        },
+        'remote': {
+            'nullable': True,
+            'required': False,
+            'type': 'dict',
+            'schema': {
+                'read_workers': {
+                    'nullable': True,
+                    'required': False,
+                    'type': 'integer',
+                    'min': 1
+                },
+                'incremental': {
+                    'nullable': True,
+                    'required': False,
+                    'type': 'boolean'
+                },
+                'own_worklogs': {
+                    'nullable': True,
+                    'required': False,
+                    'type': 'boolean'
+                },
+                'page_workers': {
+                    'nullable': True,
+                    'required': False,
+                    'type': 'integer',
+                    'min': 1
+                },
+                'revalidate': {
+                    'nullable': True,
+                    'required': False,
+                    'type': 'boolean'
+                },
+                'validate_by_id': {
+                    'nullable': True,
+                    'required': False,
+                    'type': 'boolean'
+                },
+                'push_workers': {
+                    'nullable': True,
+                    'required': False,
+                    'type': 'integer',
+                    'min': 1
+                },
+                'rate_limit': {
+                    'nullable': True,
+                    'required': False,
+                    'type': 'dict',
+                    'schema': {
+                        'requests_per_second': {
+                            'nullable': True,
+                            'required': False,
+                            'type': 'number'
+                        },
+                        'burst': {
+                            'nullable': True,
+                            'required': False,
+                            'type': 'integer',
+                            'min': 1
+                        },
+                        'max_retries': {
+                            'nullable': True,
+                            'required': False,
+                            'type': 'integer',
+                            'min': 0
+                        }
+                    }
+                }
+            }
+        },
+        'sync_window': {
+            'nullable': True,
+            'required': False,
+            'type': 'dict',
+            'schema': {
+                'start': {
+                    'nullable': True,
+                    'required': False,
+                    'type': ['string', 'date', 'datetime']
+                },
+                'end': {
+                    'nullable': True,
+                    'required': False,
+                    'type': ['string', 'date', 'datetime']
+                },
+                'from_local': {
+                    'nullable': True,
+                    'required': False,
+                    'type': 'boolean'
+                }
+            }
+        },
         'parse_delimited': {
             'nullable': True,
             'required': False,
             'type': 'dict',
             'schema': {
+                'cache': {
+                    'nullable': True,
+                    'required': False,
+                    'type': 'boolean'
+                },
+                'columnar': {
+                    'nullable': True,
+                    'required': False,
+                    'type': 'boolean'
+                },
                 'col_labels': {
                     'type': 'dict',
                     'schema': {
@@ -272,6 +400,16 @@ def validate_config(raw: dict[str, Any]) -> tuple[Validator, bool]:
             'required': False,
             'type': 'dict',
             'schema': {
+                'cache': {
+                    'nullable': True,
+                    'required': False,
+                    'type': 'boolean'
+                },
+                'columnar': {
+                    'nullable': True,
+                    'required': False,
+                    'type': 'boolean'
+                },
                 'col_labels': {
                     'type': 'dict',
                     'schema': {
@@ -372,6 +510,21 @@ def perform_additional_checks(
             msg = "no formatting information provided for the 'end' column"
             tl.append(msg)
 
+    # Perform additional checks of `raw['remote']`
+    if raw.get('remote') and 'remote' not in dt:
+        rate_limit = raw['remote'].get('rate_limit') or {}
+        requests_per_second = rate_limit.get('requests_per_second')
+        if requests_per_second is not None and requests_per_second <= 0:
+            msg = "'requests_per_second' must be a positive number"
+            tl.append(msg)
+        modes = ['incremental', 'revalidate', 'validate_by_id']
+        if sum(bool(raw['remote'].get(m)) for m in modes) > 1:
+            msg = (
+                "at most one of 'incremental', 'revalidate', and "
+                "'validate_by_id' can be true"
+            )
+            tl.append(msg)
+
     # TODO: `col_labels` is 1-to-1
     # TODO: ensure delimiter2 isn't empty if non-None (has exactly one character?)
     # TODO: check that start/end format doesn't exist if column not provided
@@ -432,6 +585,18 @@ def get_parse_type(raw: dict[str, Any]) -> ParseType:
         raise RuntimeError('Internal logic error. Please file a bug report')
 
 
+# Return the `parse_delimited` or `parse_excel` section of the configuration,
+# whichever is in use
+def get_parse_conf(conf: Configuration) -> dict[str, Any]:
+    if conf.parse_type == ParseType.DELIMITED:
+        maybe_parse_conf = conf.parse_delimited
+    else:
+        maybe_parse_conf = conf.parse_excel
+    if maybe_parse_conf is None:
+        raise RuntimeError('Internal logic error. Please file a bug report')
+    return maybe_parse_conf
+
+
 def resolve_checkedin_path(conf: Configuration) -> str:
     path = conf.checked_in_path
     default = '~/.config/jiraworklog/checked-in-worklogs.json'
@@ -439,6 +604,21 @@ def resolve_checkedin_path(conf: Configuration) -> str:
     return checkedin_path
 
 
+# The remote worklogs cache is stored alongside the checked-in worklogs file so
+# that different configurations using different checked-in worklogs files don't
+# share a cache
+def resolve_remote_cache_path(conf: Configuration) -> str:
+    checkedin_root, _ = os.path.splitext(resolve_checkedin_path(conf))
+    return checkedin_root + '.remote-cache.json'
+
+
+# The local worklogs parse cache is stored alongside the checked-in worklogs
+# file for the same reason as the remote worklogs cache
+def resolve_local_cache_path(conf: Configuration) -> str:
+    checkedin_root, _ = os.path.splitext(resolve_checkedin_path(conf))
+    return checkedin_root + '.local-cache.json'
+
+
 def check_default_checkedin_path(conf: Configuration):
     is_default_path = conf.checked_in_path is None
     return is_default_path
@@ -1,7 +1,12 @@
 #!/usr/bin/env python3
 
+from collections import Counter
 from jiraworklog.utils import map2_issues
 from jiraworklog.worklogs import WorklogCanon, WorklogCheckedin, WorklogJira
+from typing import Callable, Hashable, Sequence, TypeVar
+
+T1 = TypeVar('T1')
+T2 = TypeVar('T2')
 
 
 class Diffs:
@@ -59,20 +64,15 @@ def diff_worklogs(
     return diffed_worklogs
 
 
-# The efficiency of this algorithm could likely by improved. However, note
-# that we have to handle the possibility of duplicate worklog entries which
-# precludes us from doing certain things like using sets
 def diff_worklogs_singleissue(
     other_listwkl: list[WorklogCanon],
     checkedin_listwkl: list[WorklogCheckedin]
 ) -> Diffs:
-    removed_other = []
-    remaining_other = other_listwkl.copy()
-    for checked_wkl in checkedin_listwkl:
-        try:
-            remaining_other.remove(checked_wkl)
-        except:
-            removed_other.append(checked_wkl)
+    remaining_other, removed_other, _ = match_multiset(
+        other_listwkl,
+        checkedin_listwkl,
+        WorklogCanon.canon_key
+    )
     diffs_singleissue = Diffs(remaining_other, removed_other)
     return diffs_singleissue
 
@@ -84,24 +84,30 @@ def diff_local(
     out = map2_issues(diff_local_listwkls, local_wkls, checkedin_wkls)
     return out
 
-# The efficiency of this algorithm could likely by improved. However, note
-# that we have to handle the possibility of duplicate worklog entries which
-# precludes us from doing certain things like using sets
+# Local worklogs are canonical worklogs, so they are compared against the
+# checked-in worklogs using only the canonical fields
 def diff_local_listwkls(
     local_listwkl: list[WorklogCanon],
     checkedin_listwkl: list[WorklogCheckedin]
 ) -> DiffsLocal:
-    remaining_checkedin = []
-    remaining_local = local_listwkl.copy()
-    for checked_wkl in checkedin_listwkl:
-        try:
-            remaining_local.remove(checked_wkl)
-        except:
-            remaining_checkedin.append(checked_wkl)
+    remaining_local, remaining_checkedin, _ = match_multiset(
+        local_listwkl,
+        checkedin_listwkl,
+        WorklogCanon.canon_key
+    )
     diffed_local_listwkls = DiffsLocal(remaining_local, remaining_checkedin)
     return diffed_local_listwkls
 
 
+# The issues with local worklogs that aren't among the checked-in worklogs
+def find_added_issues(
+    local_wkls: dict[str, list[WorklogCanon]],
+    checkedin_wkls: dict[str, list[WorklogCheckedin]]
+) -> set[str]:
+    diffs = diff_local(local_wkls, checkedin_wkls)
+    return {issue_nm for issue_nm, d in diffs.items() if d.added}
+
+
 def diff_remote(
     remote_wkls: dict[str, list[WorklogJira]],
     checkedin_wkls: dict[str, list[WorklogCheckedin]]
@@ -110,20 +116,54 @@ def diff_remote(
     return out
 
 
-# NOTE: I think this is the same algorithm as for `diff_remote_listwkls`?
-# The efficiency of this algorithm could likely by improved. However, note
-# that we have to handle the possibility of duplicate worklog entries which
-# precludes us from doing certain things like using sets
+# Remote worklogs and checked-in worklogs both have a full form, and two such
+# worklogs are only considered equal if all of the fields in the full form are
+# equal
 def diff_remote_listwkls(
     remote_listwkl: list[WorklogJira],
     checkedin_listwkl: list[WorklogCheckedin]
 ) -> DiffsRemote:
-    remaining_remote = []
-    remaining_checkedin = checkedin_listwkl.copy()
-    for remote_wkl in remote_listwkl:
-        try:
-            remaining_checkedin.remove(remote_wkl)
-        except:
-            remaining_remote.append(remote_wkl)
+    remaining_checkedin, remaining_remote, _ = match_multiset(
+        checkedin_listwkl,
+        remote_listwkl,
+        WorklogCheckedin.full_key
+    )
     diffed_remote_listwkls = DiffsRemote(remaining_remote, remaining_checkedin)
     return diffed_remote_listwkls
+
+
+# Match up the elements of `listwkl_2` with the elements of `listwkl_1`, and
+# return the elements of each list that didn't get matched followed by the
+# elements of `listwkl_2` that did get matched (all in their original order).
+#
+# We have to handle the possibility of duplicate worklog entries which precludes
+# us from using sets. Instead the result is the same as if we took each element
+# of `listwkl_2` in turn and tried to remove it from a copy of `listwkl_1` using
+# `list.remove` (i.e. the first unmatched equal element of `listwkl_1` is the
+# one that gets matched), but it runs in linear time rather than quadratic time
+# by counting the occurrences of each key
+def match_multiset(
+    listwkl_1: Sequence[T1],
+    listwkl_2: Sequence[T2],
+    key: Callable[..., Hashable]
+) -> tuple[list[T1], list[T2], list[T2]]:
+    keys_1 = [key(w) for w in listwkl_1]
+    available = Counter(keys_1)
+    n_matched = Counter()
+    remaining_2 = []
+    matched_2 = []
+    for wkl in listwkl_2:
+        k = key(wkl)
+        if available[k] > 0:
+            available[k] -= 1
+            n_matched[k] += 1
+            matched_2.append(wkl)
+        else:
+            remaining_2.append(wkl)
+    remaining_1 = []
+    for k, wkl in zip(keys_1, listwkl_1):
+        if n_matched[k] > 0:
+            n_matched[k] -= 1
+        else:
+            remaining_1.append(wkl)
+    return (remaining_1, remaining_2, matched_2)
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+
+import contextlib
+import cProfile
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Iterator, Optional
+
+
+class PhaseRecord:
+    """The number of items and bytes processed during one run of a phase, which
+    the code being measured can fill in as it goes.
+    """
+
+    items: int
+    nbytes: int
+
+    def __init__(self) -> None:
+        self.items = 0
+        self.nbytes = 0
+
+
+class PhaseStats:
+    """The totals for every run of a phase."""
+
+    calls: int
+    seconds: float
+    items: int
+    nbytes: int
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.seconds = 0.0
+        self.items = 0
+        self.nbytes = 0
+
+
+class Instrumentation:
+    """Records the wall time, call counts, and the number of items and bytes
+    processed for each phase of a run, along with a trace event for every run of
+    a phase. Phases can be run from multiple threads at once.
+
+    If `profile_dir` is provided then the phases that are run with
+    `profile=True` are also profiled using cProfile, and the statistics for
+    each such phase are written to `<profile_dir>/<phase name>.prof`. Note that
+    cProfile only profiles the thread that it was enabled in.
+    """
+
+    def __init__(
+        self,
+        profile_dir: Optional[str] = None,
+        clock: Callable[[], float] = time.perf_counter
+    ) -> None:
+        self.profile_dir = profile_dir
+        self.clock = clock
+        self.origin = clock()
+        self.phases: dict[str, PhaseStats] = {}
+        self.events: list[dict[str, Any]] = []
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def phase(self, name: str, profile: bool = False) -> Iterator[PhaseRecord]:
+        record = PhaseRecord()
+        maybe_profiler = None
+        if profile and self.profile_dir is not None:
+            maybe_profiler = cProfile.Profile()
+        start = self.clock()
+        if maybe_profiler is not None:
+            maybe_profiler.enable()
+        try:
+            yield record
+        finally:
+            if maybe_profiler is not None:
+                maybe_profiler.disable()
+            end = self.clock()
+            self.add(name, record.items, record.nbytes, start, end)
+            if maybe_profiler is not None and self.profile_dir is not None:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                maybe_profiler.dump_stats(
+                    os.path.join(self.profile_dir, f'{name}.prof')
+                )
+
+    # Add to the totals of a phase. If `start` and `end` are provided then this
+    # counts as a run of the phase
+    def add(
+        self,
+        name: str,
+        items: int = 0,
+        nbytes: int = 0,
+        start: Optional[float] = None,
+        end: Optional[float] = None
+    ) -> None:
+        with self.lock:
+            stats = self.phases.setdefault(name, PhaseStats())
+            stats.items += items
+            stats.nbytes += nbytes
+            if start is None or end is None:
+                return
+            stats.calls += 1
+            stats.seconds += end - start
+            self.events.append({
+                'name': name,
+                'cat': 'jiraworklog',
+                'ph': 'X',
+                'ts': round((start - self.origin) * 1e6),
+                'dur': round((end - start) * 1e6),
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+                'args': {'items': items, 'bytes': nbytes}
+            })
+
+    def fmt_summary(self, request_stats: Optional[dict[str, int]] = None) -> str:
+        header = ('Phase', 'Calls', 'Seconds', 'Items', 'Bytes')
+        rows = [
+            (
+                name,
+                str(stats.calls),
+                f'{stats.seconds:.3f}',
+                str(stats.items),
+                str(stats.nbytes)
+            )
+            for name, stats
+            in self.phases.items()
+        ]
+        widths = [
+            max(len(row[i]) for row in [header] + rows)
+            for i in range(len(header))
+        ]
+        lines = []
+        for row in [header] + rows:
+            cells = [row[0].ljust(widths[0])]
+            cells.extend(cell.rjust(width) for cell, width in zip(row[1:], widths[1:]))
+            lines.append('  '.join(cells))
+        if request_stats is not None:
+            stats_str = ', '.join(f'{k}: {v}' for k, v in request_stats.items())
+            lines.append(f'Jira requests ({stats_str})')
+        return '\n'.join(lines)
+
+    # See the "Trace Event Format" document for a description of the format,
+    # which can be loaded into e.g. chrome://tracing or https://ui.perfetto.dev
+    def write_trace(
+        self,
+        path: str,
+        request_stats: Optional[dict[str, int]] = None
+    ) -> None:
+        with self.lock:
+            summary = {
+                name: {
+                    'calls': stats.calls,
+                    'seconds': stats.seconds,
+                    'items': stats.items,
+                    'bytes': stats.nbytes
+                }
+                for name, stats
+                in self.phases.items()
+            }
+            trace = {
+                'traceEvents': list(self.events),
+                'displayTimeUnit': 'ms',
+                'otherData': {
+                    'phases': summary,
+                    'requests': request_stats
+                }
+            }
+        with open(path, 'w') as trace_file:
+            json.dump(obj=trace, fp=trace_file)
+
+
+# The instrumentation for the current run. This is module-level state (rather
+# than a parameter) so that the phases deep within e.g. the worker threads can be
+# measured without threading it through every call, and when there isn't a
+# current run measuring a phase costs next to nothing
+active_instrumentation: Optional[Instrumentation] = None
+
+
+@contextlib.contextmanager
+def activate(instr: Instrumentation) -> Iterator[Instrumentation]:
+    global active_instrumentation
+    previous = active_instrumentation
+    active_instrumentation = instr
+    try:
+        yield instr
+    finally:
+        active_instrumentation = previous
+
+
+def phase(name: str, profile: bool = False):
+    instr = active_instrumentation
+    if instr is None:
+        return contextlib.nullcontext(PhaseRecord())
+    return instr.phase(name, profile)
+
+
+def add(name: str, items: int = 0, nbytes: int = 0) -> None:
+    instr = active_instrumentation
+    if instr is not None:
+        instr.add(name, items, nbytes)
+
+
+# The size of a file for the purposes of measuring a phase, where a missing file
+# counts as empty
+def calc_file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+# The size of a value once it is serialized as JSON, such as the body of a
+# request to the Jira server
+def calc_json_size(value: Any) -> int:
+    return len(json.dumps(value).encode())
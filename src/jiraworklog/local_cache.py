@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+
+import hashlib
+from jiraworklog.configuration import Configuration, get_parse_conf
+from jiraworklog.read_local_delimited import DelimitedProgress
+from jiraworklog.worklogs import WorklogCanon
+import json
+import os
+from typing import Any, Optional
+
+LOCAL_CACHE_VERSION = 1
+
+# The number of bytes read at a time when hashing a worklogs file
+HASH_CHUNK_SIZE = 1 << 20
+
+
+class FileFingerprint:
+    """The size, modification time, and content hash of a worklogs file, along
+    with the hash of the first `prefix_size` bytes of the file when that is
+    requested (which is used to check whether a file has only been appended to).
+    """
+
+    size: int
+    mtime_ns: int
+    sha256: str
+    ends_with_newline: bool
+    prefix_sha256: Optional[str]
+
+    def __init__(
+        self,
+        size: int,
+        mtime_ns: int,
+        sha256: str,
+        ends_with_newline: bool,
+        prefix_sha256: Optional[str]
+    ) -> None:
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.sha256 = sha256
+        self.ends_with_newline = ends_with_newline
+        self.prefix_sha256 = prefix_sha256
+
+
+class LocalCacheEntry:
+    """The canonical worklogs parsed from a worklogs file, along with the
+    fingerprint of the file when it was parsed. For a delimited file that ends
+    with a newline, `progress` records how far through the file the rows were
+    read so that any rows appended later can be parsed on their own.
+    """
+
+    size: int
+    mtime_ns: int
+    sha256: str
+    worklogs: dict[str, list[dict[str, str]]]
+    progress: Optional[DelimitedProgress]
+
+    def __init__(
+        self,
+        size: int,
+        mtime_ns: int,
+        sha256: str,
+        worklogs: dict[str, list[dict[str, str]]],
+        progress: Optional[DelimitedProgress]
+    ) -> None:
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.sha256 = sha256
+        self.worklogs = worklogs
+        self.progress = progress
+
+    def is_unchanged(self, fingerprint: FileFingerprint) -> bool:
+        return (
+            self.size == fingerprint.size
+            and self.mtime_ns == fingerprint.mtime_ns
+            and self.sha256 == fingerprint.sha256
+        )
+
+    def is_appended(self, fingerprint: FileFingerprint) -> bool:
+        return (
+            self.progress is not None
+            and self.size < fingerprint.size
+            and self.sha256 == fingerprint.prefix_sha256
+        )
+
+    def to_canon_wkls(self) -> dict[str, list[WorklogCanon]]:
+        return {
+            issue_nm: [WorklogCanon(canon, issue_nm) for canon in canon_wkls]
+            for issue_nm, canon_wkls
+            in self.worklogs.items()
+        }
+
+
+class LocalCache:
+    """The parse cache for the local worklogs files, keyed by the absolute path
+    of each file. The cache is only valid for the configuration that it was
+    created with, as given by `conf_sha256`.
+    """
+
+    conf_sha256: str
+    entries: dict[str, LocalCacheEntry]
+
+    def __init__(
+        self,
+        conf_sha256: str,
+        entries: dict[str, LocalCacheEntry]
+    ) -> None:
+        self.conf_sha256 = conf_sha256
+        self.entries = entries
+
+    def get(self, worklogs_path: str) -> Optional[LocalCacheEntry]:
+        return self.entries.get(os.path.abspath(worklogs_path))
+
+    def set(self, worklogs_path: str, entry: LocalCacheEntry) -> None:
+        self.entries[os.path.abspath(worklogs_path)] = entry
+
+
+def read_local_cache(path: str, conf: Configuration) -> LocalCache:
+    # As for the remote worklogs cache, a missing or unreadable cache (or one
+    # created with a different configuration) just means starting from scratch
+    conf_sha256 = calc_conf_sha256(conf)
+    empty = LocalCache(conf_sha256, {})
+    try:
+        with open(path) as cache_file:
+            raw = json.load(cache_file)
+    except (OSError, json.decoder.JSONDecodeError):
+        return empty
+    if (
+        not isinstance(raw, dict)
+        or raw.get('version') != LOCAL_CACHE_VERSION
+        or raw.get('conf_sha256') != conf_sha256
+    ):
+        return empty
+    entries = {
+        worklogs_path: raw_to_entry(raw_entry)
+        for worklogs_path, raw_entry
+        in raw['entries'].items()
+    }
+    return LocalCache(conf_sha256, entries)
+
+
+def write_local_cache(path: str, cache: LocalCache) -> None:
+    contents = {
+        'version': LOCAL_CACHE_VERSION,
+        'conf_sha256': cache.conf_sha256,
+        'entries': {
+            worklogs_path: entry_to_raw(entry)
+            for worklogs_path, entry
+            in cache.entries.items()
+        }
+    }
+    os.makedirs(name=os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as cache_file:
+        json.dump(obj=contents, fp=cache_file)
+
+
+def raw_to_entry(raw: dict[str, Any]) -> LocalCacheEntry:
+    raw_progress = raw['progress']
+    if raw_progress is None:
+        progress = None
+    else:
+        progress = DelimitedProgress(
+            raw_progress['offset'],
+            raw_progress['fieldnames'],
+            raw_progress['n_rows']
+        )
+    entry = LocalCacheEntry(
+        raw['size'],
+        raw['mtime_ns'],
+        raw['sha256'],
+        raw['worklogs'],
+        progress
+    )
+    return entry
+
+
+def entry_to_raw(entry: LocalCacheEntry) -> dict[str, Any]:
+    if entry.progress is None:
+        raw_progress = None
+    else:
+        raw_progress = {
+            'offset': entry.progress.offset,
+            'fieldnames': entry.progress.fieldnames,
+            'n_rows': entry.progress.n_rows
+        }
+    raw = {
+        'size': entry.size,
+        'mtime_ns': entry.mtime_ns,
+        'sha256': entry.sha256,
+        'worklogs': entry.worklogs,
+        'progress': raw_progress
+    }
+    return raw
+
+
+# Create the cache entry for a file that was parsed without any errors. The
+# worklogs are only cached if the file didn't change while it was being parsed,
+# and the progress is only kept if the file ends with a newline (since otherwise
+# appending to the file would also change its last row)
+def create_cache_entry(
+    worklogs_path: str,
+    fingerprint: FileFingerprint,
+    canon_wkls: dict[str, list[WorklogCanon]],
+    maybe_progress: Optional[DelimitedProgress]
+) -> Optional[LocalCacheEntry]:
+    stat = os.stat(worklogs_path)
+    if stat.st_size != fingerprint.size or stat.st_mtime_ns != fingerprint.mtime_ns:
+        return None
+    if maybe_progress is None or not fingerprint.ends_with_newline:
+        progress = None
+    else:
+        progress = DelimitedProgress(
+            fingerprint.size,
+            maybe_progress.fieldnames,
+            maybe_progress.n_rows
+        )
+    entry = LocalCacheEntry(
+        fingerprint.size,
+        fingerprint.mtime_ns,
+        fingerprint.sha256,
+        {
+            issue_nm: [wkl.canon for wkl in wkls]
+            for issue_nm, wkls
+            in canon_wkls.items()
+        },
+        progress
+    )
+    return entry
+
+
+def fingerprint_file(
+    worklogs_path: str,
+    prefix_size: Optional[int] = None
+) -> FileFingerprint:
+    stat = os.stat(worklogs_path)
+    hasher = hashlib.sha256()
+    prefix_sha256 = None
+    last_byte = b''
+    n_read = 0
+    with open(worklogs_path, 'rb') as worklogs_file:
+        while True:
+            chunk_size = HASH_CHUNK_SIZE
+            if prefix_size is not None and prefix_sha256 is None:
+                chunk_size = min(chunk_size, prefix_size - n_read)
+            chunk = worklogs_file.read(chunk_size) if chunk_size else b''
+            if chunk:
+                hasher.update(chunk)
+                last_byte = chunk[-1:]
+                n_read += len(chunk)
+            if prefix_sha256 is None and n_read == prefix_size:
+                prefix_sha256 = hasher.hexdigest()
+                continue
+            if not chunk:
+                break
+    fingerprint = FileFingerprint(
+        n_read,
+        stat.st_mtime_ns,
+        hasher.hexdigest(),
+        last_byte in (b'\n', b'\r'),
+        prefix_sha256
+    )
+    return fingerprint
+
+
+# The parsed worklogs depend on the parsing options and the issues map
+def calc_conf_sha256(conf: Configuration) -> str:
+    raw = json.dumps([get_parse_conf(conf), conf.issues_map], sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
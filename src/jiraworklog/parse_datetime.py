@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+import re
+from typing import Callable, Optional
+
+# The maximum number of distinct format strings whose compiled parsers are
+# remembered
+FORMAT_CACHE_SIZE = 64
+
+# The `datetime.strptime` directives that have a fast-path implementation. Each
+# numeric field uses a fixed-width pattern, which is a subset of what
+# `datetime.strptime` accepts (e.g. `%m` also accepts a single digit), so any
+# string that doesn't match is handed over to `datetime.strptime`. See
+# https://docs.python.org/3/library/datetime.html#strftime-and-strptime-format-codes
+FAST_DIRECTIVES = {
+    'Y': r'(?P<Y>\d\d\d\d)',
+    'm': r'(?P<m>\d\d)',
+    'd': r'(?P<d>\d\d)',
+    'H': r'(?P<H>\d\d)',
+    'M': r'(?P<M>\d\d)',
+    'S': r'(?P<S>\d\d)',
+    'f': r'(?P<f>\d{1,6})',
+    'z': r'(?P<z>[+-]\d\d:?[0-5]\d|(?-i:Z))',
+    '%': '%'
+}
+
+
+def parse_datetime_str(time_str: str, fmt_str: str) -> datetime:
+    """Equivalent to `datetime.strptime(time_str, fmt_str)`, but faster for the
+    formats that are commonly used for worklogs.
+    """
+    return compile_strptime(fmt_str)(time_str)
+
+
+# Turn a `datetime.strptime` format string into a function that parses strings
+# in that format. If every directive in the format has a fast-path
+# implementation then the format is translated into a single compiled regular
+# expression, and otherwise the function just calls `datetime.strptime`.
+@lru_cache(maxsize=FORMAT_CACHE_SIZE)
+def compile_strptime(fmt_str: str) -> Callable[[str], datetime]:
+
+    def parse_fast(time_str: str) -> datetime:
+        match = fullmatch(time_str)
+        if match is None:
+            return datetime.strptime(time_str, fmt_str)
+        fields = match.groupdict()
+        try:
+            dt = datetime(
+                year=int(fields.get('Y') or 1900),
+                month=int(fields.get('m') or 1),
+                day=int(fields.get('d') or 1),
+                hour=int(fields.get('H') or 0),
+                minute=int(fields.get('M') or 0),
+                second=int(fields.get('S') or 0),
+                microsecond=int((fields.get('f') or '0').ljust(6, '0')),
+                tzinfo=parse_utcoffset(fields.get('z'))
+            )
+        except ValueError:
+            # An out-of-range field. Let `datetime.strptime` decide what to do
+            # so that the behavior (and the error message) is the same
+            return datetime.strptime(time_str, fmt_str)
+        return dt
+
+    maybe_pattern = translate_strptime(fmt_str)
+    if maybe_pattern is None:
+        return lambda time_str: datetime.strptime(time_str, fmt_str)
+    fullmatch = re.compile(maybe_pattern, re.IGNORECASE).fullmatch
+    return parse_fast
+
+
+# Translate a format string into a regular expression in the same way as
+# `_strptime.TimeRE.pattern`, or return `None` if the format uses a directive
+# that doesn't have a fast-path implementation or uses a directive more than
+# once. Note that `datetime.strptime` matches case-insensitively and treats a
+# run of whitespace in the format as matching one or more whitespace characters
+def translate_strptime(fmt_str: str) -> Optional[str]:
+    pattern = []
+    seen = set()
+    i = 0
+    while i < len(fmt_str):
+        char = fmt_str[i]
+        if char == '%':
+            if i + 1 >= len(fmt_str):
+                return None
+            directive = fmt_str[i + 1]
+            if directive not in FAST_DIRECTIVES or directive in seen:
+                return None
+            if directive != '%':
+                seen.add(directive)
+            pattern.append(FAST_DIRECTIVES[directive])
+            i += 2
+        elif char.isspace():
+            while i < len(fmt_str) and fmt_str[i].isspace():
+                i += 1
+            pattern.append(r'\s+')
+        else:
+            pattern.append(re.escape(char))
+            i += 1
+    return ''.join(pattern)
+
+
+def parse_utcoffset(maybe_offset: Optional[str]) -> Optional[timezone]:
+    if maybe_offset is None:
+        return None
+    if maybe_offset == 'Z':
+        return timezone.utc
+    sign = -1 if maybe_offset[0] == '-' else 1
+    digits = maybe_offset[1:].replace(':', '')
+    offset = timedelta(hours=int(digits[:2]), minutes=int(digits[2:]))
+    return timezone(sign * offset)
@@ -28,21 +28,24 @@ class CheckedinJSONDecodeError(Exception):
 
 import argparse
 import json
-from jiraworklog.configuration import Configuration, check_default_checkedin_path, resolve_checkedin_path
+from jiraworklog.checkedin_store import CheckedinStore, create_checkedin_store
+from jiraworklog.configuration import Configuration, check_default_checkedin_path
 # from jiraworklog.diff_worklogs import map_worklogs
 from jiraworklog.utils import map_worklogs_key
 from jiraworklog.worklogs import WorklogCheckedin
-from typing import Any
+from typing import Any, Optional
 
 def read_checkedin_worklogs(
     conf: Configuration,
-    cmdline_args: argparse.Namespace
+    cmdline_args: argparse.Namespace,
+    store: Optional[CheckedinStore] = None
     # actions: dict[str, Callable[..., Any]]
 ) -> dict[str, list[WorklogCheckedin]]:
-    checkedin_path = resolve_checkedin_path(conf)
+    if store is None:
+        store = create_checkedin_store(conf)
+    checkedin_path = store.path
     try:
-        with open(checkedin_path) as checkedin_file:
-            worklogs_raw = json.load(checkedin_file)
+        worklogs_raw = store.read(conf.issue_nms)
     except FileNotFoundError:
         worklogs_raw = confirm_new_checkedin(checkedin_path, conf, cmdline_args)
     except OSError as exc:
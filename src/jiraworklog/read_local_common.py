@@ -3,12 +3,12 @@
 from abc import ABC, abstractmethod
 import contextlib
 from datetime import datetime, timedelta
-from functools import total_ordering
+from functools import lru_cache, total_ordering
 from jiraworklog.worklogs import WorklogCanon
 import pytz
 import re
 import sys
-from typing import Any, Callable, Optional, Sequence, TypeVar
+from typing import Any, Callable, Hashable, Iterable, Optional, Sequence, TypeVar
 
 NativeRowSubcl = TypeVar('NativeRowSubcl', bound='NativeRow')
 
@@ -160,9 +160,58 @@ class LeftError(Exception):
         super().__init__('Internal logic error. Please file a bug report')
 
 
-def create_canon_wkls(
-        worklogs_native: Sequence[NativeRowSubcl],
+class TagMatcher:
+    """Resolves the raw tags string of a worklog to the issue that it maps to.
+
+    The tags string is split on `maybe_delimiter2` (if provided) and the tags
+    are looked up in `issues_map`. Worklogs tend to reuse a small number of tags
+    strings, so the result for each distinct tags string is remembered.
+    """
+
+    issues_map: dict[str, str]
+    maybe_delimiter2: Optional[str]
+
+    def __init__(
+        self,
         issues_map: dict[str, str],
+        maybe_delimiter2: Optional[str]
+    ) -> None:
+        self.issues_map = issues_map
+        self.maybe_delimiter2 = maybe_delimiter2
+        self._memo: dict[str, tuple[Optional[str], list[str]]] = {}
+
+    def match(self, tags_string: str) -> tuple[Optional[str], list[str]]:
+        """Return a tuple with the issue key that the tags map to (or `None`
+        if there isn't exactly one matching tag) and the sorted matching tags.
+        """
+        try:
+            return self._memo[tags_string]
+        except KeyError:
+            pass
+        if self.maybe_delimiter2:
+            tags = set(tags_string.split(self.maybe_delimiter2))
+        else:
+            tags = {tags_string}
+        tag_matches = sorted(tag for tag in tags if tag in self.issues_map)
+        if len(tag_matches) == 1:
+            maybe_id = self.issues_map[tag_matches[0]]
+        else:
+            maybe_id = None
+        result = (maybe_id, tag_matches)
+        self._memo[tags_string] = result
+        return result
+
+
+# The fields of a worklog entry, in the order in which they are parsed
+ENTRY_FIELDS = ['description', 'start', 'end', 'duration', 'tags']
+
+
+# `worklogs_native` is only iterated over once, so it can be a generator that
+# reads the entries lazily. Note that in this case reading the entries can
+# also append to `errors`, so `errors` is only checked after the loop
+def create_canon_wkls(
+        worklogs_native: Iterable[NativeRowSubcl],
+        tag_matcher: TagMatcher,
         parse_entry: Callable[[NativeRowSubcl], tuple[dict[str, Any], list[NativeInvalidElementSubcl]]],
         errors: list[NativeInvalidElementSubcl],
         mk_start_after_end: Callable[[NativeRowSubcl], NativeInvalidElementSubcl],
@@ -171,8 +220,6 @@ def create_canon_wkls(
         mk_multiple_tag_matches: Callable[[NativeRowSubcl, Sequence[str]], NativeInvalidElementSubcl],
     ) -> dict[str, Any]:
 
-    global_tags_set = set(issues_map.keys())
-
     # Ensure that all issues have an entry in the dict, even those that don't
     # get any values mapped to them
     #
@@ -180,7 +227,7 @@ def create_canon_wkls(
     # but that is okay since they will just overwrite an existing entry with the
     # same value
     worklogs = {}
-    for nm in issues_map.values():
+    for nm in tag_matcher.issues_map.values():
         worklogs[nm] = []
 
     for entry in worklogs_native:
@@ -195,13 +242,11 @@ def create_canon_wkls(
             errors.extend(entry_errors)
             continue
         else:
-            entry_tags_set = set(parsed_entry['tags'])
-            tags_intersect = global_tags_set & entry_tags_set
-            n_intersect = len(tags_intersect)
-            if n_intersect == 0:
+            maybe_id, tag_matches = tag_matcher.match(parsed_entry['tags'])
+            if not tag_matches:
                 pass
-            elif n_intersect == 1:
-                id = issues_map[list(tags_intersect)[0]]
+            elif maybe_id is not None:
+                id = maybe_id
                 try:
                     raw_canon_wkl = create_rawcanon(parsed_entry)
                 except StartAfterEndError:
@@ -216,7 +261,6 @@ def create_canon_wkls(
                 else:
                     worklogs[id].append(WorklogCanon(raw_canon_wkl, id))
             else:
-                tag_matches = sorted(list(tags_intersect))
                 invalid = mk_multiple_tag_matches(entry, tag_matches)
                 errors.append(invalid)
 
@@ -226,12 +270,110 @@ def create_canon_wkls(
     return worklogs
 
 
+# The columnar analogue of `create_canon_wkls`. Rather than handling one entry
+# at a time, each field is parsed for every entry (with each distinct raw value,
+# as given by `extract_keys`, only being parsed once), then the tags are matched
+# for every entry, and then the intervals are created for every entry. Errors
+# are only created for the entries that fail a given step. The outputs, and the
+# errors (once they are sorted), are the same as for `create_canon_wkls`.
+def create_canon_wkls_columnar(
+        worklogs_native: Sequence[NativeRowSubcl],
+        tag_matcher: TagMatcher,
+        parse_fields: dict[str, Callable[[NativeRowSubcl], Any]],
+        extract_keys: dict[str, Callable[[NativeRowSubcl], Hashable]],
+        errors: list[NativeInvalidElementSubcl],
+        mk_start_after_end: Callable[[NativeRowSubcl], NativeInvalidElementSubcl],
+        mk_negative_duration_error: Callable[[NativeRowSubcl], NativeInvalidElementSubcl],
+        mk_inconsistent_start_end_duration: Callable[[NativeRowSubcl], NativeInvalidElementSubcl],
+        mk_multiple_tag_matches: Callable[[NativeRowSubcl, Sequence[str]], NativeInvalidElementSubcl],
+    ) -> dict[str, Any]:
+
+    worklogs = {}
+    for nm in tag_matcher.issues_map.values():
+        worklogs[nm] = []
+
+    # Parse the fields one column at a time. An entry with an error in any of
+    # its fields is excluded from the remaining steps
+    n_entries = len(worklogs_native)
+    is_failed = [False] * n_entries
+    columns = {
+        field: parse_column(
+            worklogs_native,
+            parse_fields[field],
+            extract_keys[field],
+            is_failed,
+            errors
+        )
+        for field
+        in ENTRY_FIELDS
+    }
+
+    # Match the tags to the issues and create the intervals for the matched
+    # entries. Entries that don't match any of the tags are skipped. Note that
+    # both kinds of errors are created in a single pass so that they are in the
+    # same order as for `create_canon_wkls`
+    for i, tags_string in enumerate(columns['tags']):
+        if is_failed[i]:
+            continue
+        maybe_id, tag_matches = tag_matcher.match(tags_string)
+        if not tag_matches:
+            continue
+        elif maybe_id is None:
+            errors.append(mk_multiple_tag_matches(worklogs_native[i], tag_matches))
+            continue
+        id = maybe_id
+        parsed_entry = {field: columns[field][i] for field in ENTRY_FIELDS}
+        try:
+            raw_canon_wkl = create_rawcanon(parsed_entry)
+        except StartAfterEndError:
+            errors.append(mk_start_after_end(worklogs_native[i]))
+        except NegativeDurationError:
+            errors.append(mk_negative_duration_error(worklogs_native[i]))
+        except InconsistentStartEndDurationError:
+            errors.append(mk_inconsistent_start_end_duration(worklogs_native[i]))
+        else:
+            worklogs[id].append(WorklogCanon(raw_canon_wkl, id))
+
+    if errors:
+        raise NativeWorklogParseEntryError(errors)
+
+    return worklogs
+
+
+# Parse one field of every entry. Note that only successfully parsed values are
+# remembered, since the errors refer to the entry that they came from
+def parse_column(
+    worklogs_native: Sequence[NativeRowSubcl],
+    parse_field: Callable[[NativeRowSubcl], Any],
+    extract_key: Callable[[NativeRowSubcl], Hashable],
+    is_failed: list[bool],
+    errors: list[Any]
+) -> list[Any]:
+    parsed = {}
+    column = []
+    for i, entry in enumerate(worklogs_native):
+        key = extract_key(entry)
+        if key in parsed:
+            column.append(parsed[key])
+            continue
+        try:
+            value = parse_field(entry)
+        except LeftError as exc:
+            errors.append(exc.payload)
+            is_failed[i] = True
+            column.append(None)
+        else:
+            parsed[key] = value
+            column.append(value)
+    return column
+
+
 def make_parse_entry(
     parse_description: Callable[[NativeRowSubcl], str],
     parse_start: Callable[[NativeRowSubcl], Optional[datetime]],
     parse_end: Callable[[NativeRowSubcl], Optional[datetime]],
     parse_duration: Callable[[NativeRowSubcl], Optional[timedelta]],
-    parse_tags: Callable[[NativeRowSubcl], set[str]]
+    parse_tags: Callable[[NativeRowSubcl], str]
 ) -> Callable[[NativeRowSubcl], tuple[dict[str, Any], list[NativeInvalidElement]]]:
     def parse_entry(entry):
         parsed_entry = {}
@@ -361,35 +503,42 @@ def make_parse_field(
     return parse_field
 
 
-def parse_duration(duration_str: str):
-
-    def chomp(duration_str, re_str, unit_secs):
-        match = re.match(re_str, duration_str)
-        if match:
-            count = match.group(2)
-            n_secs = int(count) * unit_secs
-            new_str = duration_str[len(match.group(0)):]
-            return (new_str, n_secs)
-        else:
-            return (duration_str, 0)
-
-    params = [
-        (r'(\s*)?(\d+)w', 604800),  # seconds in a week:   60 * 60 * 24 * 7
-        (r'(\s*)?(\d+)d',  86400),  # seconds in a day:    60 * 60 * 24
-        (r'(\s*)?(\d+)h',   3600),  # seconds in an hour:  60 * 60
-        (r'(\s*)?(\d+)m',     60),  # seconds in a minute: 60
-        (r'(\s*)?(\d+)s',      1)
-    ]
-
-    total_secs = 0
-    for re_str, unit_secs in params:
-        duration_str, n_secs = chomp(duration_str, re_str, unit_secs)
-        total_secs += n_secs
-
-    if duration_str.lstrip():
+# A Jira-style duration is made up of optional week, day, hour, minute, and
+# second components, in that order, each of which can be preceded by whitespace
+DURATION_RE = re.compile(
+    r'(?:\s*(?P<w>\d+)w)?'
+    r'(?:\s*(?P<d>\d+)d)?'
+    r'(?:\s*(?P<h>\d+)h)?'
+    r'(?:\s*(?P<m>\d+)m)?'
+    r'(?:\s*(?P<s>\d+)s)?'
+    r'\s*'
+)
+
+DURATION_UNIT_SECS = {
+    'w': 604800,  # seconds in a week:   60 * 60 * 24 * 7
+    'd':  86400,  # seconds in a day:    60 * 60 * 24
+    'h':   3600,  # seconds in an hour:  60 * 60
+    'm':     60,  # seconds in a minute: 60
+    's':      1
+}
+
+# The maximum number of distinct duration strings whose parsed forms are
+# remembered. Worklogs tend to reuse a small number of durations
+DURATION_CACHE_SIZE = 1024
+
+
+# Note that errors aren't cached, and that `timedelta`s are immutable so it is
+# safe to share them
+@lru_cache(maxsize=DURATION_CACHE_SIZE)
+def parse_duration(duration_str: str) -> timedelta:
+    match = DURATION_RE.fullmatch(duration_str)
+    if match is None:
         raise DurationJiraStyleError()
+    total_secs = 0
+    for unit, count in match.groupdict().items():
+        if count is not None:
+            total_secs += int(count) * DURATION_UNIT_SECS[unit]
     duration = timedelta(seconds=total_secs)
-
     return duration
 
 
@@ -1,18 +1,23 @@
 #!/usr/bin/env python3
 
+import contextlib
 import csv
 from datetime import datetime, timedelta
-from functools import total_ordering
+from functools import lru_cache, total_ordering
 from jiraworklog.configuration import Configuration
+from jiraworklog.parse_datetime import parse_datetime_str
 from jiraworklog.read_local_common import (
     DurationJiraStyleError,
     NativeInvalidElement,
     # NativeInvalidElementSubcl,
     LeftError,
     NativeRow,
+    TagMatcher,
     TimeZoneMissingTZInfo,
     TimeZoneDualTZInfo,
+    WorklogsOSReadError,
     create_canon_wkls,
+    create_canon_wkls_columnar,
     make_add_tzinfo,
     make_parse_field,
     # make_maybe_parse_duration,
@@ -23,7 +28,12 @@ from jiraworklog.read_local_common import (
     smart_open
 )
 from jiraworklog.worklogs import WorklogCanon
-from typing import Any, Callable, Optional, Sequence, TypeVar
+import io
+from typing import Any, Callable, Hashable, Iterable, Iterator, Optional, Sequence, TypeVar
+
+# The maximum number of distinct datetime strings per column whose parsed (and
+# timezone-aware) forms are remembered
+DATETIME_CACHE_SIZE = 65536
 
 # DelimitedInvalidElementSubcl = TypeVar('DelimitedInvalidElementSubcl', bound='DelimitedInvalid')
 
@@ -45,6 +55,30 @@ class DelimitedRow(NativeRow):
         return self.index
 
 
+class DelimitedProgress:
+    """Records how much of a delimited worklogs file has been read, so that the
+    rows appended to the file since then can be read on their own.
+
+    `offset` is the number of bytes of the file that were read, `fieldnames` is
+    the header row of the file, and `n_rows` is the number of rows (not counting
+    the header) that were read.
+    """
+
+    offset: int
+    fieldnames: Optional[list[str]]
+    n_rows: int
+
+    def __init__(
+        self,
+        offset: int = 0,
+        fieldnames: Optional[list[str]] = None,
+        n_rows: int = 0
+    ) -> None:
+        self.offset = offset
+        self.fieldnames = fieldnames
+        self.n_rows = n_rows
+
+
 @total_ordering
 class DelimitedInvalid(NativeInvalidElement):
 
@@ -221,34 +255,77 @@ class StrptimeError(Exception):
     pass
 
 
+# The rows are read lazily and each one is converted to a canonical worklog
+# before the next one is read, so only the worklogs (and not every row of the
+# input) are held in memory at once. Any errors in the rows are accumulated along
+# the way and reported after the whole input has been read.
+#
+# When the `columnar` option is set the rows are instead all read up-front and
+# processed a column at a time by `create_canon_wkls_columnar`.
+#
+# If `progress` is provided then only the part of the file after
+# `progress.offset` is read, and `progress` is updated with the rows that were
+# read (although not with the new offset, which is left to the caller)
 def read_local_delimited(
     worklogs_path: str,
-    conf: Configuration
+    conf: Configuration,
+    progress: Optional[DelimitedProgress] = None
 ) -> dict[str, list[WorklogCanon]]:
-    worklogs_native, errors = read_native_wkls_delimited(worklogs_path, conf)
-    canon_wkls = create_canon_wkls_delimited(worklogs_native, conf, errors)
+    if conf.parse_delimited is None:
+        raise RuntimeError('Internal logic error. Please file a bug report')
+    errors: list[Any] = []
+    worklogs_native = iter_native_wkls_delimited(
+        worklogs_path,
+        conf,
+        errors,
+        progress
+    )
+    columnar = bool(conf.parse_delimited.get('columnar'))
+    canon_wkls = create_canon_wkls_delimited(worklogs_native, conf, errors, columnar)
     return canon_wkls
 
 
 # Return a list with each entry a row in the CSV
+def read_native_wkls_delimited(
+    worklogs_path: str,
+    conf: Configuration
+) -> tuple[list[DelimitedRow], list[DelimitedInvalid]]:
+    errors: list[DelimitedInvalid] = []
+    entries = list(iter_native_wkls_delimited(worklogs_path, conf, errors))
+    return (entries, errors)
+
+
+# Yield each row in the CSV that has the expected number of entries, and
+# append an error to `errors` for each row that doesn't
 #
 # # Get the values provides by the CSV reader default (i.e. `excel`)
 # # Note that the `quoting` attribute corresponds to `csv.QUOTE_MINIMAL`
 # # https://docs.python.org/3/library/csv.html#csv.QUOTE_MINIMAL
-def read_native_wkls_delimited(
+def iter_native_wkls_delimited(
     worklogs_path: str,
-    conf: Configuration
-) -> tuple[list[DelimitedRow], list[DelimitedInvalid]]:
+    conf: Configuration,
+    errors: list[DelimitedInvalid],
+    progress: Optional[DelimitedProgress] = None
+) -> Iterator[DelimitedRow]:
     dialect_args = construct_dialect_args(conf)
+    if progress is None or not progress.offset:
+        start_index = 0
+        open_file = smart_open(worklogs_path, mode='r', newline='')
+    else:
+        # The header row has already been read, so it isn't in the remainder of
+        # the file
+        dialect_args['fieldnames'] = progress.fieldnames
+        start_index = progress.n_rows
+        open_file = open_tail_delimited(worklogs_path, progress.offset)
     # FIXME: catch this and rethrow?
-    with smart_open(worklogs_path, mode='r', newline='') as csv_file:
-        entries = []
-        errors = []
+    with open_file as csv_file:
         # TODO: this can fail if the dialect_args args are invalid. Can it fail
         # for any other reaon? We whould catch this?
         reader = csv.DictReader(csv_file, **dialect_args)
         try:
-            for i, row in enumerate(reader):
+            for i, row in enumerate(reader, start=start_index):
+                if progress is not None:
+                    progress.n_rows = i + 1
                 # From https://docs.python.org/3/library/csv.html: if a row has
                 # more fields than fieldnames, the remaining data is put in a
                 # list and stored with the fieldname specified by restkey (which
@@ -263,13 +340,26 @@ def read_native_wkls_delimited(
                 elif None in row.values():
                     errors.append(DelimitedInvalidTooFewElems(delim_row))
                 else:
-                    entries.append(delim_row)
+                    yield delim_row
         # See https://docs.python.org/3/library/csv.html#csv.Error
         except csv.Error as exc:
             # TODO: understand better how an error can actually be thrown. Does
             # this effect how the error message should be presented?
             raise CSVStructuralError(worklogs_path) from exc
-    return (entries, errors)
+        if progress is not None:
+            progress.fieldnames = reader.fieldnames
+
+
+# Open a file in the same way as `smart_open`, but starting from byte `offset`
+@contextlib.contextmanager
+def open_tail_delimited(worklogs_path: str, offset: int):
+    try:
+        fh = open(worklogs_path, mode='rb')
+        fh.seek(offset)
+    except Exception as exc:
+        raise WorklogsOSReadError(f"'{worklogs_path}'") from exc
+    with io.TextIOWrapper(fh, newline='') as text_fh:
+        yield text_fh
 
 
 def construct_dialect_args(conf: Configuration) -> dict[str, Any]:
@@ -312,10 +402,11 @@ def construct_dialect_args(conf: Configuration) -> dict[str, Any]:
 # NativeInvalidElementSubcl? Perhaps if the parse function inputs returned a
 # pseudo-Either type with the Left returning an Optional[DelimitedInvalid]?
 def create_canon_wkls_delimited(
-        worklogs_native: Sequence[DelimitedRow],
+        worklogs_native: Iterable[DelimitedRow],
         conf: Configuration,
         # errors: list[DelimitedInvalid]
-        errors: list[Any]
+        errors: list[Any],
+        columnar: bool = False
 ) -> dict[str, Any]:
     if conf.parse_delimited is None:
         raise RuntimeError('Internal logic error. Please file a bug report')
@@ -323,26 +414,53 @@ def create_canon_wkls_delimited(
     cl = pd['col_labels']
     cf = pd['col_formats']
     maybe_tz = cf.get('timezone')
-    parse_entry = make_parse_entry(
-        parse_description=make_parse_string_delim(cl['description']),
-        parse_start=make_parse_dt_delim(cl.get('start'), cf.get('start'), maybe_tz, conf),
-        parse_end=make_parse_dt_delim(cl.get('end'), cf.get('end'), maybe_tz, conf),
-        parse_duration=make_parse_duration_delim(cl.get('duration'), conf),
-        parse_tags=make_parse_tags_delim(cl['tags'], cf.get('delimiter2'))
-    )
-    canon_wkls = create_canon_wkls(
-        worklogs_native=worklogs_native,
-        issues_map=conf.issues_map,
-        parse_entry=parse_entry,
-        errors=errors,
-        mk_start_after_end=DelimitedInvalidIntervalStartAfterEnd,
-        mk_negative_duration_error=DelimitedInvalidIntervalNegativeDuration,
-        mk_inconsistent_start_end_duration=DelimitedInvalidInconsistentStartEndDuration,
-        mk_multiple_tag_matches=DelimitedInvalidMultipleTagMatches
-    )
+    parse_fields = {
+        'description': make_parse_string_delim(cl['description']),
+        'start': make_parse_dt_delim(cl.get('start'), cf.get('start'), maybe_tz, conf),
+        'end': make_parse_dt_delim(cl.get('end'), cf.get('end'), maybe_tz, conf),
+        'duration': make_parse_duration_delim(cl.get('duration'), conf),
+        'tags': make_parse_string_delim(cl['tags'])
+    }
+    errors_args = {
+        'mk_start_after_end': DelimitedInvalidIntervalStartAfterEnd,
+        'mk_negative_duration_error': DelimitedInvalidIntervalNegativeDuration,
+        'mk_inconsistent_start_end_duration': DelimitedInvalidInconsistentStartEndDuration,
+        'mk_multiple_tag_matches': DelimitedInvalidMultipleTagMatches
+    }
+    tag_matcher = TagMatcher(conf.issues_map, cf.get('delimiter2'))
+    if columnar:
+        canon_wkls = create_canon_wkls_columnar(
+            worklogs_native=list(worklogs_native),
+            tag_matcher=tag_matcher,
+            parse_fields=parse_fields,
+            extract_keys={k: make_extract_key_delim(cl.get(k)) for k in parse_fields},
+            errors=errors,
+            **errors_args
+        )
+    else:
+        canon_wkls = create_canon_wkls(
+            worklogs_native=worklogs_native,
+            tag_matcher=tag_matcher,
+            parse_entry=make_parse_entry(**{f'parse_{k}': v for k, v in parse_fields.items()}),
+            errors=errors,
+            **errors_args
+        )
     return canon_wkls
 
 
+# The raw value that the parsed value of a field is determined by, which is
+# used to only parse each distinct value once in `create_canon_wkls_columnar`
+def make_extract_key_delim(
+    maybe_key: Optional[str]
+) -> Callable[[DelimitedRow], Hashable]:
+    def extract_key(entry: DelimitedRow):
+        return extract_string_delim(entry, key)
+    if not maybe_key:
+        return lambda _: None
+    key = maybe_key
+    return extract_key
+
+
 def make_parse_string_delim(key: str) -> Callable[[DelimitedRow], str]:
     # TODO: use functools?
     def parse_string(entry: DelimitedRow):
@@ -402,20 +520,6 @@ def make_parse_duration_delim(
     return parse_maybe_duration
 
 
-def make_parse_tags_delim(
-    key: str,
-    maybe_delimiter2: Optional[str]
-) -> Callable[[DelimitedRow], set[str]]:
-    def parse_tags_delim(entry):
-        tags_string = extract_string_delim(entry, key)
-        if maybe_delimiter2:
-            tags = set(tags_string.split(maybe_delimiter2))
-        else:
-            tags = set([tags_string])
-        return tags
-    return parse_tags_delim
-
-
 def extract_string_delim(
     entry: DelimitedRow,
     key: str
@@ -424,10 +528,14 @@ def extract_string_delim(
     return value
 
 
+# Exported time-tracker files tend to repeat the same timestamps many times, so
+# the parsed datetimes are cached. Note that `datetime`s are immutable so it is
+# safe to share them, and that errors aren't cached
 def make_parse_time_str(maybe_tz: Optional[str]):
+    @lru_cache(maxsize=DATETIME_CACHE_SIZE)
     def parse_time_str(time_str: str, fmt_str: str) -> datetime:
         try:
-            dt = datetime.strptime(time_str, fmt_str)
+            dt = parse_datetime_str(time_str, fmt_str)
         # TODO: should we use a more fine-grained exception class? Can we?
         except Exception as exc:
             raise StrptimeError() from exc
@@ -8,7 +8,9 @@ from jiraworklog.configuration import Configuration
 from jiraworklog.read_local_common import (
     LeftError,
     NativeInvalidElement,
+    TagMatcher,
     create_canon_wkls,
+    create_canon_wkls_columnar,
     # make_maybe_parse_duration,
     # make_maybe_parse_time_dt,
     make_add_tzinfo,
@@ -19,16 +21,47 @@ from jiraworklog.read_local_common import (
 )
 from jiraworklog.worklogs import WorklogCanon
 import openpyxl
-import openpyxl.cell.cell
-import openpyxl.worksheet.worksheet
-from typing import Callable, Optional, Tuple, Type, Sequence, Union
+from openpyxl.utils import get_column_letter
+from typing import Any, Callable, Hashable, Iterator, Optional, Tuple, Type, Sequence, Union
+
+
+class ExcelSheet:
+    """The parts of a worksheet that are needed for error reporting."""
+
+    __slots__ = ('title',)
+
+    def __init__(self, title: str) -> None:
+        self.title = title
+
+
+class ExcelCell:
+    """A lightweight stand-in for an `openpyxl.cell.cell.Cell` holding just the
+    value of a cell and where it came from. The workbook is read in read-only
+    mode, where openpyxl only provides the cell values, so these records are
+    created for the mapped columns instead.
+    """
+
+    __slots__ = ('value', 'parent', 'row', 'column', 'column_letter')
+
+    def __init__(
+        self,
+        value: Any,
+        parent: ExcelSheet,
+        row: int,
+        column: int
+    ) -> None:
+        self.value = value
+        self.parent = parent
+        self.row = row
+        self.column = column
+        self.column_letter = get_column_letter(column)
 
 
 class ExcelRow:
 
     def __init__(
         self,
-        row: dict[str, openpyxl.cell.cell.Cell]
+        row: dict[str, ExcelCell]
     ) -> None:
         self.row = row
 
@@ -36,8 +69,8 @@ class ExcelRow:
 @total_ordering
 class ExcelInvalid(NativeInvalidElement):
 
-    sheet: openpyxl.worksheet.worksheet.Worksheet
-    cell: Optional[openpyxl.cell.cell.Cell]
+    sheet: ExcelSheet
+    cell: Optional[ExcelCell]
     row: int
 
     # TODO: update this for the case where we have a row
@@ -70,10 +103,9 @@ class ExcelInvalid(NativeInvalidElement):
                 return True
             if self.cell.row > other.cell.row:
                 return False
-            # FIXME: this doesn't work right if we have say B and AA
-            if self.cell.column_letter < other.cell.column_letter:
+            if self.cell.column < other.cell.column:
                 return True
-            if self.cell.column_letter > other.cell.column_letter:
+            if self.cell.column > other.cell.column:
                 return False
         return False
 
@@ -82,7 +114,7 @@ class ExcelInvalidMissingHeader(ExcelInvalid):
 
     def __init__(
         self,
-        sheet: openpyxl.worksheet.worksheet.Worksheet,
+        sheet: ExcelSheet,
         missing_headers: list[str]
     ):
         self.sheet = sheet
@@ -104,7 +136,7 @@ class ExcelInvalidDuplicateHeader(ExcelInvalid):
 
     def __init__(
         self,
-        sheet: openpyxl.worksheet.worksheet.Worksheet,
+        sheet: ExcelSheet,
         duplicate_colnames: list[str]
     ):
         self.sheet = sheet
@@ -125,11 +157,11 @@ class ExcelInvalidDuplicateHeader(ExcelInvalid):
 
 class ExcelInvalidCellType(ExcelInvalid):
 
-    cell: openpyxl.cell.cell.Cell
+    cell: ExcelCell
 
     def __init__(
         self,
-        cell: openpyxl.cell.cell.Cell,
+        cell: ExcelCell,
         req_type: Union[Type[int], Type[float], Type[bool], Type[str], Type[datetime], Type[None]]
     ):
         self.sheet = cell.parent
@@ -258,108 +290,188 @@ class ExcelInvalidMultipleTagMatches(ExcelInvalid):
 #         super().__init__(msg)
 
 
+# As for the delimited worklogs, the rows are converted to canonical worklogs as
+# they are read rather than being collected first (unless the `columnar` option
+# is set). If `sheet_names` is provided then only those sheets are read
 def read_local_excel(
     worklogs_path: str,
-    conf: Configuration
+    conf: Configuration,
+    sheet_names: Optional[Sequence[str]] = None
 ) -> dict[str, list[WorklogCanon]]:
-    worklogs_native, errors = read_native_worklogs_excel(worklogs_path, conf)
-    canon_wkls = create_canon_wkls_excel(worklogs_native, conf, errors)
+    if conf.parse_excel is None:
+        raise RuntimeError('Internal logic error. Please file a bug report')
+    errors: list[ExcelInvalid] = []
+    worklogs_native = iter_native_worklogs_excel(
+        worklogs_path,
+        conf,
+        errors,
+        sheet_names
+    )
+    columnar = bool(conf.parse_excel.get('columnar'))
+    canon_wkls = create_canon_wkls_excel(worklogs_native, conf, errors, columnar)
     return canon_wkls
 
 
-# https://www.blog.pythonlibrary.org/2021/07/20/reading-spreadsheets-with-openpyxl-and-python/
 def read_native_worklogs_excel(
     worklogs_path: str,
     conf: Configuration
 ) -> Tuple[list[ExcelRow], list[ExcelInvalid]]:
+    errors: list[ExcelInvalid] = []
+    entries = list(iter_native_worklogs_excel(worklogs_path, conf, errors))
+    return (entries, errors)
+
+
+# The workbook is opened in read-only mode and the rows are read as plain
+# values, which is much faster and uses much less memory than loading every
+# cell of the workbook. Only the values in the mapped columns are kept (as
+# `ExcelCell`s so that errors can still report their location), and a sheet
+# whose header row doesn't match the configuration is skipped without reading
+# the rest of its rows.
+#
+# https://www.blog.pythonlibrary.org/2021/07/20/reading-spreadsheets-with-openpyxl-and-python/
+# https://openpyxl.readthedocs.io/en/stable/optimized.html
+def iter_native_worklogs_excel(
+    worklogs_path: str,
+    conf: Configuration,
+    errors: list[ExcelInvalid],
+    sheet_names: Optional[Sequence[str]] = None
+) -> Iterator[ExcelRow]:
 
     # TODO: need a better error message if this fails?
     # TODO: Is it possible to read the file from standard input? See
     # https://openpyxl.readthedocs.io/en/stable/api/openpyxl.reader.excel.html#openpyxl.reader.excel.ExcelReader
-    workbook = openpyxl.load_workbook(filename=worklogs_path)
+    workbook = openpyxl.load_workbook(filename=worklogs_path, read_only=True)
 
     # TODO: we only need the `col_names` out of `create_col_info`
     if conf.parse_excel is None:
         raise RuntimeError('Internal logic error. Please file a bug report')
     col_names, _ = create_col_info(conf.parse_excel)
 
-    entries = []
-    errors = []
-    for sheet_name in workbook.sheetnames:
-
-        # Grab the sheet and try to read the header row. If there is no header
-        # row then give up on the sheet
-        sheet = workbook[sheet_name]
-        rowiter = sheet.rows
-        try:
-            header = next(rowiter)
-        except:
-            continue
-
-        # Map the column letters to the internal column names. If errors are
-        # discovered in the header then give up on the sheet
-        col_map = {}
-        header_values = []
-        duplicate_headers = []
-        for cell in header:
-            if isinstance(cell.value, str) and cell.value in col_names:
-                if cell.value in header_values:
-                    duplicate_headers.append(cell.value)
-                else:
-                    header_values.append(cell.value)
-                    col_map[cell.column_letter] = cell.value
-        missing_headers = set(col_names) - set(col_map.values())
-        if missing_headers or duplicate_headers:
-            if missing_headers:
-                err = ExcelInvalidMissingHeader(sheet, list(missing_headers))
-                errors.append(err)
-            if duplicate_headers:
-                err = ExcelInvalidDuplicateHeader(sheet, duplicate_headers)
-                errors.append(err)
-            continue
-
-        # Read through the remaining rows. Note that at this point no checking
-        # is done on the content of the row elements
-        for row in rowiter:
-            new_row = {}
-            for cell in row:
-                # Useful to see what is going on:
-                # print(f"{cell.column_letter}{cell.row} = {cell.value} ({type(cell.value)})")
-                if cell.column_letter in col_map:
-                    new_row[col_map[cell.column_letter]] = cell
-            entries.append(ExcelRow(new_row))
-
-    return (entries, errors)
+    try:
+        for sheet_name in workbook.sheetnames:
+            if sheet_names is not None and sheet_name not in sheet_names:
+                continue
+
+            # Grab the sheet and try to read the header row. If there is no
+            # header row then give up on the sheet
+            sheet = ExcelSheet(sheet_name)
+            rowiter = workbook[sheet_name].iter_rows(values_only=True)
+            try:
+                header = next(rowiter)
+            except StopIteration:
+                continue
+
+            # Map the column indices to the internal column names. If errors are
+            # discovered in the header then give up on the sheet
+            col_map = {}
+            header_values = []
+            duplicate_headers = []
+            for i, value in enumerate(header):
+                if isinstance(value, str) and value in col_names:
+                    if value in header_values:
+                        duplicate_headers.append(value)
+                    else:
+                        header_values.append(value)
+                        col_map[i] = value
+            missing_headers = set(col_names) - set(col_map.values())
+            if missing_headers or duplicate_headers:
+                if missing_headers:
+                    err = ExcelInvalidMissingHeader(sheet, list(missing_headers))
+                    errors.append(err)
+                if duplicate_headers:
+                    err = ExcelInvalidDuplicateHeader(sheet, duplicate_headers)
+                    errors.append(err)
+                continue
+
+            # Read through the remaining rows. Note that at this point no
+            # checking is done on the content of the row elements. In read-only
+            # mode a row can be shorter than the header if the trailing cells
+            # are empty, in which case the missing values are treated as empty
+            # cells
+            for row_idx, values in enumerate(rowiter, start=2):
+                n_values = len(values)
+                new_row = {
+                    col_nm: ExcelCell(
+                        values[i] if i < n_values else None,
+                        sheet,
+                        row_idx,
+                        i + 1
+                    )
+                    for i, col_nm
+                    in col_map.items()
+                }
+                yield ExcelRow(new_row)
+    finally:
+        # Read-only workbooks keep the file open until they are closed
+        workbook.close()
+
+
+def read_sheet_names_excel(worklogs_path: str) -> list[str]:
+    workbook = openpyxl.load_workbook(filename=worklogs_path, read_only=True)
+    try:
+        sheet_names = list(workbook.sheetnames)
+    finally:
+        workbook.close()
+    return sheet_names
 
 
 # FIXME: typing
-def create_canon_wkls_excel(worklogs_native, conf, errors):
+def create_canon_wkls_excel(worklogs_native, conf, errors, columnar=False):
     if conf.parse_excel is None:
         raise RuntimeError('Internal logic error. Please file a bug report')
     pe = conf.parse_excel
     cl = pe['col_labels']
     cf = pe['col_formats']
     tz = cf['timezone']
-    parse_entry = make_parse_entry(
-        parse_description=make_parse_string_excel(cl['description']),
-        parse_start=make_parse_dt_excel(cl.get('start'), tz),
-        parse_end=make_parse_dt_excel(cl.get('end'), tz),
-        parse_duration=make_parse_duration_excel(cl.get('duration')),
-        parse_tags=make_parse_tags_excel(cl['tags'], cf.get('delimiter2'))
-    )
-    canon_wkls = create_canon_wkls(
-        worklogs_native=worklogs_native,
-        issues_map=conf.issues_map,
-        parse_entry=parse_entry,
-        errors=errors,
-        mk_start_after_end=ExcelInvalidIntervalStartAfterEnd,
-        mk_negative_duration_error=ExcelInvalidIntervalStartAfterEnd,
-        mk_inconsistent_start_end_duration=ExcelInvalidInconsistentStartEndDuration,
-        mk_multiple_tag_matches=ExcelInvalidMultipleTagMatches
-    )
+    parse_fields = {
+        'description': make_parse_string_excel(cl['description']),
+        'start': make_parse_dt_excel(cl.get('start'), tz),
+        'end': make_parse_dt_excel(cl.get('end'), tz),
+        'duration': make_parse_duration_excel(cl.get('duration')),
+        'tags': make_parse_string_excel(cl['tags'])
+    }
+    errors_args = {
+        'mk_start_after_end': ExcelInvalidIntervalStartAfterEnd,
+        'mk_negative_duration_error': ExcelInvalidIntervalStartAfterEnd,
+        'mk_inconsistent_start_end_duration': ExcelInvalidInconsistentStartEndDuration,
+        'mk_multiple_tag_matches': ExcelInvalidMultipleTagMatches
+    }
+    tag_matcher = TagMatcher(conf.issues_map, cf.get('delimiter2'))
+    if columnar:
+        canon_wkls = create_canon_wkls_columnar(
+            worklogs_native=list(worklogs_native),
+            tag_matcher=tag_matcher,
+            parse_fields=parse_fields,
+            extract_keys={k: make_extract_key_excel(cl.get(k)) for k in parse_fields},
+            errors=errors,
+            **errors_args
+        )
+    else:
+        canon_wkls = create_canon_wkls(
+            worklogs_native=worklogs_native,
+            tag_matcher=tag_matcher,
+            parse_entry=make_parse_entry(**{f'parse_{k}': v for k, v in parse_fields.items()}),
+            errors=errors,
+            **errors_args
+        )
     return canon_wkls
 
 
+# The raw value that the parsed value of a field is determined by, which is
+# used to only parse each distinct value once in `create_canon_wkls_columnar`.
+# The type is included since e.g. `1 == True` but only one is a valid value
+def make_extract_key_excel(
+    maybe_key: Optional[str]
+) -> Callable[[ExcelRow], Hashable]:
+    def extract_key(entry: ExcelRow):
+        value = extract_cell_excel(entry, key).value
+        return (type(value), value)
+    if not maybe_key:
+        return lambda _: None
+    key = maybe_key
+    return extract_key
+
+
 def create_col_info(parse_excel):
     col_names = []
     col_types = {}
@@ -389,7 +501,7 @@ def create_col_info(parse_excel):
 
 
 def extract_string_excel(
-    cell: openpyxl.cell.cell.Cell
+    cell: ExcelCell
 ) -> str:
     if type(cell.value) == str:
         return cell.value
@@ -398,7 +510,7 @@ def extract_string_excel(
 
 
 def extract_datetime_excel(
-    cell: openpyxl.cell.cell.Cell
+    cell: ExcelCell
 ) -> datetime:
     if type(cell.value) == datetime:
         return cell.value
@@ -408,9 +520,9 @@ def extract_datetime_excel(
 
 def make_parse_string_excel(
     key: str
-# ) -> Callable[[dict[str, openpyxl.cell.cell.Cell]], str]:
+# ) -> Callable[[dict[str, ExcelCell]], str]:
 ) -> Callable[[ExcelRow], str]:
-    # def parse_string(entry: dict[str, openpyxl.cell.cell.Cell]):
+    # def parse_string(entry: dict[str, ExcelCell]):
     def parse_string(entry: ExcelRow):
         cell = extract_cell_excel(entry, key)
         val = extract_string_excel(cell)
@@ -442,17 +554,5 @@ def make_parse_duration_excel(maybe_key: Optional[str]):
     return parse_maybe_duration
 
 
-def make_parse_tags_excel(key, maybe_delimiter2: Optional[str]):
-    def parse_tags_excel(entry):
-        tags_string = parse_string(entry)
-        if maybe_delimiter2:
-            tags = set(tags_string.split(maybe_delimiter2))
-        else:
-            tags = set([tags_string])
-        return tags
-    parse_string = make_parse_string_excel(key)
-    return parse_tags_excel
-
-
-def extract_cell_excel(row: ExcelRow, key: str) -> openpyxl.cell.cell.Cell:
+def extract_cell_excel(row: ExcelRow, key: str) -> ExcelCell:
     return row.row[key]
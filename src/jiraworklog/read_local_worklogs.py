@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import glob
+from jiraworklog.configuration import (
+    Configuration,
+    ParseType,
+    get_parse_conf,
+    resolve_local_cache_path
+)
+from jiraworklog.instrumentation import add, calc_file_size
+from jiraworklog.local_cache import (
+    FileFingerprint,
+    LocalCache,
+    create_cache_entry,
+    fingerprint_file,
+    read_local_cache,
+    write_local_cache
+)
+from jiraworklog.read_local_common import (
+    NativeInvalidElement,
+    NativeWorklogParseEntryError
+)
+from jiraworklog.read_local_delimited import DelimitedProgress, read_local_delimited
+from jiraworklog.read_local_excel import read_local_excel, read_sheet_names_excel
+from jiraworklog.worklogs import WorklogCanon
+import os
+from typing import Optional, Sequence, Union
+
+# A unit of work for a worker process: the path of a worklogs file, for Excel
+# files the name of the sheet to read (or `None` to read every sheet), and for
+# delimited files the progress through the file to resume from
+ReadTask = tuple[str, Optional[str], Optional[DelimitedProgress]]
+
+
+class LocalWorklogsFilesError(Exception):
+    """Class used to throw an error if any of the worklogs files couldn't be
+    read when reading multiple worklogs files. The errors are reported for each
+    file in turn.
+    """
+
+    def __init__(self, file_errors: Sequence[tuple[str, str]]) -> None:
+        self.file_errors = file_errors
+
+    def __str__(self) -> str:
+        msg = []
+        for path, err_msg in self.file_errors:
+            msg.append(f"Error reading worklogs from '{path}':\n{err_msg}")
+        return '\n\n'.join(msg)
+
+
+class LocalWorklogsPatternError(Exception):
+
+    def __init__(self, pattern: str) -> None:
+        self.pattern = pattern
+
+    def __str__(self) -> str:
+        return f"No worklogs files match the pattern '{self.pattern}'"
+
+
+# Read the local worklogs from standard input (if `worklogs_paths` is `None`),
+# from a single file, or from multiple files and glob patterns. Multiple files
+# (and the individual sheets of multiple Excel files) are parsed in a process
+# pool with `max_workers` processes, falling back to the `read_workers` field in
+# the `local` section of the configuration file and then to the number of CPUs.
+# The worklogs for each issue are merged in the order of the files
+# (and the order of the sheets within a file) so that the result doesn't depend
+# on which worker finishes first.
+#
+# When the `cache` parsing option is set, the worklogs parsed from each file are
+# cached so that a file that hasn't changed since the previous run isn't parsed
+# again, and only the new rows of a delimited file that has been appended to
+# are parsed. Only files that were parsed without any errors are cached, so any
+# errors are always reported in full. Set `refresh_cache` to ignore the
+# existing cache
+def read_local_worklogs(
+    worklogs_paths: Union[None, str, Sequence[str]],
+    conf: Configuration,
+    max_workers: Optional[int] = None,
+    refresh_cache: bool = False
+) -> dict[str, list[WorklogCanon]]:
+    if worklogs_paths is None:
+        return read_local_file(None, conf)
+    if isinstance(worklogs_paths, str):
+        paths = [worklogs_paths]
+    else:
+        paths = expand_worklogs_paths(worklogs_paths)
+
+    add('local_read', nbytes=sum(calc_file_size(path) for path in paths))
+
+    maybe_cache = None
+    if get_parse_conf(conf).get('cache'):
+        cache_path = resolve_local_cache_path(conf)
+        maybe_cache = read_local_cache(cache_path, conf)
+        if refresh_cache:
+            maybe_cache.entries = {}
+    plans = {path: plan_read(path, conf, maybe_cache) for path in paths}
+
+    # A single file is read in-process, in which case any error is raised as-is
+    read_paths = [path for path in paths if plans[path].is_read]
+    if len(paths) == 1:
+        file_wkls = {
+            path: read_local_file(path, conf, None, plans[path].progress)
+            for path
+            in read_paths
+        }
+        report = []
+    else:
+        file_wkls, report = read_local_files(
+            read_paths,
+            plans,
+            conf,
+            max_workers or conf.local.get('read_workers')
+        )
+
+    local_wkls: dict[str, list[WorklogCanon]] = {
+        nm: [] for nm in conf.issues_map.values()
+    }
+    for path in paths:
+        plan = plans[path]
+        if plan.is_read and path not in file_wkls:
+            continue
+        combined = merge_canon_wkls(
+            conf,
+            [plan.cached_wkls, file_wkls.get(path)]
+        )
+        is_parsed = plan.is_read and plan.fingerprint is not None
+        if maybe_cache is not None and is_parsed:
+            maybe_entry = create_cache_entry(
+                path,
+                plan.fingerprint,
+                combined,
+                plan.progress
+            )
+            if maybe_entry is not None:
+                maybe_cache.set(path, maybe_entry)
+        for issue_nm, wkls in combined.items():
+            local_wkls[issue_nm].extend(wkls)
+    if maybe_cache is not None:
+        write_local_cache(cache_path, maybe_cache)
+    if report:
+        raise LocalWorklogsFilesError(report)
+    return local_wkls
+
+
+class ReadPlan:
+    """How a worklogs file is to be read: `cached_wkls` are the worklogs taken
+    from the cache (if any), and `is_read` is whether (the rest of) the file
+    needs to be parsed, starting from `progress` for a delimited file.
+    """
+
+    fingerprint: Optional[FileFingerprint]
+    cached_wkls: Optional[dict[str, list[WorklogCanon]]]
+    is_read: bool
+    progress: Optional[DelimitedProgress]
+
+    def __init__(
+        self,
+        fingerprint: Optional[FileFingerprint],
+        cached_wkls: Optional[dict[str, list[WorklogCanon]]],
+        is_read: bool,
+        progress: Optional[DelimitedProgress]
+    ) -> None:
+        self.fingerprint = fingerprint
+        self.cached_wkls = cached_wkls
+        self.is_read = is_read
+        self.progress = progress
+
+
+def plan_read(
+    path: str,
+    conf: Configuration,
+    maybe_cache: Optional[LocalCache]
+) -> ReadPlan:
+    if maybe_cache is None:
+        return ReadPlan(None, None, True, None)
+    maybe_entry = maybe_cache.get(path)
+    prefix_size = None
+    if maybe_entry is not None and maybe_entry.progress is not None:
+        prefix_size = maybe_entry.size
+    try:
+        fingerprint = fingerprint_file(path, prefix_size)
+    except OSError:
+        # Leave it to the parser to report the error
+        return ReadPlan(None, None, True, None)
+    if maybe_entry is not None and maybe_entry.is_unchanged(fingerprint):
+        return ReadPlan(fingerprint, maybe_entry.to_canon_wkls(), False, None)
+    if maybe_entry is not None and maybe_entry.is_appended(fingerprint):
+        return ReadPlan(
+            fingerprint,
+            maybe_entry.to_canon_wkls(),
+            True,
+            maybe_entry.progress
+        )
+    if conf.parse_type == ParseType.DELIMITED:
+        progress = DelimitedProgress()
+    else:
+        progress = None
+    return ReadPlan(fingerprint, None, True, progress)
+
+
+# Read multiple files in a process pool, returning the worklogs for each file
+# that was read without any errors along with the errors for each of the other
+# files
+def read_local_files(
+    paths: Sequence[str],
+    plans: dict[str, ReadPlan],
+    conf: Configuration,
+    max_workers: Optional[int]
+) -> tuple[dict[str, dict[str, list[WorklogCanon]]], list[tuple[str, str]]]:
+    tasks = create_read_tasks(paths, plans, conf)
+    n_workers = min(len(tasks), max_workers or os.cpu_count() or 1)
+    read_task = partial(read_local_task, conf=conf)
+    if n_workers <= 1:
+        results = list(map(read_task, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            results = list(executor.map(read_task, tasks))
+
+    # Combine the results for the tasks belonging to each file. The parse
+    # errors for the sheets of a file are combined into a single
+    # `NativeWorklogParseEntryError` so that they are ordered in the same way as
+    # when the file is read on its own. The updated progress through a delimited
+    # file is passed back since the workers only update their own copy
+    task_wkls: dict[str, list[dict[str, list[WorklogCanon]]]] = {}
+    file_errors: dict[str, list[NativeInvalidElement]] = {}
+    file_msgs: dict[str, str] = {}
+    for task, result in zip(tasks, results):
+        path = task[0]
+        maybe_wkls, errors, maybe_msg, maybe_progress = result
+        if maybe_msg is not None:
+            file_msgs.setdefault(path, maybe_msg)
+        elif errors:
+            file_errors.setdefault(path, []).extend(errors)
+        elif maybe_wkls is not None:
+            task_wkls.setdefault(path, []).append(maybe_wkls)
+            plans[path].progress = maybe_progress
+    file_wkls = {}
+    report = []
+    for path in paths:
+        if path in file_msgs:
+            report.append((path, file_msgs[path]))
+        elif path in file_errors:
+            err_msg = str(NativeWorklogParseEntryError(file_errors[path]))
+            report.append((path, err_msg))
+        else:
+            file_wkls[path] = merge_canon_wkls(conf, task_wkls.get(path, []))
+    return (file_wkls, report)
+
+
+def merge_canon_wkls(
+    conf: Configuration,
+    canon_wkls_list: Sequence[Optional[dict[str, list[WorklogCanon]]]]
+) -> dict[str, list[WorklogCanon]]:
+    merged: dict[str, list[WorklogCanon]] = {
+        nm: [] for nm in conf.issues_map.values()
+    }
+    for maybe_canon_wkls in canon_wkls_list:
+        if maybe_canon_wkls is None:
+            continue
+        for issue_nm, wkls in maybe_canon_wkls.items():
+            merged[issue_nm].extend(wkls)
+    return merged
+
+
+def read_local_file(
+    worklogs_path: Optional[str],
+    conf: Configuration,
+    sheet_name: Optional[str] = None,
+    progress: Optional[DelimitedProgress] = None
+) -> dict[str, list[WorklogCanon]]:
+    if conf.parse_type == ParseType.DELIMITED:
+        local_wkls = read_local_delimited(worklogs_path, conf, progress)
+    elif sheet_name is None:
+        local_wkls = read_local_excel(worklogs_path, conf)
+    else:
+        local_wkls = read_local_excel(worklogs_path, conf, [sheet_name])
+    return local_wkls
+
+
+# Run in a worker process. Exceptions are converted to values that can be sent
+# back to the parent process: the parse errors are sent as-is so that they can
+# be combined across the sheets of a file, while any other error is sent as its
+# message since e.g. the chained cause of an exception isn't pickled
+def read_local_task(
+    task: ReadTask,
+    conf: Configuration
+) -> tuple[
+    Optional[dict[str, list[WorklogCanon]]],
+    list[NativeInvalidElement],
+    Optional[str],
+    Optional[DelimitedProgress]
+]:
+    path, sheet_name, progress = task
+    try:
+        local_wkls = read_local_file(path, conf, sheet_name, progress)
+    except NativeWorklogParseEntryError as exc:
+        return (None, exc.errors, None, None)
+    except Exception as exc:
+        return (None, [], str(exc), None)
+    return (local_wkls, [], None, progress)
+
+
+# Expand any glob patterns in `worklogs_paths`. The files matching a pattern are
+# sorted, and a file that is provided more than once is only read once
+def expand_worklogs_paths(worklogs_paths: Sequence[str]) -> list[str]:
+    paths = []
+    for path_or_pattern in worklogs_paths:
+        if glob.escape(path_or_pattern) != path_or_pattern:
+            matches = sorted(glob.glob(path_or_pattern))
+            if not matches:
+                raise LocalWorklogsPatternError(path_or_pattern)
+            paths.extend(matches)
+        else:
+            paths.append(path_or_pattern)
+    return list(dict.fromkeys(paths))
+
+
+# Excel files are split up into one task per sheet. If the sheet names can't be
+# read then the file is left as a single task so that the error is reported
+# when the worker tries to read it
+def create_read_tasks(
+    paths: Sequence[str],
+    plans: dict[str, ReadPlan],
+    conf: Configuration
+) -> list[ReadTask]:
+    tasks: list[ReadTask] = []
+    for path in paths:
+        if conf.parse_type != ParseType.EXCEL:
+            tasks.append((path, None, plans[path].progress))
+            continue
+        try:
+            sheet_names = read_sheet_names_excel(path)
+        except Exception:
+            tasks.append((path, None, None))
+        else:
+            tasks.extend((path, nm, None) for nm in sheet_names)
+    return tasks
@@ -1,32 +1,520 @@
 #!/usr/bin/env python3
 
+import argparse
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from jira import JIRA, JIRAError
+from jira.resources import Worklog
+from jira.utils import json_loads
 from jiraworklog.auth_jira import fmt_jira_error
-from jiraworklog.configuration import Configuration
-from jiraworklog.worklogs import WorklogJira
+from jiraworklog.configuration import Configuration, resolve_remote_cache_path
+from jiraworklog.diff_worklogs import find_added_issues
+from jiraworklog.instrumentation import add, phase
+from jiraworklog.remote_cache import (
+    RemoteCache,
+    calc_feed_mark,
+    create_empty_remote_cache,
+    fetch_issues_updated,
+    fetch_worklogs_by_id,
+    raw_to_jira_worklog,
+    read_remote_cache,
+    refresh_remote_cache,
+    write_remote_cache
+)
+from jiraworklog.sync_window import SyncWindow
+from jiraworklog.utils import map_worklogs_key
+from jiraworklog.worklog_author import WorklogAuthor, resolve_worklog_author
+from jiraworklog.worklogs import WorklogCanon, WorklogCheckedin, WorklogJira
+import sys
+from typing import Any, Callable, Iterator, Optional, Union
+
+# The default number of issues whose worklogs are requested from the Jira
+# server at the same time. This can be changed through the `read_workers` field
+# in the `remote` section of the configuration file
+DEFAULT_READ_WORKERS = 4
+
+# The default number of pages of an issue's worklogs that are requested from the
+# Jira server at the same time, once the first page has given the total number
+# of worklogs. This can be changed through the `page_workers` field in the
+# `remote` section of the configuration file
+DEFAULT_PAGE_WORKERS = 1
+
+# The number of worklogs requested in each page. The Jira server can use a
+# smaller page size, in which case the page size that it used is followed
+WORKLOGS_PAGE_SIZE = 5000
+
+# Called with the issue, the number of worklogs read so far, and the total
+# number of worklogs for the issue after each page of worklogs is read. Issues
+# whose worklogs fit in a single page aren't reported
+ProgressCallback = Callable[[str, int, int], None]
+
 
 class ReadJiraWorkloadError(Exception):
 
-    def __init__(self, wkl_nm: str, jira_error: JIRAError) -> None:
-        msg = (
+    errors: list[tuple[str, JIRAError]]
+
+    def __init__(self, errors: list[tuple[str, JIRAError]]) -> None:
+        self.errors = errors
+        msgs = [
             f"Unable to read the Jira worklog '{wkl_nm}'\n\n"
             f"{fmt_jira_error(jira_error)}"
+            for wkl_nm, jira_error
+            in errors
+        ]
+        super().__init__('\n\n'.join(msgs))
+
+
+class ReadJiraWorklogListError(Exception):
+
+    def __init__(self, jira_error: JIRAError) -> None:
+        msg = (
+            "Unable to read the checked-in worklogs from the Jira server by "
+            f"their ids\n\n{fmt_jira_error(jira_error)}"
         )
         super().__init__(msg)
 
 
 def read_remote_worklogs(
     jira: JIRA,
-    conf: Configuration
+    conf: Configuration,
+    cmdline_args: argparse.Namespace,
+    window: Optional[SyncWindow] = None,
+    local_wkls: Optional[dict[str, list[WorklogCanon]]] = None,
+    checkedin_wkls: Optional[dict[str, list[WorklogCheckedin]]] = None
 ) -> dict[str, list[WorklogJira]]:
-    # TODO: It might be better to collect all of the errors before giving up,
-    # but on the other hand that could lead to rather volumninous output so it's
-    # not clear what the best thing will be to do
-    worklogs = {}
-    for wkl_nm in conf.issue_nms:
+    # Multiple local tags are allowed to map to the same issue, so only request
+    # each issue once. Note that `dict.fromkeys` preserves the order of the
+    # first appearance of each issue
+    wkl_nms = list(dict.fromkeys(conf.issue_nms))
+    author = resolve_worklog_author(jira, conf)
+    progress = report_progress if cmdline_args.verbose >= 2 else None
+    if conf.remote.get('incremental'):
+        jira_basewkls = read_remote_incremental(
+            jira,
+            conf,
+            cmdline_args,
+            wkl_nms,
+            window,
+            author,
+            progress
+        )
+    elif conf.remote.get('revalidate'):
+        jira_basewkls = read_remote_revalidated(
+            jira,
+            conf,
+            cmdline_args,
+            wkl_nms,
+            window,
+            author,
+            progress
+        )
+    elif (
+        conf.remote.get('validate_by_id')
+        and local_wkls is not None
+        and checkedin_wkls is not None
+    ):
+        jira_basewkls = read_remote_by_id(
+            jira,
+            conf,
+            wkl_nms,
+            local_wkls,
+            checkedin_wkls,
+            window,
+            author,
+            progress
+        )
+    else:
+        jira_basewkls = fetch_remote_worklogs(
+            jira,
+            conf,
+            wkl_nms,
+            window,
+            author,
+            progress
+        )
+    worklogs = map_worklogs_key(WorklogJira, jira_basewkls)
+    return worklogs
+
+
+def fetch_remote_worklogs(
+    jira: JIRA,
+    conf: Configuration,
+    wkl_nms: list[str],
+    window: Optional[SyncWindow] = None,
+    author: Optional[WorklogAuthor] = None,
+    progress: Optional[ProgressCallback] = None
+) -> dict[str, list[Worklog]]:
+
+    page_workers = conf.remote.get('page_workers') or DEFAULT_PAGE_WORKERS
+
+    def fetch(wkl_nm: str) -> Union[list[Worklog], JIRAError]:
+        with phase('remote_read.issue') as record:
+            try:
+                wkls = request_worklogs(
+                    jira,
+                    wkl_nm,
+                    window,
+                    author,
+                    page_workers,
+                    progress
+                )
+            except JIRAError as exc:
+                return exc
+            record.items = len(wkls)
+        return wkls
+
+    max_workers = conf.remote.get('read_workers') or DEFAULT_READ_WORKERS
+    if max_workers == 1 or len(wkl_nms) <= 1:
+        results = [fetch(nm) for nm in wkl_nms]
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(fetch, wkl_nms))
+
+    # Collect all of the errors before giving up so that the user can see every
+    # issue that is failing at once. The results are stored in the same order
+    # that the issues were requested, so the output doesn't depend on the order
+    # in which the requests completed
+    jira_basewkls = {}
+    errors = []
+    for wkl_nm, result in zip(wkl_nms, results):
+        if isinstance(result, JIRAError):
+            errors.append((wkl_nm, result))
+        else:
+            jira_basewkls[wkl_nm] = result
+    if errors:
+        raise ReadJiraWorkloadError(errors)
+    return jira_basewkls
+
+
+def read_remote_incremental(
+    jira: JIRA,
+    conf: Configuration,
+    cmdline_args: argparse.Namespace,
+    wkl_nms: list[str],
+    window: Optional[SyncWindow] = None,
+    author: Optional[WorklogAuthor] = None,
+    progress: Optional[ProgressCallback] = None
+) -> dict[str, list[Worklog]]:
+
+    # A cache that was made by `read_remote_revalidated` doesn't have a
+    # high-water mark for the feeds, so it can't be brought up-to-date
+    cache_path = resolve_remote_cache_path(conf)
+    cache = load_remote_cache(cache_path, cmdline_args, author)
+    if cache.since is None:
+        cache = create_empty_remote_cache(cache.author_id)
+
+    # Bring the cached issues up-to-date using the Jira worklog feeds. Any
+    # issues that aren't in the cache (which is all of them for a new cache, or
+    # an issue that was newly added to the configuration file) have their full
+    # history downloaded
+    if cache.since is not None:
+        with phase('remote_read.refresh_cache'):
+            refresh_remote_cache(jira, cache, author)
+    missing_nms = [nm for nm in wkl_nms if nm not in cache.worklogs]
+    if missing_nms:
+        mark = calc_feed_mark()
+        fetched = fetch_remote_worklogs(
+            jira,
+            conf,
+            missing_nms,
+            None,
+            author,
+            progress
+        )
+        for wkl_nm in missing_nms:
+            raw_wkls = [w.raw for w in fetched[wkl_nm]]
+            issue_id = (
+                str(raw_wkls[0]['issueId'])
+                if raw_wkls
+                else fetch_issue_id(jira, wkl_nm)
+            )
+            cache.set_issue(wkl_nm, issue_id, raw_wkls)
+        if cache.since is None:
+            cache.since = mark
+    write_remote_cache(cache_path, cache)
+
+    return cached_to_jira_worklogs(jira, cache, wkl_nms, window)
+
+
+# Revalidate the cached worklogs for each issue by checking whether the issue
+# has been updated since its worklogs were downloaded, which takes one search
+# request for up to `SEARCH_BATCH_SIZE` issues. Only the worklogs of the issues
+# that have been updated are downloaded again. If the search fails (e.g.
+# because one of the issues doesn't exist) then every issue is downloaded
+# again, which reports any errors for the individual issues
+def read_remote_revalidated(
+    jira: JIRA,
+    conf: Configuration,
+    cmdline_args: argparse.Namespace,
+    wkl_nms: list[str],
+    window: Optional[SyncWindow] = None,
+    author: Optional[WorklogAuthor] = None,
+    progress: Optional[ProgressCallback] = None
+) -> dict[str, list[Worklog]]:
+
+    cache_path = resolve_remote_cache_path(conf)
+    cache = load_remote_cache(cache_path, cmdline_args, author)
+    cache.since = None
+    with phase('remote_read.revalidate') as record:
         try:
-            raw_wkls = jira.worklogs(wkl_nm)
+            issues_updated = fetch_issues_updated(jira, wkl_nms)
+        except JIRAError:
+            issues_updated = {}
+        record.items = len(issues_updated)
+    stale_nms = [
+        nm
+        for nm
+        in wkl_nms
+        if nm not in cache.worklogs
+        or nm not in issues_updated
+        or cache.issue_updated.get(nm) != issues_updated[nm][1]
+    ]
+    if stale_nms:
+        fetched = fetch_remote_worklogs(
+            jira,
+            conf,
+            stale_nms,
+            None,
+            author,
+            progress
+        )
+        for wkl_nm in stale_nms:
+            raw_wkls = [w.raw for w in fetched[wkl_nm]]
+            if wkl_nm in issues_updated:
+                issue_id, updated = issues_updated[wkl_nm]
+                cache.issue_updated[wkl_nm] = updated
+            else:
+                issue_id = (
+                    str(raw_wkls[0]['issueId'])
+                    if raw_wkls
+                    else fetch_issue_id(jira, wkl_nm)
+                )
+                cache.issue_updated.pop(wkl_nm, None)
+            cache.set_issue(wkl_nm, issue_id, raw_wkls)
+    write_remote_cache(cache_path, cache)
+    return cached_to_jira_worklogs(jira, cache, wkl_nms, window)
+
+
+# When the remote worklogs are limited to those of one user then the cache only
+# holds that user's worklogs, so a cache that was made for a different user (or
+# for every user) can't be used
+def load_remote_cache(
+    cache_path: str,
+    cmdline_args: argparse.Namespace,
+    author: Optional[WorklogAuthor]
+) -> RemoteCache:
+    author_id = None if author is None else author.to_id()
+    maybe_cache = None if cmdline_args.full_refresh else read_remote_cache(cache_path)
+    if maybe_cache is None or maybe_cache.author_id != author_id:
+        return create_empty_remote_cache(author_id)
+    return maybe_cache
+
+
+# The cache holds every worklog for the issues, so the sync window is applied to
+# the cached worklogs
+def cached_to_jira_worklogs(
+    jira: JIRA,
+    cache: RemoteCache,
+    wkl_nms: list[str],
+    window: Optional[SyncWindow]
+) -> dict[str, list[Worklog]]:
+    jira_basewkls = {
+        nm: [
+            raw_to_jira_worklog(jira, w)
+            for w
+            in cache.worklogs[nm]
+            if window is None or window.contains_str(w['started'])
+        ]
+        for nm
+        in wkl_nms
+    }
+    return jira_basewkls
+
+
+# The remote worklogs that aren't among the checked-in worklogs are only needed
+# to match up with local worklogs that aren't among the checked-in worklogs
+# either (see `reconcile_added_listwkl`). So for the issues without any such
+# local worklogs, the remote worklogs are taken to be whatever is left of the
+# checked-in worklogs on the Jira server, which are requested by id in batches
+# rather than listing every worklog for the issue. Worklogs that have since
+# been moved to another issue are treated as if they were deleted
+def read_remote_by_id(
+    jira: JIRA,
+    conf: Configuration,
+    wkl_nms: list[str],
+    local_wkls: dict[str, list[WorklogCanon]],
+    checkedin_wkls: dict[str, list[WorklogCheckedin]],
+    window: Optional[SyncWindow] = None,
+    author: Optional[WorklogAuthor] = None,
+    progress: Optional[ProgressCallback] = None
+) -> dict[str, list[Worklog]]:
+
+    added_nms = find_added_issues(local_wkls, checkedin_wkls)
+    listed = fetch_remote_worklogs(
+        jira,
+        conf,
+        [nm for nm in wkl_nms if nm in added_nms],
+        window,
+        author,
+        progress
+    )
+
+    # The position of each checked-in worklog, so that the worklogs for each
+    # issue are in the same order as the checked-in worklogs regardless of the
+    # order in which the Jira server returns them
+    owners: dict[str, tuple[str, str, int]] = {}
+    for wkl_nm in wkl_nms:
+        if wkl_nm in listed:
+            continue
+        for i, wkl in enumerate(checkedin_wkls.get(wkl_nm, [])):
+            owners[wkl.full['id']] = (wkl_nm, str(wkl.full['issueId']), i)
+    with phase('remote_read.list') as record:
+        try:
+            raw_wkls = fetch_worklogs_by_id(jira, list(owners))
         except JIRAError as exc:
-            raise ReadJiraWorkloadError(wkl_nm, exc)
-        worklogs[wkl_nm] = [WorklogJira(x, wkl_nm) for x in raw_wkls]
-    return worklogs
+            raise ReadJiraWorklogListError(exc) from exc
+        record.items = len(raw_wkls)
+    found: dict[str, list[tuple[int, dict[str, Any]]]] = {}
+    for raw in raw_wkls:
+        wkl_nm, issue_id, i = owners[str(raw['id'])]
+        if str(raw['issueId']) == issue_id and is_wanted(raw, window, author):
+            found.setdefault(wkl_nm, []).append((i, raw))
+
+    jira_basewkls = {}
+    for wkl_nm in wkl_nms:
+        if wkl_nm in listed:
+            jira_basewkls[wkl_nm] = listed[wkl_nm]
+        else:
+            jira_basewkls[wkl_nm] = [
+                raw_to_jira_worklog(jira, raw)
+                for _, raw
+                in sorted(found.get(wkl_nm, []), key=lambda x: x[0])
+            ]
+    return jira_basewkls
+
+
+# Request every worklog for an issue. Note that `JIRA.worklogs` only returns the
+# first page of worklogs, so the worklogs are requested a page at a time instead.
+# The pages are filtered and wrapped as they arrive, but they are collected into
+# one list since the worklogs of an issue are diffed all at once
+def request_worklogs(
+    jira: JIRA,
+    wkl_nm: str,
+    window: Optional[SyncWindow],
+    author: Optional[WorklogAuthor] = None,
+    page_workers: int = DEFAULT_PAGE_WORKERS,
+    progress: Optional[ProgressCallback] = None
+) -> list[Worklog]:
+    wkls = []
+    pages = iter_worklog_pages(jira, wkl_nm, window, author, page_workers, progress)
+    for page_wkls in pages:
+        wkls.extend(page_wkls)
+    return wkls
+
+
+# Iterate over the pages of the worklogs for an issue. The first page gives the
+# total number of worklogs, after which the remaining pages are requested
+# `page_workers` at a time and yielded in order. No more than `page_workers`
+# pages are requested ahead of the page being yielded, so that only that many
+# raw pages are held in memory at once. When there is a sync window
+# the Jira server is asked to only return the worklogs that started inside of
+# the window. Not every Jira server supports these parameters, and there aren't
+# any parameters for the author, so each page is also filtered here before the
+# worklogs are wrapped in `Worklog` objects. See
+# https://developer.atlassian.com/cloud/jira/platform/rest/v2/api-group-issue-worklogs/#api-rest-api-2-issue-issueidorkey-worklog-get
+def iter_worklog_pages(
+    jira: JIRA,
+    wkl_nm: str,
+    window: Optional[SyncWindow],
+    author: Optional[WorklogAuthor] = None,
+    page_workers: int = DEFAULT_PAGE_WORKERS,
+    progress: Optional[ProgressCallback] = None
+) -> Iterator[list[Worklog]]:
+
+    params = {} if window is None else window.to_params()
+
+    # The page is requested through the session rather than `JIRA._get_json`
+    # so that the size of the response body can be recorded
+    def request_page(start_at: int) -> dict[str, Any]:
+        page_params = dict(params, startAt=start_at, maxResults=WORKLOGS_PAGE_SIZE)
+        url = jira._get_url(f'issue/{wkl_nm}/worklog')
+        with phase('remote_read.page') as record:
+            response = jira._session.get(url, params=page_params)
+            page = json_loads(response)
+            record.items = len(page['worklogs'])
+            record.nbytes = len(response.content)
+        add('remote_read', nbytes=record.nbytes)
+        return page
+
+    def to_worklogs(page: dict[str, Any]) -> list[Worklog]:
+        return [
+            raw_to_jira_worklog(jira, raw)
+            for raw
+            in page['worklogs']
+            if is_wanted(raw, window, author)
+        ]
+
+    page = request_page(0)
+    page_size = len(page['worklogs'])
+    total = page.get('total', page_size)
+    n_read = page_size
+    yield to_worklogs(page)
+    if page_size == 0 or n_read >= total:
+        return
+    if progress is not None:
+        progress(wkl_nm, n_read, total)
+
+    if page_workers > 1:
+        starts = iter(range(n_read, total, page_size))
+        with ThreadPoolExecutor(max_workers=page_workers) as executor:
+            pending: deque[Future[dict[str, Any]]] = deque()
+
+            def submit_next() -> None:
+                start_at = next(starts, None)
+                if start_at is not None:
+                    pending.append(executor.submit(request_page, start_at))
+
+            for _ in range(page_workers):
+                submit_next()
+            while pending:
+                page = pending.popleft().result()
+                submit_next()
+                n_read += len(page['worklogs'])
+                if progress is not None:
+                    progress(wkl_nm, n_read, total)
+                yield to_worklogs(page)
+    else:
+        while n_read < total:
+            page = request_page(n_read)
+            # Worklogs that are deleted while the pages are being read can
+            # leave the last pages empty
+            if not page['worklogs']:
+                break
+            n_read += len(page['worklogs'])
+            if progress is not None:
+                progress(wkl_nm, n_read, total)
+            yield to_worklogs(page)
+
+
+def is_wanted(
+    raw: dict[str, Any],
+    window: Optional[SyncWindow],
+    author: Optional[WorklogAuthor]
+) -> bool:
+    return (
+        (window is None or window.contains_str(raw['started']))
+        and (author is None or author.matches(raw))
+    )
+
+
+def fetch_issue_id(jira: JIRA, wkl_nm: str) -> str:
+    try:
+        issue = jira.issue(wkl_nm, fields='id')
+    except JIRAError as exc:
+        raise ReadJiraWorkloadError([(wkl_nm, exc)]) from exc
+    return str(issue.id)
+
+
+def report_progress(wkl_nm: str, n_read: int, total: int) -> None:
+    msg = f"Read {n_read} of {total} remote worklogs for the issue '{wkl_nm}'"
+    print(msg, file=sys.stderr)
@@ -2,10 +2,10 @@
 
 from __future__ import annotations
 
-from jiraworklog.diff_worklogs import DiffsLocal, DiffsRemote
+from jiraworklog.diff_worklogs import DiffsLocal, DiffsRemote, match_multiset
 from jiraworklog.update_instructions import UpdateInstructions
-from jiraworklog.utils import find
 from jiraworklog.worklogs import WorklogCanon, WorklogCheckedin, WorklogJira
+from typing import Hashable
 
 
 class ReconciledDiffs:
@@ -147,46 +147,59 @@ def reconcile_diffs(
 #     diffs_aligned = ReconciledDiffs(updated_local, updated_remote, aligned)
 #     return diffs_aligned
 
+# Local worklogs are compared against the remote worklogs using only the
+# canonical fields. Each remote worklog is matched with the first unmatched
+# equal local worklog (see `match_multiset`)
 def reconcile_added_listwkl(
     local_listwkl: list[WorklogCanon],
     remote_listwkl: list[WorklogJira]
 ) -> ReconciledAdded:
-    remaining_local = local_listwkl.copy()
-    remaining_remote = []
-    aligned = []
-    for remote_wkl in remote_listwkl:
-        try:
-            remaining_local.remove(remote_wkl)
-            aligned.append(remote_wkl)
-        except:
-            remaining_remote.append(remote_wkl)
+    remaining_local, remaining_remote, aligned = match_multiset(
+        local_listwkl,
+        remote_listwkl,
+        WorklogCanon.canon_key
+    )
     diffs_aligned = ReconciledAdded(remaining_local, remaining_remote, aligned)
     return diffs_aligned
 
 
-# NOTE: this is the exact same algorithm as `reconcile_added_listwkl`
+# NOTE: this is the same algorithm as `reconcile_added_listwkl`, except that
+# both sides are checked-in worklogs and so are compared using all of the fields
+# in the full worklogs
 def reconcile_removed_listwkl(
     local_listwkl: list[WorklogCheckedin],
     remote_listwkl: list[WorklogCheckedin]
 ) -> ReconciledRemoved:
-    remaining_local = local_listwkl.copy()
-    remaining_remote = []
-    aligned = []
-    for remote_wkl in remote_listwkl:
-        try:
-            remaining_local.remove(remote_wkl)
-            aligned.append(remote_wkl)
-        except:
-            remaining_remote.append(remote_wkl)
+    remaining_local, remaining_remote, aligned = match_multiset(
+        local_listwkl,
+        remote_listwkl,
+        WorklogCheckedin.full_key
+    )
     diffs_aligned = ReconciledRemoved(remaining_local, remaining_remote, aligned)
     return diffs_aligned
 
 
+# Find the remote worklog corresponding to each checked-in worklog. An index of
+# the remote worklogs is built the first time that an issue is encountered so
+# that each lookup is a dict access rather than a scan through all of the
+# issue's remote worklogs. When there are multiple equal remote worklogs the
+# first one is used
 def map_checkedin_to_jira(
     local_listwkl: list[WorklogCheckedin],
     remote_wkls: dict[str, list[WorklogJira]]
 ) -> list[WorklogJira]:
-    out = [find(wkl, remote_wkls[wkl.issueKey]) for wkl in local_listwkl]
+    indices: dict[str, dict[Hashable, WorklogJira]] = {}
+    out = []
+    for wkl in local_listwkl:
+        if wkl.issueKey not in indices:
+            index = {}
+            for remote_wkl in remote_wkls[wkl.issueKey]:
+                index.setdefault(remote_wkl.full_key(), remote_wkl)
+            indices[wkl.issueKey] = index
+        try:
+            out.append(indices[wkl.issueKey][wkl.full_key()])
+        except KeyError:
+            raise RuntimeError('Unable to find the provided value in the collection')
     return out
 
 
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+
+from jira import JIRA, JIRAError
+from jira.resources import Worklog
+from jira.utils import json_loads
+from jiraworklog.auth_jira import fmt_jira_error
+from jiraworklog.worklog_author import WorklogAuthor
+import json
+import os
+import time
+from typing import Any, Optional
+
+REMOTE_CACHE_VERSION = 1
+
+# Jira leaves the worklogs that were updated during the minute preceding a
+# request out of the `worklog/updated` and `worklog/deleted` feeds. When the
+# full history of an issue is downloaded we therefore set the high-water mark a
+# little before the time of the download, so that nothing is missed by the next
+# incremental update. Downloading a few unchanged worklogs a second time is
+# harmless since they simply overwrite their cached copy
+FEED_MARGIN_MS = 60000
+
+# The maximum number of worklog IDs accepted by the `worklog/list` endpoint
+LIST_BATCH_SIZE = 1000
+
+# The number of issue keys in each JQL search for the last time that the issues
+# were updated, which keeps the request URL well within the length limit
+SEARCH_BATCH_SIZE = 100
+
+
+class RemoteCache:
+    """A local copy of the remote worklogs for each issue, together with the
+    high-water mark of the Jira worklog feeds that the copy reflects. When
+    `author_id` isn't `None` then the copy only holds that user's worklogs.
+
+    Instead of using the feeds, the copy can be revalidated using the `updated`
+    field of each issue, in which case `issue_updated` holds the value of the
+    field at the time that the issue's worklogs were downloaded and `since` is
+    `None`.
+    """
+
+    since: Optional[int]
+    issue_ids: dict[str, str]
+    worklogs: dict[str, list[dict[str, Any]]]
+    author_id: Optional[str]
+    issue_updated: dict[str, str]
+
+    def __init__(
+        self,
+        since: Optional[int],
+        issue_ids: dict[str, str],
+        worklogs: dict[str, list[dict[str, Any]]],
+        author_id: Optional[str] = None,
+        issue_updated: Optional[dict[str, str]] = None
+    ) -> None:
+        self.since = since
+        self.issue_ids = issue_ids
+        self.worklogs = worklogs
+        self.author_id = author_id
+        self.issue_updated = {} if issue_updated is None else issue_updated
+
+    def set_issue(
+        self,
+        issue_nm: str,
+        issue_id: str,
+        raw_wkls: list[dict[str, Any]]
+    ) -> None:
+        self.issue_ids[issue_nm] = issue_id
+        self.worklogs[issue_nm] = raw_wkls
+
+    # The position of each cached worklog is indexed by its id the first time
+    # that an issue is encountered, so that each updated worklog is a dict
+    # lookup rather than a scan through all of the issue's cached worklogs
+    def merge_updated(self, raw_wkls: list[dict[str, Any]]) -> None:
+        issue_nms = {v: k for k, v in self.issue_ids.items()}
+        indices: dict[str, dict[str, int]] = {}
+        for raw in raw_wkls:
+            issue_nm = issue_nms.get(str(raw['issueId']))
+            # The feeds cover every issue on the Jira server, not just the ones
+            # that we are tracking
+            if issue_nm is None:
+                continue
+            cached_wkls = self.worklogs[issue_nm]
+            if issue_nm not in indices:
+                indices[issue_nm] = {
+                    w['id']: i for i, w in enumerate(cached_wkls)
+                }
+            index = indices[issue_nm]
+            if raw['id'] in index:
+                cached_wkls[index[raw['id']]] = raw
+            else:
+                index[raw['id']] = len(cached_wkls)
+                cached_wkls.append(raw)
+
+    def merge_deleted(self, wkl_ids: list[str]) -> None:
+        deleted = set(wkl_ids)
+        for issue_nm, cached_wkls in self.worklogs.items():
+            self.worklogs[issue_nm] = [
+                w for w in cached_wkls if w['id'] not in deleted
+            ]
+
+
+class RemoteCacheFeedError(Exception):
+
+    def __init__(self, endpoint: str, jira_error: JIRAError) -> None:
+        msg = (
+            f"Unable to read the Jira '{endpoint}' endpoint while updating the "
+            "remote worklogs cache. You can use the '--full-refresh' "
+            "command-line option to download the remote worklogs from "
+            f"scratch\n\n{fmt_jira_error(jira_error)}"
+        )
+        super().__init__(msg)
+
+
+def read_remote_cache(path: str) -> Optional[RemoteCache]:
+    # The cache is only ever an optimization, so if it is missing or unreadable
+    # then we just act as though we are starting from scratch
+    try:
+        with open(path) as cache_file:
+            raw = json.load(cache_file)
+    except (OSError, json.decoder.JSONDecodeError):
+        return None
+    if not isinstance(raw, dict) or raw.get('version') != REMOTE_CACHE_VERSION:
+        return None
+    cache = RemoteCache(
+        raw['since'],
+        raw['issue_ids'],
+        raw['worklogs'],
+        raw.get('author_id'),
+        raw.get('issue_updated')
+    )
+    return cache
+
+
+def write_remote_cache(path: str, cache: RemoteCache) -> None:
+    contents = {
+        'version': REMOTE_CACHE_VERSION,
+        'since': cache.since,
+        'issue_ids': cache.issue_ids,
+        'worklogs': cache.worklogs,
+        'author_id': cache.author_id,
+        'issue_updated': cache.issue_updated
+    }
+    os.makedirs(name=os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as cache_file:
+        json.dump(obj=contents, fp=cache_file)
+
+
+def create_empty_remote_cache(author_id: Optional[str] = None) -> RemoteCache:
+    return RemoteCache(None, {}, {}, author_id)
+
+
+def refresh_remote_cache(
+    jira: JIRA,
+    cache: RemoteCache,
+    author: Optional[WorklogAuthor] = None
+) -> None:
+    if cache.since is None:
+        raise RuntimeError('Internal logic error. Please file a bug report')
+    updated_ids, updated_until = fetch_worklog_feed(
+        jira,
+        'worklog/updated',
+        cache.since
+    )
+    deleted_ids, deleted_until = fetch_worklog_feed(
+        jira,
+        'worklog/deleted',
+        cache.since
+    )
+    try:
+        updated_wkls = fetch_worklogs_by_id(jira, updated_ids)
+    except JIRAError as exc:
+        raise RemoteCacheFeedError('worklog/list', exc) from exc
+    if author is not None:
+        updated_wkls = [w for w in updated_wkls if author.matches(w)]
+    cache.merge_updated(updated_wkls)
+    cache.merge_deleted(deleted_ids)
+    # Taking the smaller of the two marks means that the next update might see
+    # some of the same changes a second time, but that is harmless
+    cache.since = min(updated_until, deleted_until)
+
+
+# See https://developer.atlassian.com/cloud/jira/platform/rest/v2/api-group-issue-worklogs/#api-rest-api-2-worklog-updated-get
+def fetch_worklog_feed(
+    jira: JIRA,
+    endpoint: str,
+    since: int
+) -> tuple[list[str], int]:
+    wkl_ids = []
+    while True:
+        try:
+            page = jira._get_json(endpoint, params={'since': since})
+        except JIRAError as exc:
+            raise RemoteCacheFeedError(endpoint, exc) from exc
+        values = page.get('values', [])
+        wkl_ids.extend(str(v['worklogId']) for v in values)
+        if values:
+            since = page['until']
+        if page.get('lastPage', True):
+            break
+    return (wkl_ids, since)
+
+
+# Worklogs that no longer exist are left out of the response rather than being
+# reported as an error. See
+# https://developer.atlassian.com/cloud/jira/platform/rest/v2/api-group-issue-worklogs/#api-rest-api-2-worklog-list-post
+def fetch_worklogs_by_id(
+    jira: JIRA,
+    wkl_ids: list[str]
+) -> list[dict[str, Any]]:
+    raw_wkls = []
+    url = jira._get_url('worklog/list')
+    for i in range(0, len(wkl_ids), LIST_BATCH_SIZE):
+        batch = [int(x) for x in wkl_ids[i:(i + LIST_BATCH_SIZE)]]
+        response = jira._session.post(url, data=json.dumps({'ids': batch}))
+        raw_wkls.extend(json_loads(response))
+    return raw_wkls
+
+
+# Find the issue id and the value of the `updated` field for each issue. Adding,
+# updating, or deleting a worklog updates the field, so an issue whose field
+# hasn't changed still has the same worklogs. The results are keyed by the
+# issue names as they were given, which can be either issue keys or issue ids,
+# and issues that the Jira server doesn't return are left out. See
+# https://developer.atlassian.com/cloud/jira/platform/rest/v2/api-group-issue-search/#api-rest-api-2-search-get
+def fetch_issues_updated(
+    jira: JIRA,
+    issue_nms: list[str]
+) -> dict[str, tuple[str, str]]:
+    issues_updated = {}
+    for i in range(0, len(issue_nms), SEARCH_BATCH_SIZE):
+        batch = issue_nms[i:(i + SEARCH_BATCH_SIZE)]
+        jql = 'key in ({})'.format(', '.join(f'"{nm}"' for nm in batch))
+        start_at = 0
+        while True:
+            params = {
+                'jql': jql,
+                'fields': 'updated',
+                'startAt': start_at,
+                'maxResults': len(batch)
+            }
+            page = jira._get_json('search', params=params)
+            for issue in page['issues']:
+                issue_id = str(issue['id'])
+                issue_updated = (issue_id, issue['fields']['updated'])
+                for nm in (issue['key'], issue_id):
+                    if nm in batch:
+                        issues_updated[nm] = issue_updated
+            start_at += len(page['issues'])
+            if not page['issues'] or start_at >= page['total']:
+                break
+    return issues_updated
+
+
+def raw_to_jira_worklog(jira: JIRA, raw: dict[str, Any]) -> Worklog:
+    return Worklog(jira._options, jira._session, raw)
+
+
+def calc_feed_mark() -> int:
+    return int(time.time() * 1000) - FEED_MARGIN_MS
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from jira import JIRA
+from jiraworklog.configuration import Configuration
+import random
+import requests
+from requests.adapters import HTTPAdapter
+import threading
+import time
+from typing import Any, Callable, Optional
+
+# Default values for the fields in the `rate_limit` section of the `remote`
+# section of the configuration file. When `requests_per_second` isn't provided
+# there is no client-side limit on the request rate, but the server's HTTP 429
+# responses are still honoured
+DEFAULT_BURST = 10
+DEFAULT_MAX_RETRIES = 5
+
+# The parameters for the jittered exponential backoff, in seconds
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+
+# The HTTP methods that are safe to send a second time if we didn't get a usable
+# response the first time. Note that a request that received an HTTP 429
+# response was never processed by the server, so it can be retried regardless
+# of its method
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'])
+RETRY_STATUS_CODES = frozenset([502, 503, 504])
+
+
+class TokenBucket:
+    """A thread-safe token bucket that hands out up to `rate` tokens per second
+    with bursts of up to `capacity` tokens. The bucket can also be paused, which
+    is used to make every thread wait when the server asks us to slow down.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float],
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = capacity
+        self.updated = clock()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    # Tokens are reserved while holding the lock (possibly taking the bucket
+    # below zero) but the waiting is done after releasing it, so that threads
+    # are served in the order in which they arrived
+    def acquire(self) -> None:
+        with self.lock:
+            now = self.clock()
+            wait = max(0.0, self.paused_until - now)
+            if self.rate is not None:
+                elapsed = now - self.updated
+                self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+                self.updated = now
+                self.tokens -= 1
+                if self.tokens < 0:
+                    wait = max(wait, -self.tokens / self.rate)
+        if wait > 0:
+            self.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        with self.lock:
+            self.paused_until = max(self.paused_until, self.clock() + seconds)
+
+
+class RequestStats:
+
+    requests: int
+    throttled: int
+    retried: int
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.throttled = 0
+        self.retried = 0
+        self.lock = threading.Lock()
+
+    def increment(self, name: str) -> None:
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def to_dict(self) -> dict[str, int]:
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'throttled': self.throttled,
+                'retried': self.retried
+            }
+
+
+class RequestScheduler:
+    """Shared state for every request that is sent to the Jira server."""
+
+    def __init__(
+        self,
+        requests_per_second: Optional[float],
+        burst: int,
+        max_retries: int,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ) -> None:
+        self.bucket = TokenBucket(requests_per_second, burst, clock, sleep)
+        self.max_retries = max_retries
+        self.sleep = sleep
+        self.stats = RequestStats()
+
+    def backoff_delay(self, attempt: int) -> float:
+        # "Full jitter", see
+        # https://aws.amazon.com/blogs/architecture/exponential-backoff-and-jitter/
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+class SchedulingAdapter(HTTPAdapter):
+    """A transport adapter that sends every request through a
+    `RequestScheduler`. Requests wait for a token before they are sent, HTTP 429
+    responses are retried after the time given by their `Retry-After` header
+    (during which all other requests wait as well), and idempotent requests are
+    retried with a jittered exponential backoff after a connection error or a
+    temporary server error.
+    """
+
+    def __init__(self, scheduler: RequestScheduler, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.scheduler = scheduler
+
+    def send(self, request, **kwargs):  # type: ignore[override]
+        scheduler = self.scheduler
+        is_idempotent = request.method in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            scheduler.bucket.acquire()
+            scheduler.stats.increment('requests')
+            try:
+                response = super().send(request, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if not (is_idempotent and attempt < scheduler.max_retries):
+                    raise
+                scheduler.stats.increment('retried')
+                scheduler.sleep(scheduler.backoff_delay(attempt))
+                attempt += 1
+                continue
+            if attempt >= scheduler.max_retries:
+                return response
+            if response.status_code == 429:
+                scheduler.stats.increment('throttled')
+                scheduler.stats.increment('retried')
+                maybe_delay = parse_retry_after(response.headers.get('Retry-After'))
+                delay = (
+                    scheduler.backoff_delay(attempt)
+                    if maybe_delay is None
+                    else maybe_delay
+                )
+                scheduler.bucket.pause(delay)
+            elif is_idempotent and response.status_code in RETRY_STATUS_CODES:
+                scheduler.stats.increment('retried')
+                scheduler.sleep(scheduler.backoff_delay(attempt))
+            else:
+                return response
+            response.close()
+            attempt += 1
+
+
+# The `Retry-After` header is either a number of seconds or an HTTP date. See
+# https://developer.mozilla.org/en-US/docs/Web/HTTP/Headers/Retry-After
+def parse_retry_after(maybe_value: Optional[str]) -> Optional[float]:
+    if maybe_value is None:
+        return None
+    try:
+        return max(0.0, float(maybe_value))
+    except ValueError:
+        pass
+    try:
+        retry_dt = parsedate_to_datetime(maybe_value)
+    except (TypeError, ValueError):
+        return None
+    if retry_dt.tzinfo is None:
+        retry_dt = retry_dt.replace(tzinfo=timezone.utc)
+    delay = (retry_dt - datetime.now(timezone.utc)).total_seconds()
+    return max(0.0, delay)
+
+
+def create_request_scheduler(conf: Configuration) -> RequestScheduler:
+    rate_limit = conf.remote.get('rate_limit') or {}
+    max_retries = rate_limit.get('max_retries')
+    scheduler = RequestScheduler(
+        requests_per_second=rate_limit.get('requests_per_second'),
+        burst=rate_limit.get('burst') or DEFAULT_BURST,
+        max_retries=DEFAULT_MAX_RETRIES if max_retries is None else max_retries
+    )
+    return scheduler
+
+
+def install_request_scheduler(jira: JIRA, scheduler: RequestScheduler) -> None:
+    adapter = SchedulingAdapter(scheduler)
+    jira._session.mount('https://', adapter)
+    jira._session.mount('http://', adapter)
+    # The session's own retry logic would otherwise retry the requests that
+    # exhausted our retries a second time
+    jira._session.max_retries = 0
+
+
+def find_request_scheduler(jira: JIRA) -> Optional[RequestScheduler]:
+    session = getattr(jira, '_session', None)
+    if session is None:
+        return None
+    adapter = session.adapters.get('https://')
+    return adapter.scheduler if isinstance(adapter, SchedulingAdapter) else None
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+
+import argparse
+from datetime import date, datetime, timedelta, timezone
+from jiraworklog.configuration import Configuration, get_parse_conf
+from jiraworklog.update_instructions import strptime_ptl
+from jiraworklog.worklogs import WorklogCanon
+import pytz
+from typing import Any, Optional, TypeVar, Union
+
+WorklogCanonSubcl = TypeVar('WorklogCanonSubcl', bound=WorklogCanon)
+
+# The resolution of the worklog start times on the Jira server
+JIRA_RESOLUTION = timedelta(milliseconds=1)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class SyncWindow:
+    """The range of worklog start times that a run is limited to, which includes
+    `start` but not `end`. Either bound can be `None`, in which case the range
+    is unbounded in that direction. Worklogs that started outside of the window
+    are left alone in the local, checked-in, and remote worklogs.
+    """
+
+    start: Optional[datetime]
+    end: Optional[datetime]
+
+    def __init__(self, start: Optional[datetime], end: Optional[datetime]) -> None:
+        self.start = start
+        self.end = end
+
+    def contains(self, started: datetime) -> bool:
+        return (
+            (self.start is None or self.start <= started)
+            and (self.end is None or started < self.end)
+        )
+
+    def contains_str(self, started_str: str) -> bool:
+        return self.contains(strptime_ptl(started_str))
+
+    # The query parameters of the Jira issue worklogs endpoint that restrict the
+    # worklogs to the window, as UNIX timestamps in milliseconds. The Jira
+    # documentation only promises worklogs that started after `startedAfter`,
+    # so the bound is moved back by one unit of resolution to make sure that
+    # worklogs that started on `start` are included. Any worklogs that started
+    # before the window are then removed by the caller. See
+    # https://developer.atlassian.com/cloud/jira/platform/rest/v2/api-group-issue-worklogs/#api-rest-api-2-issue-issueidorkey-worklog-get
+    def to_params(self) -> dict[str, int]:
+        params = {}
+        if self.start is not None:
+            params['startedAfter'] = to_epoch_ms(self.start - JIRA_RESOLUTION)
+        if self.end is not None:
+            params['startedBefore'] = to_epoch_ms(self.end)
+        return params
+
+    def __repr__(self) -> str:
+        return f'SyncWindow(start={self.start!r}, end={self.end!r})'
+
+
+class SyncWindowParseError(Exception):
+
+    def __init__(self, source: str, value: Any, reason: str) -> None:
+        msg = f"Unable to parse the sync window {source} '{value}': {reason}"
+        super().__init__(msg)
+
+
+# The window is taken from the `--window-start` and `--window-end` command-line
+# options, falling back to the `sync_window` section of the configuration file.
+# When `from_local` is set then any bound that isn't provided is taken from the
+# earliest and latest start times of the local worklogs. Returns `None` if the
+# run isn't limited to a window
+def resolve_sync_window(
+    conf: Configuration,
+    cmdline_args: argparse.Namespace,
+    local_wkls: dict[str, list[WorklogCanon]]
+) -> Optional[SyncWindow]:
+    raw = conf.sync_window or {}
+    maybe_tz = get_parse_conf(conf)['col_formats'].get('timezone')
+    start = parse_window_bound(
+        'start',
+        cmdline_args.window_start or raw.get('start'),
+        maybe_tz
+    )
+    end = parse_window_bound(
+        'end',
+        cmdline_args.window_end or raw.get('end'),
+        maybe_tz
+    )
+    from_local = cmdline_args.window_from_local or raw.get('from_local')
+    if from_local and (start is None or end is None):
+        starteds = [
+            strptime_ptl(get_started(wkl))
+            for wkls in local_wkls.values()
+            for wkl in wkls
+        ]
+        if starteds:
+            start = min(starteds) if start is None else start
+            end = max(starteds) + JIRA_RESOLUTION if end is None else end
+        else:
+            # There aren't any local worklogs to take the window from, so use
+            # an empty window rather than syncing everything
+            empty_at = start or end or datetime.now(timezone.utc)
+            start, end = (empty_at, empty_at)
+    if start is None and end is None:
+        return None
+    if start is not None and end is not None and end < start:
+        msg = f"the end '{end}' is before the start '{start}'"
+        raise SyncWindowParseError('end', end, msg)
+    return SyncWindow(start, end)
+
+
+# A bound is either a date (which is taken to be the start of the day), or a
+# datetime in ISO 8601 format. Bounds without a UTC offset are in the timezone
+# that the local worklogs are in
+def parse_window_bound(
+    nm: str,
+    value: Union[None, str, date, datetime],
+    maybe_tz: Optional[str]
+) -> Optional[datetime]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    elif isinstance(value, date):
+        dt = datetime(value.year, value.month, value.day)
+    else:
+        try:
+            dt = datetime.fromisoformat(value)
+        except ValueError:
+            reason = "must be a date or datetime such as '2021-01-12 10:00'"
+            raise SyncWindowParseError(nm, value, reason)
+    if dt.tzinfo is not None:
+        return dt
+    if not maybe_tz:
+        reason = 'a UTC offset is required when no timezone is configured'
+        raise SyncWindowParseError(nm, value, reason)
+    try:
+        return pytz.timezone(maybe_tz).localize(dt)
+    except pytz.exceptions.UnknownTimeZoneError:
+        raise SyncWindowParseError(nm, value, f"unknown timezone '{maybe_tz}'")
+
+
+def filter_worklogs(
+    wkls: dict[str, list[WorklogCanonSubcl]],
+    window: SyncWindow
+) -> dict[str, list[WorklogCanonSubcl]]:
+    inside, _ = split_worklogs(wkls, window)
+    return inside
+
+
+# Split the worklogs into the worklogs inside and outside of the window
+def split_worklogs(
+    wkls: dict[str, list[WorklogCanonSubcl]],
+    window: SyncWindow
+) -> tuple[dict[str, list[WorklogCanonSubcl]], dict[str, list[WorklogCanonSubcl]]]:
+    inside: dict[str, list[WorklogCanonSubcl]] = {}
+    outside: dict[str, list[WorklogCanonSubcl]] = {}
+    for issue_nm, issue_wkls in wkls.items():
+        inside[issue_nm] = []
+        outside[issue_nm] = []
+        for wkl in issue_wkls:
+            if window.contains_str(get_started(wkl)):
+                inside[issue_nm].append(wkl)
+            else:
+                outside[issue_nm].append(wkl)
+    return (inside, outside)
+
+
+def to_epoch_ms(dt: datetime) -> int:
+    return (dt - EPOCH) // JIRA_RESOLUTION
+
+
+# The start time of a worklog, as found in its canonical key
+def get_started(wkl: WorklogCanon) -> str:
+    return wkl.canon_key()[1]
@@ -3,51 +3,135 @@
 # from datetime import datetime
 import argparse
 from jira import JIRA
-from jiraworklog.configuration import Configuration, ParseType, resolve_checkedin_path
+from jiraworklog.checkedin_store import create_checkedin_store
+from jiraworklog.configuration import Configuration
 from jiraworklog.confirm_updates import confirm_updates
 from jiraworklog.diff_worklogs import diff_local, diff_remote
-from jiraworklog.read_local_delimited import read_local_delimited
-from jiraworklog.read_local_excel import read_local_excel
+from jiraworklog.instrumentation import (
+    Instrumentation,
+    activate,
+    calc_file_size,
+    phase
+)
 from jiraworklog.read_checkedin_worklogs import read_checkedin_worklogs
+from jiraworklog.read_local_worklogs import read_local_worklogs
 from jiraworklog.read_remote_worklogs import read_remote_worklogs
 from jiraworklog.reconcile_diffs import reconcile_diffs
-from jiraworklog.update_instructions import UpdateInstructions
-from jiraworklog.utils import map_worklogs
+from jiraworklog.request_scheduler import find_request_scheduler
+from jiraworklog.sync_window import (
+    filter_worklogs,
+    resolve_sync_window,
+    split_worklogs
+)
+from jiraworklog.update_instructions import UpdateInstructions, calc_n_updates
 from jiraworklog.worklogs import WorklogCanon, WorklogCheckedin, WorklogJira
-import json
-import os
-from typing import Any, Callable, Tuple, TypeVar
+import sys
+from typing import Any, Callable, Sequence, Tuple, TypeVar, Union
 
 JiraSubcl = TypeVar('JiraSubcl', bound='JIRA')
 
+# The default number of threads used to push updates to the Jira server. This
+# can be changed through the `push_workers` field in the `remote` section of the
+# configuration file
+DEFAULT_PUSH_WORKERS = 1
+
 
 # TODO: we want to be able to read from stdin also
+#
+# Each phase of the run is measured, and the measurements are reported
+# according to the `--verbose`, `--trace`, and `--profile` command-line options
 def sync_worklogs(
     jira: JiraSubcl,
     conf: Configuration,
     cmdline_args: argparse.Namespace,
-    worklogs_path: str,
+    worklogs_path: Union[None, str, Sequence[str]],
     write_checkedin: bool = False
 ) -> Tuple[JiraSubcl, dict[str, Any], UpdateInstructions]:
-    local_wkls = read_local_worklogs(worklogs_path, conf)
-    checkedin_wkls = read_checkedin_worklogs(conf, cmdline_args)
-    remote_wkls = read_remote_worklogs(jira, conf)
+    instr = Instrumentation(cmdline_args.profile)
+    with activate(instr):
+        try:
+            return sync_worklogs_phases(
+                jira,
+                conf,
+                cmdline_args,
+                worklogs_path,
+                write_checkedin
+            )
+        finally:
+            report_instrumentation(instr, jira, cmdline_args)
+
+
+def sync_worklogs_phases(
+    jira: JiraSubcl,
+    conf: Configuration,
+    cmdline_args: argparse.Namespace,
+    worklogs_path: Union[None, str, Sequence[str]],
+    write_checkedin: bool
+) -> Tuple[JiraSubcl, dict[str, Any], UpdateInstructions]:
+    with phase('local_read', profile=True) as record:
+        local_wkls = read_local_worklogs(
+            worklogs_path,
+            conf,
+            refresh_cache=cmdline_args.full_refresh
+        )
+        record.items = count_worklogs(local_wkls)
+
+    # When the run is limited to a sync window, the worklogs outside of the
+    # window are set aside and only rejoin the checked-in worklogs when they
+    # are written
+    window = resolve_sync_window(conf, cmdline_args, local_wkls)
+    if window is not None:
+        local_wkls = filter_worklogs(local_wkls, window)
+    store = create_checkedin_store(conf)
+    with phase('checkedin_read', profile=True) as record:
+        checkedin_wkls = read_checkedin_worklogs(conf, cmdline_args, store)
+        record.items = count_worklogs(checkedin_wkls)
+        record.nbytes = calc_file_size(store.path)
+    checkedin_outside: dict[str, list[WorklogCheckedin]] = {}
+    if window is not None:
+        checkedin_wkls, checkedin_outside = split_worklogs(checkedin_wkls, window)
+    with phase('remote_read', profile=True) as record:
+        remote_wkls = read_remote_worklogs(
+            jira,
+            conf,
+            cmdline_args,
+            window,
+            local_wkls,
+            checkedin_wkls
+        )
+        record.items = count_worklogs(remote_wkls)
     update_instrs = process_worklogs_pure(
         local_wkls,
         checkedin_wkls,
         remote_wkls
     )
-    confirm_updates(update_instrs, cmdline_args)
+    with phase('confirm'):
+        confirm_updates(update_instrs, cmdline_args)
     try:
         if not cmdline_args.dry_run:
-            update_instrs.push_worklogs(checkedin_wkls, jira)
+            with phase('push', profile=True) as record:
+                update_instrs.push_worklogs(
+                    checkedin_wkls,
+                    jira,
+                    conf.remote.get('push_workers') or DEFAULT_PUSH_WORKERS,
+                    store if write_checkedin else None
+                )
+                record.items = calc_n_updates(update_instrs)
     finally:
-        checkedin_full = map_worklogs(lambda x: x.full, checkedin_wkls)
+        checkedin_full = {
+            issue_nm: [
+                wkl.full
+                for wkl
+                in checkedin_outside.get(issue_nm, []) + issue_wkls
+            ]
+            for issue_nm, issue_wkls
+            in checkedin_wkls.items()
+        }
         if not cmdline_args.dry_run and write_checkedin:
-            path=resolve_checkedin_path(conf)
-            os.makedirs(name=os.path.dirname(path), exist_ok=True)
-            with open(path, "w") as file:
-                json.dump(obj=checkedin_full, fp=file, indent=4)
+            with phase('checkedin_write', profile=True) as record:
+                store.commit(checkedin_full)
+                record.items = count_worklogs(checkedin_full)
+                record.nbytes = calc_file_size(store.path)
     return (jira, checkedin_full, update_instrs)
 
 
@@ -62,20 +146,28 @@ def process_worklogs_pure(
     # local and the remote views that isn't in the checked-in view), and create
     # a data structure of "instructions" regarding what needs to be updated in
     # the checked-in worklogs file and the remote Jira worklogs.
-    diffs_local = diff_local(local_wkls, checkedin_wkls)
-    diffs_remote = diff_remote(remote_wkls, checkedin_wkls)
-    update_instrs = reconcile_diffs(diffs_local, diffs_remote, remote_wkls)
+    with phase('diff', profile=True):
+        diffs_local = diff_local(local_wkls, checkedin_wkls)
+        diffs_remote = diff_remote(remote_wkls, checkedin_wkls)
+    with phase('reconcile', profile=True):
+        update_instrs = reconcile_diffs(diffs_local, diffs_remote, remote_wkls)
     return update_instrs
 
 
-def read_local_worklogs(
-    worklogs_path: str,
-    conf: Configuration
-): # TODO: provide return type
-    parse_fcn_map = {
-        ParseType.DELIMITED: read_local_delimited,
-        ParseType.EXCEL: read_local_excel
-    }
-    parse_fcn = parse_fcn_map[conf.parse_type]
-    local_wkls = parse_fcn(worklogs_path, conf)
-    return local_wkls
+def report_instrumentation(
+    instr: Instrumentation,
+    jira: JIRA,
+    cmdline_args: argparse.Namespace
+) -> None:
+    maybe_scheduler = find_request_scheduler(jira)
+    request_stats = None
+    if maybe_scheduler is not None:
+        request_stats = maybe_scheduler.stats.to_dict()
+    if cmdline_args.verbose >= 2:
+        print(instr.fmt_summary(request_stats), file=sys.stderr)
+    if cmdline_args.trace:
+        instr.write_trace(cmdline_args.trace, request_stats)
+
+
+def count_worklogs(wkls: dict[str, list[Any]]) -> int:
+    return sum(len(issue_wkls) for issue_wkls in wkls.values())
@@ -1,12 +1,22 @@
 #!/usr/bin/env python3
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from functools import reduce
-from jira import JIRA
+from jira import JIRA, JIRAError
+from jiraworklog.auth_jira import fmt_jira_error
+from jiraworklog.checkedin_store import CheckedinStore
+from jiraworklog.instrumentation import add, calc_json_size, phase
+import threading
 # from jiraworklog.delete_worklog import delete_worklog
 # from jiraworklog.diff_worklogs import create_augwkl_jira
 # from jiraworklog.sync_worklogs import strptime_ptl
 from jiraworklog.worklogs import WorklogCanon, WorklogCheckedin, WorklogJira
+from typing import Optional
+
+# Guards the updates to the checked-in worklogs when the remote updates are
+# pushed from multiple threads
+checkedin_lock = threading.Lock()
 
 # def update_worklogs(jira, checkedin, diff_local, diff_remote):
 #     # Note that `checkedin` is modified in the call to `perform_update_actions`
@@ -40,80 +50,177 @@ class UpdateInstructions:
     def push_worklogs(
         self,
         checkedin_wkls: dict[str, list[WorklogCheckedin]],
-        jira: JIRA
+        jira: JIRA,
+        max_workers: int = 1,
+        store: Optional[CheckedinStore] = None
     ) -> None:
-        self.checkedin_add(checkedin_wkls)
-        self.checkedin_remove(checkedin_wkls)
-        self.remote_add(checkedin_wkls, jira)
-        self.remote_remove(checkedin_wkls)
+        self.checkedin_add(checkedin_wkls, store)
+        self.checkedin_remove(checkedin_wkls, store)
+        if max_workers == 1:
+            self.remote_add(checkedin_wkls, jira, store)
+            self.remote_remove(checkedin_wkls, store)
+        else:
+            self.remote_parallel(checkedin_wkls, jira, max_workers, store)
 
     def checkedin_add(
         self,
-        checkedin_wkls: dict[str, list[WorklogCheckedin]]
+        checkedin_wkls: dict[str, list[WorklogCheckedin]],
+        store: Optional[CheckedinStore] = None
     ) -> None:
         for wkl in self.chk_add_listwkl:
-            update_checkedin_add(checkedin_wkls, wkl)
+            update_checkedin_add(checkedin_wkls, wkl, store)
 
     def checkedin_remove(
         self,
-        checkedin_wkls: dict[str, list[WorklogCheckedin]]
+        checkedin_wkls: dict[str, list[WorklogCheckedin]],
+        store: Optional[CheckedinStore] = None
     ) -> None:
         for wkl in self.chk_remove_listwkl:
-            update_checkedin_remove(checkedin_wkls, wkl)
+            update_checkedin_remove(checkedin_wkls, wkl, store)
 
     def remote_add(
         self,
         checkedin_wkls: dict[str, list[WorklogCheckedin]],
-        jira: JIRA
+        jira: JIRA,
+        store: Optional[CheckedinStore] = None
     ) -> None:
         for wkl in self.rmt_add_listwkl:
-            push_worklog_add(checkedin_wkls, wkl, jira)
+            push_worklog_add(checkedin_wkls, wkl, jira, store)
 
     def remote_remove(
         self,
-        checkedin_wkls: dict[str, list[WorklogCheckedin]]
+        checkedin_wkls: dict[str, list[WorklogCheckedin]],
+        store: Optional[CheckedinStore] = None
     ) -> None:
         for wkl in self.rmt_remove_listwkl:
-            push_worklog_remove(checkedin_wkls, wkl)
+            push_worklog_remove(checkedin_wkls, wkl, store)
+
+    # Push the remote updates using up to `max_workers` threads. The updates for
+    # a given issue are all performed by the same thread and in the same order
+    # as for `remote_add` followed by `remote_remove`, so the order is only
+    # relaxed across issues. If an update fails then the remaining updates for
+    # that issue are skipped, but the updates for the other issues still run to
+    # completion so that the checked-in worklogs reflect every update that was
+    # made on the Jira server before the error is raised
+    def remote_parallel(
+        self,
+        checkedin_wkls: dict[str, list[WorklogCheckedin]],
+        jira: JIRA,
+        max_workers: int,
+        store: Optional[CheckedinStore] = None
+    ) -> None:
+
+        def push_issue(issue_nm: str) -> Optional[Exception]:
+            try:
+                for wkl in add_map.get(issue_nm, []):
+                    push_worklog_add(checkedin_wkls, wkl, jira, store)
+                for wkl in remove_map.get(issue_nm, []):
+                    push_worklog_remove(checkedin_wkls, wkl, store)
+            except Exception as exc:
+                return exc
+            return None
 
+        add_map = group_by_issue(self.rmt_add_listwkl)
+        remove_map = group_by_issue(self.rmt_remove_listwkl)
+        issue_nms = list(dict.fromkeys(list(add_map) + list(remove_map)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(push_issue, issue_nms))
+        errors = [
+            (nm, exc)
+            for nm, exc
+            in zip(issue_nms, results)
+            if exc is not None
+        ]
+        if len(errors) == 1:
+            raise errors[0][1]
+        elif errors:
+            raise PushWorklogsError(errors) from errors[0][1]
 
+
+class PushWorklogsError(Exception):
+
+    errors: list[tuple[str, Exception]]
+
+    def __init__(self, errors: list[tuple[str, Exception]]) -> None:
+        self.errors = errors
+        msgs = [
+            f"Unable to update the Jira worklogs for issue '{issue_nm}'\n\n"
+            f"{fmt_jira_error(exc) if isinstance(exc, JIRAError) else exc}"
+            for issue_nm, exc
+            in errors
+        ]
+        super().__init__('\n\n'.join(msgs))
+
+
+def group_by_issue(
+    listwkl: list[WorklogCanon]
+) -> dict[str, list[WorklogCanon]]:
+    grouped = {}
+    for wkl in listwkl:
+        grouped.setdefault(wkl.issueKey, []).append(wkl)
+    return grouped
+
+
+# Each update is also recorded in the checked-in worklogs store (if provided)
+# as soon as it is made, so that stores that write the updates incrementally
+# only have to write the worklogs that changed
+#
 # TODO: is this better than what we had with the flat form?
 def update_checkedin_add(
     checkedin_wkls: dict[str, list[WorklogCheckedin]],
-    jira_wkl: WorklogJira
+    jira_wkl: WorklogJira,
+    store: Optional[CheckedinStore] = None
 ) -> None:
-    checkedin_wkls[jira_wkl.issueKey].append(jira_wkl.to_checkedin())
+    with checkedin_lock:
+        checkedin_wkl = jira_wkl.to_checkedin()
+        checkedin_wkls[jira_wkl.issueKey].append(checkedin_wkl)
+        if store is not None:
+            store.add(checkedin_wkl.issueKey, checkedin_wkl.full)
 
 # TODO: is this better than what we had with the flat form?
 def update_checkedin_remove(
     checkedin_wkls: dict[str, list[WorklogCheckedin]],
-    jira_wkl: WorklogCheckedin
+    jira_wkl: WorklogCheckedin,
+    store: Optional[CheckedinStore] = None
 ) -> None:
-    checkedin_wkls[jira_wkl.issueKey].remove(jira_wkl)
+    with checkedin_lock:
+        checkedin_wkls[jira_wkl.issueKey].remove(jira_wkl)
+        if store is not None:
+            store.remove(jira_wkl.issueKey, jira_wkl.full)
 
 # TODO: is this better than what we had with the flat form?
 def push_worklog_add(
     checkedin_wkls: dict[str, list[WorklogCheckedin]],
     canon_wkl: WorklogCanon,
-    jira: JIRA
+    jira: JIRA,
+    store: Optional[CheckedinStore] = None
 ) -> None:
     # TODO: add error handling?
-    raw_jira_wkl = jira.add_worklog(
-        issue=canon_wkl.issueKey,
-        timeSpentSeconds=canon_wkl.canon['timeSpentSeconds'],
-        comment=canon_wkl.canon['comment'],
-        started=strptime_ptl(canon_wkl.canon['started'])
-    )
+    # The fields of the canonical worklog are the ones that are sent to the Jira
+    # server, so their size is recorded as the size of the request body
+    with phase('push.add') as record:
+        raw_jira_wkl = jira.add_worklog(
+            issue=canon_wkl.issueKey,
+            timeSpentSeconds=canon_wkl.canon['timeSpentSeconds'],
+            comment=canon_wkl.canon['comment'],
+            started=strptime_ptl(canon_wkl.canon['started'])
+        )
+        record.items = 1
+        record.nbytes = calc_json_size(canon_wkl.canon)
+    add('push', nbytes=record.nbytes)
     jira_wkl = WorklogJira(raw_jira_wkl, canon_wkl.issueKey)
-    update_checkedin_add(checkedin_wkls, jira_wkl)
+    update_checkedin_add(checkedin_wkls, jira_wkl, store)
 
 # TODO: is this better than what we had with the flat form?
 def push_worklog_remove(
     checkedin_wkls: dict[str, list[WorklogCheckedin]],
-    jira_wkl: WorklogJira
+    jira_wkl: WorklogJira,
+    store: Optional[CheckedinStore] = None
 ) -> None:
-    jira_wkl.jira.delete()
-    update_checkedin_remove(checkedin_wkls, jira_wkl)
+    with phase('push.remove') as record:
+        jira_wkl.jira.delete()
+        record.items = 1
+    update_checkedin_remove(checkedin_wkls, jira_wkl, store)
 
 
 def strptime_ptl(datetime_str: str) -> datetime:
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+from jira import JIRA, JIRAError
+from jiraworklog.auth_jira import fmt_jira_error
+from jiraworklog.configuration import Configuration
+from typing import Any, Optional
+
+
+class WorklogAuthor:
+    """The Jira user that the remote worklogs are limited to. Users are
+    identified by their `accountId` on Jira Cloud and by their `name` on Jira
+    Server, since display names aren't unique and can be changed.
+    """
+
+    field: str
+    value: str
+
+    def __init__(self, field: str, value: str) -> None:
+        self.field = field
+        self.value = value
+
+    # Takes a worklog in the form returned by the Jira server
+    def matches(self, raw: dict[str, Any]) -> bool:
+        author = raw.get('author') or {}
+        return author.get(self.field) == self.value
+
+    # A string that identifies the user, which is stored in the remote
+    # worklogs cache so that the cache can be discarded if the user changes
+    def to_id(self) -> str:
+        return f'{self.field}:{self.value}'
+
+    def __repr__(self) -> str:
+        return f'WorklogAuthor(field={self.field!r}, value={self.value!r})'
+
+
+class WorklogAuthorError(Exception):
+
+    def __init__(self, jira_error: JIRAError) -> None:
+        msg = (
+            "Unable to look up the authenticated Jira user, which is needed "
+            "since 'own_worklogs' is set in the 'remote' section of the "
+            f"configuration file\n\n{fmt_jira_error(jira_error)}"
+        )
+        super().__init__(msg)
+
+
+# Returns `None` unless the `own_worklogs` field in the `remote` section of the
+# configuration file is set, in which case the user is the one that the Jira
+# session is authenticated as
+def resolve_worklog_author(
+    jira: JIRA,
+    conf: Configuration
+) -> Optional[WorklogAuthor]:
+    if not conf.remote.get('own_worklogs'):
+        return None
+    field = 'accountId' if jira._is_cloud else 'name'
+    try:
+        value = jira.current_user(field)
+    except JIRAError as exc:
+        raise WorklogAuthorError(exc) from exc
+    if not value:
+        msg = 'the Jira session is anonymous'
+        raise WorklogAuthorError(JIRAError(text=msg))
+    return WorklogAuthor(field, value)
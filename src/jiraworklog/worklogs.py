@@ -3,65 +3,201 @@
 from __future__ import annotations
 
 import jira.resources as j
-from typing import Any
+from typing import Any, Hashable, Optional, TypeVar
 
 from jiraworklog.utils import map_worklogs
 
 
 class WorklogCanon:
+    """A worklog in canonical form, i.e. just the fields that are compared
+    between the local, checked-in, and remote worklogs.
 
-    canon: dict[str, str]
-    issueKey: str
+    Worklogs are immutable, which means that the canonical key (and its hash)
+    only needs to be calculated once, and that the canonical key of a worklog
+    can be shared with the canonical worklog that it is converted to. The
+    canonical key is derived from the underlying record on first use, and the
+    `canon` dict is only created on request.
+    """
+
+    __slots__ = ('_issueKey', '_key', '_hash')
+
+    _issueKey: str
+    _key: Optional[tuple[str, str, str, str]]
+    _hash: Optional[int]
 
     def __init__(self, canon: dict[str, str], issueKey: str) -> None:
-        self.canon = canon
-        self.issueKey = issueKey
+        self._issueKey = issueKey
+        self._key = (
+            canon['comment'],
+            canon['started'],
+            canon['timeSpentSeconds'],
+            issueKey
+        )
+        self._hash = None
+
+    @property
+    def issueKey(self) -> str:
+        return self._issueKey
+
+    @property
+    def canon(self) -> dict[str, str]:
+        comment, started, timeSpentSeconds, _ = self.canon_key()
+        canon = {
+            'comment': comment,
+            'started': started,
+            'timeSpentSeconds': timeSpentSeconds
+        }
+        return canon
 
     def __eq__(self, obj: Any) -> bool:
-        return (
-            isinstance(obj, WorklogCanon)
-            and (self.canon == obj.canon)
-            and (self.issueKey == obj.issueKey)
-        )
+        return isinstance(obj, WorklogCanon) and self.canon_key() == obj.canon_key()
 
     def __ne__(self, obj: Any) -> bool:
         return not self == obj
 
+    def __hash__(self) -> int:
+        if self._hash is None:
+            self._hash = hash(self.canon_key())
+        return self._hash
+
+    # Two worklogs are equal as canonical worklogs if and only if their
+    # canonical keys are equal, which allows the worklogs to be matched up using
+    # dicts and `Counter`s rather than by pairwise comparisons
+    def canon_key(self) -> tuple[str, str, str, str]:
+        if self._key is None:
+            self._key = self.calc_canon_key()
+        return self._key
+
+    def calc_canon_key(self) -> tuple[str, str, str, str]:
+        raise RuntimeError('Internal logic error. Please file a bug report')
+
     def to_canon(self) -> WorklogCanon:
         return self
 
+    # Copy the canonical key and its hash (if they have been calculated) into a
+    # new worklog with the same canonical form
+    def share_key(self, wkl: WorklogCanonSubcl) -> WorklogCanonSubcl:
+        wkl._key = self._key
+        wkl._hash = self._hash
+        return wkl
+
+
+WorklogCanonSubcl = TypeVar('WorklogCanonSubcl', bound=WorklogCanon)
+
 
 class WorklogCheckedin(WorklogCanon):
+    """A worklog as stored in the checked-in worklogs file. The full worklog is
+    kept as-is so that it is written back to the file unchanged.
+    """
+
+    __slots__ = ('_full', '_full_key')
 
-    full: dict[str, str]
+    _full: Optional[dict[str, str]]
+    _full_key: Optional[Hashable]
 
     def __init__(self, full: dict[str, str], issueKey: str) -> None:
-        canon = full_to_canon(full)
-        super().__init__(canon, issueKey)
-        self.full = full
+        self._issueKey = issueKey
+        self._key = None
+        self._hash = None
+        self._full = full
+        self._full_key = None
+
+    @property
+    def full(self) -> dict[str, str]:
+        if self._full is None:
+            raise RuntimeError('Internal logic error. Please file a bug report')
+        return self._full
+
+    def calc_canon_key(self) -> tuple[str, str, str, str]:
+        full = self.full
+        key = (
+            full['comment'],
+            full['started'],
+            full['timeSpentSeconds'],
+            self._issueKey
+        )
+        return key
 
+    # Two checked-in worklogs are only equal if every field of the full
+    # worklogs is equal. Note that the canonical form is derived from the full
+    # worklog so it needn't be compared separately
     def __eq__(self, obj: Any) -> bool:
         if isinstance(obj, WorklogCheckedin):
-            out = self.full == obj.full and super().__eq__(obj)
+            out = self.full_key() == obj.full_key()
         else:
             out = super().__eq__(obj)
         return out
 
+    # Defining `__eq__` implicitly sets `__hash__` to `None`. The inherited hash
+    # is still valid since equal checked-in worklogs have equal canonical forms
+    __hash__ = WorklogCanon.__hash__
+
+    # The analogue of `canon_key` for comparisons between two checked-in
+    # worklogs, for which every field of the full worklogs has to be equal
+    def full_key(self) -> Hashable:
+        if self._full_key is None:
+            self._full_key = self.calc_full_key()
+        return self._full_key
+
+    def calc_full_key(self) -> Hashable:
+        return (tuple(sorted(self.full.items())), self._issueKey)
+
     def to_canon(self) -> WorklogCanon:
-        return WorklogCanon(self.canon, self.issueKey)
+        canon_wkl = WorklogCanon.__new__(WorklogCanon)
+        canon_wkl._issueKey = self._issueKey
+        canon_wkl._key = self.canon_key()
+        canon_wkl._hash = self._hash
+        return canon_wkl
 
 
 class WorklogJira(WorklogCheckedin):
+    """A worklog as returned by the Jira server. The full worklog is only
+    created from the Jira resource when it is first needed, and the canonical
+    key is read directly from the resource.
+    """
+
+    __slots__ = ('_jira',)
 
-    jira: j.Worklog
+    _jira: j.Worklog
 
     def __init__(self, jira_basewkl: j.Worklog, issueKey: str) -> None:
-        full = jira_to_full(jira_basewkl)
-        super().__init__(full, issueKey)
-        self.jira = jira_basewkl
+        self._issueKey = issueKey
+        self._key = None
+        self._hash = None
+        self._full = None
+        self._full_key = None
+        self._jira = jira_basewkl
+
+    @property
+    def jira(self) -> j.Worklog:
+        return self._jira
+
+    @property
+    def full(self) -> dict[str, str]:
+        if self._full is None:
+            self._full = jira_to_full(self._jira)
+        return self._full
+
+    def calc_canon_key(self) -> tuple[str, str, str, str]:
+        raw = self._jira.raw
+        key = (
+            raw['comment'],
+            raw['started'],
+            str(raw['timeSpentSeconds']),
+            self._issueKey
+        )
+        return key
+
+    # The full key is calculated without keeping the full worklog, which is
+    # only created when the worklog is written to the checked-in worklogs
+    def calc_full_key(self) -> Hashable:
+        full = jira_to_full(self._jira) if self._full is None else self._full
+        return (tuple(sorted(full.items())), self._issueKey)
 
     def to_checkedin(self) -> WorklogCheckedin:
-        return WorklogCheckedin(self.full, self.issueKey)
+        checkedin_wkl = self.share_key(WorklogCheckedin(self.full, self._issueKey))
+        checkedin_wkl._full_key = self._full_key
+        return checkedin_wkl
 
 
 def jira_to_full(jira_basewkl: j.Worklog) -> dict[str, str]:
@@ -8,8 +8,18 @@ from jiraworklog.update_instructions import strptime_ptl
 from jiraworklog.utils import map_worklogs
 from jiraworklog.worklogs import WorklogCanon, WorklogCheckedin, WorklogJira, jira_to_full
 import json
+import re
 from typing import Any, Optional, Union
 
+# The server that the URLs of the mock worklogs point to
+MOCK_SERVER = 'https://jira.example.com'
+
+# The base URL of the mock REST API
+MOCK_API_URL = f'{MOCK_SERVER}/rest/api/2/'
+
+# The number of worklogs returned in each page by `JIRAMock._get_json`
+MOCK_PAGE_SIZE = 5000
+
 
 class JIRAMock(j.JIRA):
 
@@ -26,6 +36,16 @@ class JIRAMock(j.JIRA):
         self.entries = []
         self.remote_wkls = {} if remote_wkls is None else remote_wkls
         self.builder = BuildCheckedin() if builder is None else builder
+        # The remote worklogs are read through `_session`, which serves them
+        # from `_get_json`, and are wrapped in real `Worklog` objects whose
+        # deletions also go through `_session`
+        self._options = {
+            'server': MOCK_SERVER,
+            'rest_path': 'api',
+            'rest_api_version': '2',
+            'async': False
+        }
+        self._session = JIRASessionMock(self)
 
     def add_worklog(
             self,
@@ -50,6 +70,25 @@ class JIRAMock(j.JIRA):
     def worklogs(self, issueKey):
         return self.remote_wkls[issueKey]
 
+    # Only the endpoint for the worklogs of an issue is supported
+    def _get_json(self, path, params=None):
+        issue_key = re.fullmatch(r'issue/([^/]+)/worklog', path).group(1)
+        params = {} if params is None else params
+        start_at = params.get('startAt', 0)
+        max_results = min(params.get('maxResults', MOCK_PAGE_SIZE), MOCK_PAGE_SIZE)
+        wkls = self.worklogs(issueKey=issue_key)
+        page = {
+            'startAt': start_at,
+            'maxResults': max_results,
+            'total': len(wkls),
+            'worklogs': [
+                dict(w.raw, self=to_mock_url(w.raw))
+                for w
+                in wkls[start_at:(start_at + max_results)]
+            ]
+        }
+        return page
+
     def _set_remote_wkls(self, remote_worklogs):
         self.remote_wkls = remote_worklogs
 
@@ -59,6 +98,51 @@ class JIRAMock(j.JIRA):
         return self
 
 
+class JIRASessionMock:
+    """Serves the pages of worklogs from `JIRAMock._get_json`, and routes the
+    deletion of a worklog that was read that way to the corresponding
+    `JIRAWklMock`.
+    """
+
+    jiraclient: JIRAMock
+    adapters: dict[str, Any]
+
+    def __init__(self, jiraclient: JIRAMock) -> None:
+        self.jiraclient = jiraclient
+        self.adapters = {}
+
+    def get(self, url: str, params: Any = None) -> ResponseMock:
+        path = url[len(MOCK_API_URL):]
+        return ResponseMock(self.jiraclient._get_json(path, params=params))
+
+    def delete(self, url: str, params: Any = None) -> None:
+        for wkls in self.jiraclient.remote_wkls.values():
+            for wkl in wkls:
+                if to_mock_url(wkl.raw) == url:
+                    return wkl.set_jira(self.jiraclient).delete()
+        raise RuntimeError(f"No mock worklog for the URL '{url}'")
+
+    def close(self) -> None:
+        pass
+
+
+class ResponseMock:
+    """A successful response whose body is the JSON form of `body`."""
+
+    def __init__(self, body: Any) -> None:
+        self.ok = True
+        self.status_code = 200
+        self.body = body
+        self.content = json.dumps(body).encode()
+
+    def json(self) -> Any:
+        return self.body
+
+
+def to_mock_url(raw: dict[str, Any]) -> str:
+    return f"{MOCK_API_URL}issue/{raw['issueId']}/worklog/{raw['id']}"
+
+
 class BuildCheckedin():
 
     curr_id: int
@@ -0,0 +1,560 @@
+#!/usr/bin/env python3
+
+# A local stand-in for the Jira server that implements the REST endpoints used by
+# jiraworklog, so that the real `jira.JIRA` client (including its HTTP session,
+# the request scheduler, and the JSON serialization) can be tested and
+# benchmarked without a network connection. Point `auth_jira` at it by setting
+# the `server` field of the configuration's `basic_auth` section to
+# `JiraServer.url`. The credentials aren't checked.
+
+from __future__ import annotations
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import re
+import threading
+import time
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlsplit
+
+# The Jira server returns at most this many worklogs for one request for the
+# worklogs of an issue. See
+# https://developer.atlassian.com/cloud/jira/platform/rest/v2/api-group-issue-worklogs/#api-rest-api-2-issue-issueidorkey-worklog-get
+DEFAULT_PAGE_SIZE = 5000
+
+# The number of entries in one page of the worklog feeds and the maximum number
+# of ids in one request to `worklog/list`
+FEED_PAGE_SIZE = 1000
+LIST_MAX_IDS = 1000
+
+# The user that every session is authenticated as. Worklogs in the checked-in
+# worklogs format whose author has the same display name belong to this user,
+# and worklogs by anyone else belong to other users
+USER = {'accountId': '1', 'name': 'daffy', 'displayName': 'Daffy Duck'}
+
+ROUTES = [
+    ('GET', re.compile(r'/rest/auth/1/session'), 'get_session'),
+    ('GET', re.compile(r'/rest/api/2/serverInfo'), 'get_server_info'),
+    ('GET', re.compile(r'/rest/api/2/myself'), 'get_session'),
+    ('GET', re.compile(r'/rest/api/2/search'), 'search_issues'),
+    ('GET', re.compile(r'/rest/api/2/issue/([^/]+)'), 'get_issue'),
+    ('GET', re.compile(r'/rest/api/2/issue/([^/]+)/worklog'), 'get_worklogs'),
+    ('POST', re.compile(r'/rest/api/2/issue/([^/]+)/worklog'), 'add_worklog'),
+    (
+        'DELETE',
+        re.compile(r'/rest/api/2/issue/([^/]+)/worklog/([^/]+)'),
+        'delete_worklog'
+    ),
+    ('GET', re.compile(r'/rest/api/2/worklog/updated'), 'get_updated'),
+    ('GET', re.compile(r'/rest/api/2/worklog/deleted'), 'get_deleted'),
+    ('POST', re.compile(r'/rest/api/2/worklog/list'), 'list_worklogs')
+]
+
+
+class JiraServerResponse:
+
+    status: int
+    body: Any
+    headers: dict[str, str]
+
+    def __init__(
+        self,
+        status: int,
+        body: Any = None,
+        headers: Optional[dict[str, str]] = None
+    ) -> None:
+        self.status = status
+        self.body = body
+        self.headers = {} if headers is None else headers
+
+
+class JiraServer:
+    """An in-process HTTP server that stands in for the Jira server.
+
+    The issues are given by `worklogs`, which maps each issue key to its
+    worklogs using the same format as the checked-in worklogs file. Every
+    request waits for `latency` seconds before it is handled, and the worklogs
+    of an issue are returned `page_size` at a time. Every `throttle_every`th
+    request is rejected with an HTTP 429 response whose `Retry-After` header is
+    `retry_after`, and every `fail_every`th request is rejected with an HTTP
+    `fail_status` response (a value of 0 turns either of these off). Requests
+    for the issues in `fail_issues` are rejected with an HTTP 404 response.
+
+    The server counts the requests for each endpoint in `requests`, and keeps
+    the current worklogs for each issue, so that a test can inspect the effect
+    of a run. Requests for the worklogs of an issue support the `startedAfter`
+    and `startedBefore` query parameters, where `startedAfter` includes
+    worklogs that started on the bound unless `started_after_exclusive` is
+    set. Searches for issues only support JQL
+    queries of the form `key in (...)`, and only return the `updated` field,
+    which changes whenever a worklog is added to or deleted from the issue.
+    """
+
+    def __init__(
+        self,
+        worklogs: Optional[dict[str, list[dict[str, str]]]] = None,
+        latency: float = 0.0,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        throttle_every: int = 0,
+        retry_after: float = 0.0,
+        fail_every: int = 0,
+        fail_status: int = 503,
+        fail_issues: Optional[list[str]] = None,
+        started_after_exclusive: bool = False
+    ) -> None:
+        self.latency = latency
+        self.page_size = page_size
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.fail_every = fail_every
+        self.fail_status = fail_status
+        self.fail_issues = set() if fail_issues is None else set(fail_issues)
+        self.started_after_exclusive = started_after_exclusive
+        self.requests: Counter = Counter()
+        self.n_requests = 0
+        self.lock = threading.Lock()
+        self.issue_ids: dict[str, str] = {}
+        self.issue_keys: dict[str, str] = {}
+        self.issue_updated: dict[str, int] = {}
+        self.worklogs: dict[str, dict[str, dict[str, Any]]] = {}
+        self.updated: dict[str, int] = {}
+        self.deleted: list[tuple[str, int]] = []
+        self.next_id = 1
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), JiraServerHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.jira_server = self  # type: ignore[attr-defined]
+        self.thread: Optional[threading.Thread] = None
+        for issue_key, full_wkls in ({} if worklogs is None else worklogs).items():
+            self.add_issue(issue_key)
+            for full in full_wkls:
+                self.store_worklog(issue_key, full_to_raw(full))
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def __enter__(self) -> JiraServer:
+        self.start()
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever,
+            kwargs={'poll_interval': 0.01},
+            daemon=True
+        )
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def add_issue(self, issue_key: str) -> None:
+        with self.lock:
+            if issue_key not in self.issue_ids:
+                issue_id = str(10000 + len(self.issue_ids))
+                self.issue_ids[issue_key] = issue_id
+                self.issue_keys[issue_id] = issue_key
+                self.worklogs[issue_key] = {}
+                self.touch_issue(issue_key)
+
+    # The worklogs for each issue in the same format as the checked-in worklogs
+    # file
+    def to_full(self) -> dict[str, list[dict[str, str]]]:
+        with self.lock:
+            return {
+                issue_key: [raw_to_full(raw) for raw in wkls.values()]
+                for issue_key, wkls
+                in self.worklogs.items()
+            }
+
+    def store_worklog(self, issue_key: str, raw: dict[str, Any]) -> dict[str, Any]:
+        with self.lock:
+            if raw.get('id') is None:
+                raw['id'] = str(self.next_id)
+            self.next_id = max(self.next_id, int(raw['id']) + 1)
+            # Keep the issue id of a worklog that was loaded from a checked-in
+            # worklogs file, since the test data uses the issue keys as ids
+            issue_id = raw.get('issueId') or self.issue_ids[issue_key]
+            raw['issueId'] = issue_id
+            raw['self'] = f"{self.url}/rest/api/2/issue/{issue_id}/worklog/{raw['id']}"
+            self.worklogs[issue_key][raw['id']] = raw
+            self.updated[raw['id']] = calc_now_ms()
+            self.touch_issue(issue_key)
+            return raw
+
+    # Remove every worklog from an issue as if each one had been deleted
+    def clear_issue(self, issue_key: str) -> None:
+        with self.lock:
+            for wkl_id in self.worklogs[issue_key]:
+                del self.updated[wkl_id]
+                self.deleted.append((wkl_id, calc_now_ms()))
+            self.worklogs[issue_key].clear()
+            self.touch_issue(issue_key)
+
+    # Record that an issue was updated. Changes that are made within the same
+    # millisecond still give the issue a new `updated` field. The caller must
+    # hold `lock`
+    def touch_issue(self, issue_key: str) -> None:
+        prev_ms = self.issue_updated.get(issue_key, 0)
+        self.issue_updated[issue_key] = max(calc_now_ms(), prev_ms + 1)
+
+    def find_issue_key(self, issue_id_or_key: str) -> Optional[str]:
+        if issue_id_or_key in self.fail_issues:
+            return None
+        if issue_id_or_key in self.issue_ids:
+            return issue_id_or_key
+        return self.issue_keys.get(issue_id_or_key)
+
+    # Decide whether the next request is rejected regardless of its contents
+    def inject_failure(self) -> Optional[JiraServerResponse]:
+        with self.lock:
+            self.n_requests += 1
+            n = self.n_requests
+        if self.throttle_every and n % self.throttle_every == 0:
+            headers = {'Retry-After': str(self.retry_after)}
+            return JiraServerResponse(429, error_body('Rate limit exceeded'), headers)
+        if self.fail_every and n % self.fail_every == 0:
+            return JiraServerResponse(self.fail_status, error_body('Server error'))
+        return None
+
+    def handle(
+        self,
+        method: str,
+        path: str,
+        query: dict[str, list[str]],
+        body: Any
+    ) -> JiraServerResponse:
+        if self.latency > 0:
+            time.sleep(self.latency)
+        for route_method, pattern, handler_nm in ROUTES:
+            match = pattern.fullmatch(path)
+            if route_method == method and match is not None:
+                with self.lock:
+                    self.requests[handler_nm] += 1
+                maybe_failure = self.inject_failure()
+                if maybe_failure is not None:
+                    return maybe_failure
+                handler = getattr(self, handler_nm)
+                return handler(*match.groups(), query=query, body=body)
+        return JiraServerResponse(404, error_body(f'No route for {method} {path}'))
+
+    def get_session(self, query: Any, body: Any) -> JiraServerResponse:
+        user = dict(USER, self=f"{self.url}/rest/api/2/user?accountId={USER['accountId']}")
+        return JiraServerResponse(200, user)
+
+    def get_server_info(self, query: Any, body: Any) -> JiraServerResponse:
+        info = {
+            'baseUrl': self.url,
+            'version': '1001.0.0',
+            'versionNumbers': [1001, 0, 0],
+            'deploymentType': 'Cloud',
+            'serverTitle': 'jiraworklog test server'
+        }
+        return JiraServerResponse(200, info)
+
+    def search_issues(
+        self,
+        query: dict[str, list[str]],
+        body: Any
+    ) -> JiraServerResponse:
+        jql = query.get('jql', [''])[0]
+        match = re.fullmatch(r'\s*key\s+in\s*\((.*)\)\s*', jql, re.IGNORECASE)
+        if match is None:
+            msg = f"Unsupported JQL query '{jql}'"
+            return JiraServerResponse(400, error_body(msg))
+        keys = [k.strip().strip('"') for k in match.group(1).split(',') if k.strip()]
+        issues = []
+        for key in keys:
+            issue_key = self.find_issue_key(key)
+            if issue_key is None:
+                msg = f"An issue with key '{key}' does not exist for field 'key'."
+                return JiraServerResponse(400, error_body(msg))
+            with self.lock:
+                updated_ms = self.issue_updated[issue_key]
+            issue_id = self.issue_ids[issue_key]
+            updated = datetime.fromtimestamp(updated_ms / 1000, timezone.utc)
+            issues.append({
+                'id': issue_id,
+                'key': issue_key,
+                'self': f'{self.url}/rest/api/2/issue/{issue_id}',
+                'fields': {'updated': fmt_jira_datetime(updated)}
+            })
+        start_at = int(query.get('startAt', ['0'])[0])
+        max_results = int(query.get('maxResults', ['50'])[0])
+        page = {
+            'startAt': start_at,
+            'maxResults': max_results,
+            'total': len(issues),
+            'issues': issues[start_at:(start_at + max_results)]
+        }
+        return JiraServerResponse(200, page)
+
+    def get_issue(
+        self,
+        issue_id_or_key: str,
+        query: Any,
+        body: Any
+    ) -> JiraServerResponse:
+        issue_key = self.find_issue_key(issue_id_or_key)
+        if issue_key is None:
+            return issue_not_found(issue_id_or_key)
+        issue_id = self.issue_ids[issue_key]
+        issue = {
+            'id': issue_id,
+            'key': issue_key,
+            'self': f'{self.url}/rest/api/2/issue/{issue_id}',
+            'fields': {}
+        }
+        return JiraServerResponse(200, issue)
+
+    def get_worklogs(
+        self,
+        issue_id_or_key: str,
+        query: dict[str, list[str]],
+        body: Any
+    ) -> JiraServerResponse:
+        issue_key = self.find_issue_key(issue_id_or_key)
+        if issue_key is None:
+            return issue_not_found(issue_id_or_key)
+        start_at = int(query.get('startAt', ['0'])[0])
+        max_results = min(
+            int(query.get('maxResults', [str(self.page_size)])[0]),
+            self.page_size
+        )
+        started_after = int(query.get('startedAfter', ['-1'])[0])
+        if not self.started_after_exclusive:
+            started_after -= 1
+        maybe_started_before = query.get('startedBefore')
+        with self.lock:
+            raw_wkls = [
+                raw
+                for raw
+                in self.worklogs[issue_key].values()
+                if started_after < calc_started_ms(raw)
+                and (
+                    maybe_started_before is None
+                    or calc_started_ms(raw) < int(maybe_started_before[0])
+                )
+            ]
+        page = {
+            'startAt': start_at,
+            'maxResults': max_results,
+            'total': len(raw_wkls),
+            'worklogs': raw_wkls[start_at:(start_at + max_results)]
+        }
+        return JiraServerResponse(200, page)
+
+    def add_worklog(
+        self,
+        issue_id_or_key: str,
+        query: Any,
+        body: dict[str, Any]
+    ) -> JiraServerResponse:
+        issue_key = self.find_issue_key(issue_id_or_key)
+        if issue_key is None:
+            return issue_not_found(issue_id_or_key)
+        now = fmt_jira_datetime(datetime.now(timezone.utc))
+        user = create_user(USER['displayName'])
+        raw = {
+            'author': user,
+            'updateAuthor': user,
+            'comment': body.get('comment', ''),
+            'created': now,
+            'updated': now,
+            'started': body.get('started', now),
+            'timeSpent': fmt_time_spent(int(body['timeSpentSeconds'])),
+            'timeSpentSeconds': int(body['timeSpentSeconds'])
+        }
+        return JiraServerResponse(201, self.store_worklog(issue_key, raw))
+
+    def delete_worklog(
+        self,
+        issue_id_or_key: str,
+        wkl_id: str,
+        query: Any,
+        body: Any
+    ) -> JiraServerResponse:
+        issue_key = self.find_issue_key(issue_id_or_key)
+        if issue_key is None:
+            return issue_not_found(issue_id_or_key)
+        with self.lock:
+            if wkl_id not in self.worklogs[issue_key]:
+                msg = f"Cannot find worklog with id: '{wkl_id}'."
+                return JiraServerResponse(404, error_body(msg))
+            del self.worklogs[issue_key][wkl_id]
+            del self.updated[wkl_id]
+            self.deleted.append((wkl_id, calc_now_ms()))
+            self.touch_issue(issue_key)
+        return JiraServerResponse(204)
+
+    def get_updated(
+        self,
+        query: dict[str, list[str]],
+        body: Any
+    ) -> JiraServerResponse:
+        with self.lock:
+            changes = sorted(
+                (updated_ms, wkl_id)
+                for wkl_id, updated_ms
+                in self.updated.items()
+            )
+        return self.create_feed_page(changes, query)
+
+    def get_deleted(
+        self,
+        query: dict[str, list[str]],
+        body: Any
+    ) -> JiraServerResponse:
+        with self.lock:
+            changes = sorted((deleted_ms, wkl_id) for wkl_id, deleted_ms in self.deleted)
+        return self.create_feed_page(changes, query)
+
+    def create_feed_page(
+        self,
+        changes: list[tuple[int, str]],
+        query: dict[str, list[str]]
+    ) -> JiraServerResponse:
+        since = int(query.get('since', ['0'])[0])
+        values = [
+            {'worklogId': int(wkl_id), 'updatedTime': changed_ms}
+            for changed_ms, wkl_id
+            in changes
+            if changed_ms >= since
+        ]
+        page_values = values[:FEED_PAGE_SIZE]
+        page = {
+            'values': page_values,
+            'since': since,
+            'until': page_values[-1]['updatedTime'] if page_values else since,
+            'lastPage': len(values) <= FEED_PAGE_SIZE
+        }
+        return JiraServerResponse(200, page)
+
+    def list_worklogs(self, query: Any, body: dict[str, Any]) -> JiraServerResponse:
+        wkl_ids = [str(x) for x in body.get('ids', [])]
+        if len(wkl_ids) > LIST_MAX_IDS:
+            msg = f'The number of worklog ids must be at most {LIST_MAX_IDS}'
+            return JiraServerResponse(400, error_body(msg))
+        with self.lock:
+            by_id = {
+                wkl_id: raw
+                for wkls in self.worklogs.values()
+                for wkl_id, raw in wkls.items()
+            }
+        raw_wkls = [by_id[wkl_id] for wkl_id in wkl_ids if wkl_id in by_id]
+        return JiraServerResponse(200, raw_wkls)
+
+
+class JiraServerHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    # The headers and the body are written separately, which would otherwise
+    # wait on the client's delayed acknowledgement for every keep-alive request
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        self.dispatch('GET')
+
+    def do_POST(self) -> None:
+        self.dispatch('POST')
+
+    def do_DELETE(self) -> None:
+        self.dispatch('DELETE')
+
+    def dispatch(self, method: str) -> None:
+        jira_server = self.server.jira_server  # type: ignore[attr-defined]
+        url = urlsplit(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        data = self.rfile.read(length) if length else b''
+        body = json.loads(data) if data else None
+        response = jira_server.handle(method, url.path, parse_qs(url.query), body)
+        payload = b'' if response.body is None else json.dumps(response.body).encode()
+        self.send_response(response.status)
+        for key, value in response.headers.items():
+            self.send_header(key, value)
+        if payload:
+            self.send_header('Content-Type', 'application/json;charset=UTF-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def full_to_raw(full: dict[str, str]) -> dict[str, Any]:
+    raw = {
+        'author': create_user(full['author']),
+        'comment': full['comment'],
+        'created': full['created'],
+        'id': full['id'],
+        'issueId': full['issueId'],
+        'started': full['started'],
+        'timeSpent': full['timeSpent'],
+        'timeSpentSeconds': int(full['timeSpentSeconds']),
+        'updateAuthor': create_user(full['updateAuthor']),
+        'updated': full['updated']
+    }
+    return raw
+
+
+def raw_to_full(raw: dict[str, Any]) -> dict[str, str]:
+    full = {
+        'author': raw['author']['displayName'],
+        'comment': raw['comment'],
+        'created': raw['created'],
+        'id': raw['id'],
+        'issueId': raw['issueId'],
+        'started': raw['started'],
+        'timeSpent': raw['timeSpent'],
+        'timeSpentSeconds': str(raw['timeSpentSeconds']),
+        'updateAuthor': raw['updateAuthor']['displayName'],
+        'updated': raw['updated']
+    }
+    return full
+
+
+def create_user(display_name: str) -> dict[str, str]:
+    if display_name == USER['displayName']:
+        account_id = USER['accountId']
+    else:
+        account_id = display_name.lower().replace(' ', '-')
+    return {'accountId': account_id, 'displayName': display_name}
+
+
+def issue_not_found(issue_id_or_key: str) -> JiraServerResponse:
+    msg = 'Issue does not exist or you do not have permission to see it.'
+    return JiraServerResponse(404, error_body(msg))
+
+
+def error_body(msg: str) -> dict[str, Any]:
+    return {'errorMessages': [msg], 'errors': {}}
+
+
+def fmt_jira_datetime(dt: datetime) -> str:
+    return dt.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + dt.strftime('%z')
+
+
+def fmt_time_spent(seconds: int) -> str:
+    m, s = divmod(seconds, 60)
+    h, m = divmod(m, 60)
+    d, h = divmod(h, 24)
+    chunks = [f'{v}{u}' for v, u in [(d, 'd'), (h, 'h'), (m, 'm'), (s, 's')] if v]
+    return ' '.join(chunks)
+
+
+def calc_started_ms(raw: dict[str, Any]) -> int:
+    started = datetime.strptime(raw['started'], '%Y-%m-%dT%H:%M:%S.%f%z')
+    return int(started.timestamp() * 1000)
+
+
+def calc_now_ms() -> int:
+    return int(time.time() * 1000)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+
+import json
+from jiraworklog.checkedin_store import (
+    CheckedinStore,
+    JSONCheckedinStore,
+    JournalCheckedinStore,
+    MigrateCheckedinError,
+    SQLiteCheckedinStore,
+    migrate_checkedin
+)
+from jiraworklog.configuration import read_conf
+import pytest
+
+
+def create_full(wkl_id):
+    return {
+        'id': wkl_id,
+        'comment': f'Worklog {wkl_id}',
+        'started': '2021-01-12T10:00:00.000000-0500',
+        'timeSpentSeconds': '1800'
+    }
+
+
+def create_journal_store(tmp_path):
+    return JournalCheckedinStore(
+        str(tmp_path / 'checkedin.snapshot.json'),
+        str(tmp_path / 'checkedin.journal.jsonl')
+    )
+
+
+def test_journal_store_roundtrip(tmp_path):
+    """Updates are appended to the journal and replayed onto the snapshot"""
+
+    store = create_journal_store(tmp_path)
+    with pytest.raises(FileNotFoundError):
+        store.read()
+    initial = {'P01': [create_full('1'), create_full('2')]}
+    store.commit(initial)
+
+    store = create_journal_store(tmp_path)
+    assert store.read() == initial
+    store.add('P01', create_full('3'))
+    store.remove('P01', create_full('1'))
+    store.add('P02', create_full('4'))
+    final = {'P01': [create_full('2'), create_full('3')], 'P02': [create_full('4')]}
+    store.commit(final)
+
+    # The snapshot is left as-is and the updates are only in the journal
+    with open(tmp_path / 'checkedin.snapshot.json') as file:
+        assert json.load(file)['worklogs'] == initial
+    with open(tmp_path / 'checkedin.journal.jsonl') as file:
+        assert len(file.readlines()) == 3
+    assert create_journal_store(tmp_path).read() == final
+
+    # A partially written entry at the end of the journal is ignored
+    with open(tmp_path / 'checkedin.journal.jsonl', 'a') as file:
+        file.write('{"generation": 1, "op": "add", "iss')
+    assert create_journal_store(tmp_path).read() == final
+
+
+def test_journal_store_compact(tmp_path, monkeypatch):
+    """The journal is folded into the snapshot once it grows large enough"""
+
+    monkeypatch.setattr(
+        'jiraworklog.checkedin_store.JOURNAL_COMPACT_ENTRIES',
+        2
+    )
+    store = create_journal_store(tmp_path)
+    store.commit({'P01': []})
+    store = create_journal_store(tmp_path)
+    store.read()
+    store.add('P01', create_full('1'))
+    store.add('P01', create_full('2'))
+    final = {'P01': [create_full('1'), create_full('2')]}
+    store.commit(final)
+    with open(tmp_path / 'checkedin.snapshot.json') as file:
+        assert json.load(file)['worklogs'] == final
+    with open(tmp_path / 'checkedin.journal.jsonl') as file:
+        assert file.read() == ''
+
+    # Entries left behind by an interrupted compaction belong to an older
+    # generation and aren't applied a second time
+    with open(tmp_path / 'checkedin.journal.jsonl', 'w') as file:
+        entry = {'generation': 1, 'op': 'add', 'issue': 'P01', 'worklog': create_full('2')}
+        file.write(json.dumps(entry) + '\n')
+    assert create_journal_store(tmp_path).read() == final
+
+
+def test_migrate_checkedin(tmp_path):
+    """Migrate a JSON checked-in worklogs file to the journal backend"""
+
+    conf = read_conf('tests/data/03-remove-to-empty/config.yaml')
+    conf.checked_in_path = str(tmp_path / 'checkedin.json')
+    with pytest.raises(MigrateCheckedinError):
+        migrate_checkedin(conf, 'tests/data/03-remove-to-empty/checkedin.json')
+
+    conf.checked_in_backend = 'journal'
+    path = migrate_checkedin(conf, 'tests/data/03-remove-to-empty/checkedin.json')
+    assert path == str(tmp_path / 'checkedin.snapshot.json')
+    expected = JSONCheckedinStore('tests/data/03-remove-to-empty/checkedin.json').read()
+    assert create_journal_store(tmp_path).read() == expected
+    with pytest.raises(MigrateCheckedinError):
+        migrate_checkedin(conf, 'tests/data/03-remove-to-empty/checkedin.json')
+
+
+def test_sqlite_store(tmp_path):
+    """Updates are written to the database as they are made"""
+
+    path = str(tmp_path / 'checkedin.sqlite3')
+    store = SQLiteCheckedinStore(path)
+    with pytest.raises(FileNotFoundError):
+        store.read()
+    store.write_all({'P01': [create_full('1'), create_full('2')], 'P02': []})
+
+    store = SQLiteCheckedinStore(path)
+    store.add('P02', create_full('3'))
+    store.add('P03', create_full('4'))
+    store.remove('P01', create_full('1'))
+    with pytest.raises(RuntimeError):
+        store.remove('P01', create_full('1'))
+
+    # Only the requested issues are loaded
+    store = SQLiteCheckedinStore(path)
+    assert store.read(['P01', 'P02']) == {
+        'P01': [create_full('2')],
+        'P02': [create_full('3')]
+    }
+    assert store.read() == {
+        'P01': [create_full('2')],
+        'P02': [create_full('3')],
+        'P03': [create_full('4')]
+    }
+    store.commit({})
+
+
+def test_checkedin_store_abstract():
+    """A store that doesn't implement every required method can't be created"""
+
+    class PartialCheckedinStore(CheckedinStore):
+
+        def read(self, issue_nms=None):
+            return {}
+
+    with pytest.raises(TypeError):
+        PartialCheckedinStore()
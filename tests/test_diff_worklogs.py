@@ -2,7 +2,8 @@
 
 from jiraworklog.diff_worklogs import (
     diff_local,
-    diff_remote
+    diff_remote,
+    match_multiset
 )
 from tests.data_worklogs import *
 from tests.utils import assert_keys
@@ -179,3 +180,31 @@ def test_diff_local_dups():
     assert_keys(actual, ['P9992-3'])
     assert actual['P9992-3'].added == localdup_wkls['P9992-3']
     assert actual['P9992-3'].removed == []
+
+
+def test_match_multiset():
+    """Matching gives the same result as repeated calls to `list.remove`"""
+
+    def remove_each(listwkl_1, listwkl_2):
+        remaining_1 = listwkl_1.copy()
+        remaining_2 = []
+        matched_2 = []
+        for x in listwkl_2:
+            try:
+                remaining_1.remove(x)
+                matched_2.append(x)
+            except ValueError:
+                remaining_2.append(x)
+        return (remaining_1, remaining_2, matched_2)
+
+    listwkl_1 = ['a', 'b', 'a', 'c', 'a', 'b']
+    listwkl_2 = ['b', 'a', 'd', 'a', 'b', 'b', 'a', 'a']
+    actual = match_multiset(listwkl_1, listwkl_2, lambda x: x)
+    assert actual == remove_each(listwkl_1, listwkl_2)
+    assert actual == (['c'], ['d', 'b', 'a'], ['b', 'a', 'a', 'b', 'a'])
+
+    # Local worklogs with duplicates partially matched by checked-in worklogs
+    local_listwkl = local_wkls['P9992-3'] + local_wkls['P9992-3'][0:2]
+    actual = diff_local({'P9992-3': local_listwkl}, checkedin_0to2)
+    assert actual['P9992-3'].added == local_wkls['P9992-3'][2:] + local_wkls['P9992-3'][0:2]
+    assert actual['P9992-3'].removed == []
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+import json
+from jiraworklog.instrumentation import Instrumentation, activate, phase
+from tests.run_application import run_application
+
+
+class FakeClock:
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def clock(self) -> float:
+        self.now += 0.5
+        return self.now
+
+
+def test_instrumentation_phases():
+    """Phases are only measured while the instrumentation is active"""
+
+    instr = Instrumentation(clock=FakeClock().clock)
+    with phase('ignored'):
+        pass
+    with activate(instr):
+        for n_items in [2, 3]:
+            with phase('read') as record:
+                record.items = n_items
+                record.nbytes = 10
+    assert list(instr.phases) == ['read']
+    stats = instr.phases['read']
+    assert (stats.calls, stats.seconds, stats.items, stats.nbytes) == (2, 1.0, 5, 20)
+    assert instr.fmt_summary({'requests': 4}).split('\n') == [
+        'Phase  Calls  Seconds  Items  Bytes',
+        'read       2    1.000      5     20',
+        'Jira requests (requests: 4)'
+    ]
+
+
+def test_instrumentation_sync(tmp_path, capsys):
+    """A run reports a summary, writes a trace, and profiles each phase"""
+
+    trace_path = tmp_path / 'trace.json'
+    profile_dir = tmp_path / 'profile'
+    run_application(
+        [
+            '--config-path', 'tests/data/02-add-to-empty/config.yaml',
+            '--file', 'tests/data/02-add-to-empty/worklogs.csv',
+            '--auto-confirm',
+            '--verbose', '2',
+            '--trace', str(trace_path),
+            '--profile', str(profile_dir)
+        ],
+        'tests/data/02-add-to-empty/checkedin.json',
+        'tests/data/02-add-to-empty/remote.json'
+    )
+    summary = capsys.readouterr().err
+    assert summary.startswith('Phase ')
+
+    with open(trace_path) as trace_file:
+        trace = json.load(trace_file)
+    phases = trace['otherData']['phases']
+    for name in [
+        'local_read',
+        'checkedin_read',
+        'remote_read',
+        'remote_read.issue',
+        'diff',
+        'reconcile',
+        'confirm',
+        'push',
+        'push.add'
+    ]:
+        assert name in phases
+        assert name in summary
+    # The fixture adds each of its three local worklogs to the Jira server and
+    # doesn't remove any
+    assert phases['push']['items'] == 3
+    assert phases['push.add']['calls'] == 3
+    assert phases['push.add']['items'] == 3
+    assert 'push.remove' not in phases
+    # The remote worklogs are downloaded and the added worklogs are uploaded as
+    # JSON, so both phases record the size of the data that was sent or received
+    assert phases['remote_read']['bytes'] > 0
+    assert phases['remote_read.page']['bytes'] == phases['remote_read']['bytes']
+    assert phases['push']['bytes'] > 0
+    assert phases['push.add']['bytes'] == phases['push']['bytes']
+    assert {e['name'] for e in trace['traceEvents']} == set(phases)
+    assert (profile_dir / 'local_read.prof').exists()
+    assert (profile_dir / 'push.prof').exists()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+
+from jiraworklog.auth_jira import auth_jira
+from jiraworklog.cmdline_args import parser
+from jiraworklog.configuration import read_conf
+from jiraworklog.read_remote_worklogs import (
+    ReadJiraWorkloadError,
+    fetch_remote_worklogs,
+    iter_worklog_pages
+)
+from jiraworklog.request_scheduler import find_request_scheduler
+from jiraworklog.sync_worklogs import sync_worklogs
+from jiraworklog.worklogs import full_to_canon
+import json
+import pytest
+from tests.jiraserver import JiraServer
+import time
+
+
+def run_sync(server, tmp_path, data_dir, remote=None):
+    conf = read_conf(f'{data_dir}/config.yaml')
+    conf.auth_token = {'server': server.url, 'user': 'daffy', 'api_token': 'token'}
+    conf.checked_in_path = str(tmp_path / 'checkedin.json')
+    conf.remote = {} if remote is None else remote
+    if not (tmp_path / 'checkedin.json').exists():
+        with open(f'{data_dir}/checkedin.json') as checkedin_file:
+            (tmp_path / 'checkedin.json').write_text(checkedin_file.read())
+    cmdline_args = parser.parse_args(['--auto-confirm'])
+    jira = auth_jira(conf)
+    _, checkedin_full, _ = sync_worklogs(
+        jira,
+        conf,
+        cmdline_args,
+        f'{data_dir}/worklogs.csv',
+        True
+    )
+    return (jira, checkedin_full)
+
+
+def canon_keys(full_wkls):
+    return {
+        issue_nm: sorted(tuple(full_to_canon(w).values()) for w in wkls)
+        for issue_nm, wkls
+        in full_wkls.items()
+    }
+
+
+def read_remote_json(data_dir):
+    with open(f'{data_dir}/remote.json') as remote_file:
+        return json.load(remote_file)
+
+
+@pytest.mark.parametrize(
+    'data_dir',
+    ['tests/data/02-add-to-empty', 'tests/data/03-remove-to-empty']
+)
+def test_jiraserver_sync(tmp_path, data_dir):
+    """A run through the real Jira client leaves the server in the same state as
+    the checked-in worklogs
+    """
+
+    with JiraServer(read_remote_json(data_dir)) as server:
+        _, checkedin_full = run_sync(server, tmp_path, data_dir)
+        assert canon_keys(server.to_full()) == canon_keys(checkedin_full)
+        n_added = server.requests['add_worklog']
+        n_deleted = server.requests['delete_worklog']
+        assert n_added + n_deleted > 0
+
+        # A second run has nothing left to do
+        run_sync(server, tmp_path, data_dir)
+        assert server.requests['add_worklog'] == n_added
+        assert server.requests['delete_worklog'] == n_deleted
+
+
+def test_jiraserver_throttled(tmp_path):
+    """Concurrent requests that are throttled or fail are retried. Only
+    idempotent requests are retried after a server error, so the run only
+    reads and deletes worklogs
+    """
+
+    data_dir = 'tests/data/03-remove-to-empty'
+    server = JiraServer(
+        read_remote_json(data_dir),
+        latency=0.01,
+        throttle_every=3,
+        fail_every=5
+    )
+    with server:
+        remote = {'read_workers': 4, 'push_workers': 4}
+        jira, checkedin_full = run_sync(server, tmp_path, data_dir, remote)
+        assert canon_keys(server.to_full()) == canon_keys(checkedin_full)
+    stats = find_request_scheduler(jira).stats.to_dict()
+    assert stats['throttled'] > 0
+    assert stats['retried'] > stats['throttled']
+
+
+def test_jiraserver_missing_issue(tmp_path):
+    """Requests for a missing issue are reported as such"""
+
+    data_dir = 'tests/data/02-add-to-empty'
+    with JiraServer(read_remote_json(data_dir), fail_issues=['P02']) as server:
+        with pytest.raises(ReadJiraWorkloadError) as exc:
+            run_sync(server, tmp_path, data_dir)
+    assert [nm for nm, _ in exc.value.errors] == ['P02']
+    assert exc.value.errors[0][1].status_code == 404
+
+
+def test_jiraserver_incremental(tmp_path):
+    """The remote worklogs cache is brought up-to-date using the worklog feeds"""
+
+    data_dir = 'tests/data/02-add-to-empty'
+    with JiraServer(read_remote_json(data_dir)) as server:
+        run_sync(server, tmp_path, data_dir, {'incremental': True})
+        assert server.requests['get_worklogs'] == 2
+        _, checkedin_full = run_sync(server, tmp_path, data_dir, {'incremental': True})
+        assert server.requests['get_worklogs'] == 2
+        assert server.requests['get_updated'] == 1
+        assert server.requests['list_worklogs'] == 1
+        assert canon_keys(server.to_full()) == canon_keys(checkedin_full)
+
+
+@pytest.mark.parametrize('incremental', [False, True])
+def test_jiraserver_own_worklogs(tmp_path, incremental):
+    """Other users' worklogs are neither read nor matched to local worklogs"""
+
+    data_dir = 'tests/data/02-add-to-empty'
+    other = {
+        'author': 'Bugs Bunny',
+        'comment': 'Data pipeline',
+        'created': '2021-10-03T17:21:55.764-0400',
+        'id': '900',
+        'issueId': 'P01',
+        'started': '2021-01-12T10:00:00.000-0500',
+        'timeSpent': '30m',
+        'timeSpentSeconds': '1800',
+        'updateAuthor': 'Bugs Bunny',
+        'updated': '2021-10-03T17:21:55.764-0400'
+    }
+    remote_full = {'P01': [other, dict(other, id='901')], 'P02': []}
+    remote = {'own_worklogs': True, 'incremental': incremental}
+    with JiraServer(remote_full) as server:
+        _, checkedin_full = run_sync(server, tmp_path, data_dir, remote)
+        assert server.requests['add_worklog'] == 3
+        assert {w['author'] for ws in checkedin_full.values() for w in ws} == {
+            'Daffy Duck'
+        }
+        _, checkedin_full = run_sync(server, tmp_path, data_dir, remote)
+        assert server.requests['add_worklog'] == 3
+        remaining = server.to_full()
+    assert [w['author'] for w in remaining['P01']].count('Bugs Bunny') == 2
+    assert len(checkedin_full['P01']) == 2 and len(checkedin_full['P02']) == 1
+
+
+@pytest.mark.parametrize('page_workers', [1, 3])
+def test_jiraserver_paged(page_workers):
+    """Issues with more worklogs than fit in one page are read a page at a time,
+    in order
+    """
+
+    data_dir = 'tests/data/03-remove-to-empty'
+    first = read_remote_json(data_dir)['P01'][0]
+    remote_full = {
+        'P01': [dict(first, id=str(100 + i), comment=f'Task {i}') for i in range(7)],
+        'P02': []
+    }
+    conf = read_conf(f'{data_dir}/config.yaml')
+    conf.remote = {'page_workers': page_workers}
+    progress = []
+    with JiraServer(remote_full, page_size=2) as server:
+        conf.auth_token = {'server': server.url, 'user': 'daffy', 'api_token': 'token'}
+        jira_basewkls = fetch_remote_worklogs(
+            auth_jira(conf),
+            conf,
+            ['P01', 'P02'],
+            progress=lambda *args: progress.append(args)
+        )
+        assert server.requests['get_worklogs'] == 5
+    assert [w.raw['comment'] for w in jira_basewkls['P01']] == [
+        f'Task {i}' for i in range(7)
+    ]
+    assert jira_basewkls['P02'] == []
+    assert progress == [('P01', n, 7) for n in [2, 4, 6, 7]]
+
+
+def test_jiraserver_paged_lookahead():
+    """Concurrent pages are requested no further ahead of the page being read
+    than the number of page workers
+    """
+
+    data_dir = 'tests/data/03-remove-to-empty'
+    first = read_remote_json(data_dir)['P01'][0]
+    remote_full = {
+        'P01': [dict(first, id=str(100 + i), comment=f'Task {i}') for i in range(7)]
+    }
+    conf = read_conf(f'{data_dir}/config.yaml')
+    with JiraServer(remote_full, page_size=1) as server:
+        conf.auth_token = {'server': server.url, 'user': 'daffy', 'api_token': 'token'}
+        pages = iter_worklog_pages(auth_jira(conf), 'P01', None, page_workers=2)
+        comments = []
+        for n_pages, page_wkls in enumerate(pages, start=1):
+            # Give the page workers time to run ahead of the reader
+            time.sleep(0.05)
+            assert server.requests['get_worklogs'] <= n_pages + 2
+            comments.extend(w.raw['comment'] for w in page_wkls)
+        assert server.requests['get_worklogs'] == 7
+    assert comments == [f'Task {i}' for i in range(7)]
+
+
+def test_jiraserver_validate_by_id(tmp_path):
+    """Issues without new local worklogs are read by the ids of their checked-in
+    worklogs, with the same result as listing every worklog for the issue
+    """
+
+    data_dir = 'tests/data/02-add-to-empty'
+    results = []
+    for remote in [{}, {'validate_by_id': True}]:
+        run_path = tmp_path / str(len(results))
+        run_path.mkdir()
+        with JiraServer(read_remote_json(data_dir)) as server:
+            run_sync(server, run_path, data_dir, remote)
+            # Every issue has new local worklogs in the first run
+            assert server.requests['get_worklogs'] == 2
+            server.clear_issue('P02')
+            _, checkedin_full = run_sync(server, run_path, data_dir, remote)
+            results.append((checkedin_full, dict(server.requests)))
+    (listed_full, listed_requests), (by_id_full, by_id_requests) = results
+    assert canon_keys(by_id_full) == canon_keys(listed_full)
+    assert listed_requests['get_worklogs'] == 4
+    assert by_id_requests['get_worklogs'] == 2
+    assert by_id_requests['list_worklogs'] == 1
+
+
+def test_jiraserver_revalidate(tmp_path):
+    """Only the issues that were updated since the previous run have their
+    worklogs downloaded again
+    """
+
+    data_dir = 'tests/data/02-add-to-empty'
+    remote = {'revalidate': True}
+    with JiraServer(read_remote_json(data_dir)) as server:
+        run_sync(server, tmp_path, data_dir, remote)
+        assert server.requests['get_worklogs'] == 2
+
+        # The worklogs that the first run added updated both issues
+        run_sync(server, tmp_path, data_dir, remote)
+        assert server.requests['get_worklogs'] == 4
+        run_sync(server, tmp_path, data_dir, remote)
+        assert server.requests['get_worklogs'] == 4
+
+        server.clear_issue('P02')
+        _, checkedin_full = run_sync(server, tmp_path, data_dir, remote)
+        assert server.requests['get_worklogs'] == 5
+        assert server.requests['search_issues'] == 4
+        assert server.requests['add_worklog'] == 3
+        remaining = server.to_full()
+    assert canon_keys(checkedin_full)['P01'] == canon_keys(remaining)['P01']
+
+
+def test_jiraserver_revalidate_by_issue_id(tmp_path):
+    """Issues that are configured by their id are matched to the search results,
+    which identify the issues by their key
+    """
+
+    src_dir = 'tests/data/02-add-to-empty'
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    with open(f'{src_dir}/config.yaml') as conf_file:
+        conf_text = conf_file.read().replace('"P01"', '"10000"')
+    (data_dir / 'config.yaml').write_text(conf_text)
+    (data_dir / 'checkedin.json').write_text('{"10000": [], "P02": []}')
+    with open(f'{src_dir}/worklogs.csv') as worklogs_file:
+        (data_dir / 'worklogs.csv').write_text(worklogs_file.read())
+    remote = {'revalidate': True}
+    with JiraServer(read_remote_json(src_dir)) as server:
+        assert server.issue_ids['P01'] == '10000'
+        run_sync(server, tmp_path, data_dir, remote)
+        run_sync(server, tmp_path, data_dir, remote)
+        assert server.requests['get_worklogs'] == 4
+        _, checkedin_full = run_sync(server, tmp_path, data_dir, remote)
+        assert server.requests['get_worklogs'] == 4
+        remaining = server.to_full()
+    assert canon_keys(checkedin_full)['10000'] == canon_keys(remaining)['P01']
+
+
+def test_jiraserver_revalidate_missing_issue(tmp_path):
+    """A failed search downloads every issue, which reports the missing issue"""
+
+    data_dir = 'tests/data/02-add-to-empty'
+    with JiraServer(read_remote_json(data_dir), fail_issues=['P02']) as server:
+        with pytest.raises(ReadJiraWorkloadError) as exc:
+            run_sync(server, tmp_path, data_dir, {'revalidate': True})
+        assert server.requests['search_issues'] == 1
+    assert [nm for nm, _ in exc.value.errors] == ['P02']
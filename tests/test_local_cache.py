@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+from jiraworklog.configuration import read_conf
+from jiraworklog.read_local_common import NativeWorklogParseEntryError
+import jiraworklog.read_local_worklogs as rlw
+from jiraworklog.read_local_worklogs import read_local_worklogs
+import pytest
+
+HEADER = 'task,start,duration,tags\n'
+
+ROWS = [
+    'Data pipeline,2021-01-12 10:00,30m,p1\n',
+    'Add routines,2021-01-12 15:45,1h,p2\n',
+    'Review,2021-01-13 10:00,15m,p1\n',
+    'Write specifications,2021-01-13 13:15,1h 30m,p2\n'
+]
+
+
+def create_conf(tmp_path, cache=True):
+    conf = read_conf('tests/data/12-delim-start-duration/config.yaml')
+    conf.parse_delimited['cache'] = cache
+    conf.checked_in_path = str(tmp_path / 'checkedin.json')
+    return conf
+
+
+def canon_keys(local_wkls):
+    return {
+        issue_nm: [wkl.canon_key() for wkl in wkls]
+        for issue_nm, wkls
+        in local_wkls.items()
+    }
+
+
+def spy_reads(monkeypatch):
+    offsets = []
+    read_local_delimited = rlw.read_local_delimited
+    def spy(worklogs_path, conf, progress=None):
+        offsets.append(None if progress is None else progress.offset)
+        return read_local_delimited(worklogs_path, conf, progress)
+    monkeypatch.setattr(rlw, 'read_local_delimited', spy)
+    return offsets
+
+
+def test_local_cache_delimited(tmp_path, monkeypatch):
+    """Unchanged files aren't parsed again and only appended rows are parsed"""
+
+    conf = create_conf(tmp_path)
+    uncached_conf = create_conf(tmp_path, False)
+    worklogs_path = tmp_path / 'worklogs.csv'
+    worklogs_path.write_text(HEADER + ''.join(ROWS[:2]))
+    offsets = spy_reads(monkeypatch)
+
+    first = read_local_worklogs(str(worklogs_path), conf)
+    assert (tmp_path / 'checkedin.local-cache.json').exists()
+    assert read_local_worklogs(str(worklogs_path), conf) == first
+    assert offsets == [0]
+
+    # Only the appended rows are parsed
+    size = worklogs_path.stat().st_size
+    with open(worklogs_path, 'a') as worklogs_file:
+        worklogs_file.write(''.join(ROWS[2:]))
+    appended = read_local_worklogs(str(worklogs_path), conf)
+    expected = read_local_worklogs(str(worklogs_path), uncached_conf)
+    assert canon_keys(appended) == canon_keys(expected)
+    assert offsets == [0, size, None]
+
+    # Errors in the appended rows report the row within the whole file
+    with open(worklogs_path, 'a') as worklogs_file:
+        worklogs_file.write('Deploy,2021-01-14 09:00,1x,p1\n')
+    with pytest.raises(NativeWorklogParseEntryError) as exc:
+        read_local_worklogs(str(worklogs_path), conf)
+    assert str(exc.value) == (
+        "row 4 'duration' field: '1x' doesn't satisfy the Jira-style parse format"
+    )
+    with pytest.raises(NativeWorklogParseEntryError) as exc:
+        read_local_worklogs(str(worklogs_path), conf)
+
+    # A file that was changed other than by appending is parsed from scratch
+    worklogs_path.write_text(HEADER + ''.join(reversed(ROWS)))
+    changed = read_local_worklogs(str(worklogs_path), conf)
+    expected = read_local_worklogs(str(worklogs_path), uncached_conf)
+    assert canon_keys(changed) == canon_keys(expected)
+    assert offsets[-2:] == [0, None]
+
+    # Refreshing the cache parses the file from scratch
+    offsets.clear()
+    read_local_worklogs(str(worklogs_path), conf, refresh_cache=True)
+    assert offsets == [0]
+
+
+def test_local_cache_no_trailing_newline(tmp_path, monkeypatch):
+    """A file whose last row doesn't end with a newline is parsed from scratch
+    after it is appended to
+    """
+
+    conf = create_conf(tmp_path)
+    worklogs_path = tmp_path / 'worklogs.csv'
+    worklogs_path.write_text(HEADER + ''.join(ROWS[:2]) + ROWS[2].rstrip('\n'))
+    offsets = spy_reads(monkeypatch)
+    read_local_worklogs(str(worklogs_path), conf)
+    with open(worklogs_path, 'a') as worklogs_file:
+        worklogs_file.write('\n' + ROWS[3])
+    local_wkls = read_local_worklogs(str(worklogs_path), conf)
+    assert offsets == [0, 0]
+    assert sum(len(wkls) for wkls in local_wkls.values()) == 4
+
+
+def test_local_cache_multiple_files(tmp_path):
+    """Cached and parsed files are merged in order"""
+
+    conf = create_conf(tmp_path)
+    uncached_conf = create_conf(tmp_path, False)
+    paths = [str(tmp_path / 'a.csv'), str(tmp_path / 'b.csv')]
+    (tmp_path / 'a.csv').write_text(HEADER + ROWS[0])
+    (tmp_path / 'b.csv').write_text(HEADER + ROWS[1])
+    read_local_worklogs(paths, conf, 2)
+    with open(tmp_path / 'a.csv', 'a') as worklogs_file:
+        worklogs_file.write(ROWS[2])
+    local_wkls = read_local_worklogs(paths, conf, 2)
+    expected = read_local_worklogs(paths, uncached_conf, 2)
+    assert canon_keys(local_wkls) == canon_keys(expected)
+    assert read_local_worklogs(paths, conf, 2) == local_wkls
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+from datetime import datetime
+from jiraworklog.parse_datetime import compile_strptime, translate_strptime
+import random
+
+
+def strptime_or_error(time_str, fmt_str):
+    try:
+        return datetime.strptime(time_str, fmt_str)
+    except ValueError:
+        return ValueError
+
+
+def fast_or_error(time_str, fmt_str):
+    try:
+        return compile_strptime(fmt_str)(time_str)
+    except ValueError:
+        return ValueError
+
+
+def test_translate_strptime():
+    """Only formats made up of fast-path directives are translated"""
+
+    assert translate_strptime('%Y-%m-%d %H:%M') is not None
+    assert translate_strptime('%Y-%m-%dT%H:%M:%S.%f%z') is not None
+    assert translate_strptime('%d %b %Y') is None
+    assert translate_strptime('%H:%M %H') is None
+    assert translate_strptime('%Y%') is None
+
+
+def test_compile_strptime_matches_strptime():
+    """The fast-path parsers give the same results as `datetime.strptime`"""
+
+    cases = [
+        ('%Y-%m-%d %H:%M', '2021-01-12 10:00'),
+        ('%Y-%m-%d %H:%M', '2021-01-12   10:00'),
+        ('%Y-%m-%d %H:%M', '2021-1-12 10:00'),
+        ('%Y-%m-%d %H:%M', '2021-02-30 10:00'),
+        ('%Y-%m-%d %H:%M', '2021-01-12 10:00 '),
+        ('%Y-%m-%d %H:%M', '2021-13-12 10:00'),
+        ('%Y-%m-%dT%H:%M:%S', '2021-01-12t10:00:59'),
+        ('%Y-%m-%dT%H:%M:%S.%f%z', '2021-01-12T10:00:00.123-0500'),
+        ('%Y-%m-%dT%H:%M:%S.%f%z', '2021-01-12T10:00:00.1+05:30'),
+        ('%Y-%m-%dT%H:%M:%S%z', '2021-01-12T10:00:00Z'),
+        ('%Y-%m-%dT%H:%M:%S%z', '2021-01-12T10:00:00+0575'),
+        ('%Y-%m-%dT%H:%M:%S%z', '2021-01-12T10:00:00+053000'),
+        ('%H%M', '0930'),
+        ('%H%M', '2405'),
+        ('%d/%m/%Y %%', '12/01/2021 %'),
+        ('%d %b %Y', '12 Jan 2021'),
+    ]
+    for fmt_str, time_str in cases:
+        expected = strptime_or_error(time_str, fmt_str)
+        actual = fast_or_error(time_str, fmt_str)
+        assert actual == expected, (fmt_str, time_str)
+        if isinstance(expected, datetime):
+            assert actual.tzinfo == expected.tzinfo, (fmt_str, time_str)
+
+    # Randomly perturbed datetime strings
+    rng = random.Random(1)
+    fmt_str = '%Y-%m-%d %H:%M:%S'
+    for _ in range(2000):
+        chars = list('2021-01-12 10:30:45')
+        for _ in range(rng.randint(1, 3)):
+            chars[rng.randrange(len(chars))] = rng.choice('0123456789 -:x')
+        time_str = ''.join(chars)
+        expected = strptime_or_error(time_str, fmt_str)
+        assert fast_or_error(time_str, fmt_str) == expected, time_str
@@ -3,9 +3,12 @@
 from datetime import timedelta
 from jiraworklog.read_local_common import (
     DurationJiraStyleError,
+    TagMatcher,
     parse_duration
 )
 import pytest
+import random
+import re
 
 def assert_timdelta(actual: timedelta, expected_secs: int):
     expected = timedelta(seconds=expected_secs)
@@ -153,3 +156,67 @@ def test_make_parse_duration_invalidformat():
     # Negative count
     with pytest.raises(DurationJiraStyleError):
         parse_duration('-9h')
+
+
+def parse_duration_sequential(duration_str: str):
+    """The original implementation of `parse_duration`, which strips off each
+    unit in turn
+    """
+
+    def chomp(duration_str, re_str, unit_secs):
+        match = re.match(re_str, duration_str)
+        if match:
+            count = match.group(2)
+            n_secs = int(count) * unit_secs
+            new_str = duration_str[len(match.group(0)):]
+            return (new_str, n_secs)
+        else:
+            return (duration_str, 0)
+
+    total_secs = 0
+    for unit, unit_secs in units.items():
+        duration_str, n_secs = chomp(duration_str, rf'(\s*)?(\d+){unit}', unit_secs)
+        total_secs += n_secs
+    if duration_str.lstrip():
+        raise DurationJiraStyleError()
+    return timedelta(seconds=total_secs)
+
+
+def test_make_parse_duration_matches_sequential():
+    """Randomly generated strings give the same result as stripping off each
+    unit in turn
+    """
+
+    def parse_or_error(f, duration_str):
+        try:
+            return f(duration_str)
+        except DurationJiraStyleError:
+            return DurationJiraStyleError
+
+    rng = random.Random(1)
+    for _ in range(5000):
+        n_chars = rng.randint(0, 8)
+        duration_str = ''.join(rng.choice('0129 \twdhmsx') for _ in range(n_chars))
+        assert (
+            parse_or_error(parse_duration, duration_str)
+            == parse_or_error(parse_duration_sequential, duration_str)
+        ), duration_str
+
+
+def test_tag_matcher():
+    """Resolve tags strings to issue keys"""
+
+    issues_map = {'P01': 'P01-1', 'ingest': 'P01-1', 'P02': 'P02-1'}
+    matcher = TagMatcher(issues_map, ':')
+    assert matcher.match('P01') == ('P01-1', ['P01'])
+    assert matcher.match('misc:P02:misc') == ('P02-1', ['P02'])
+    assert matcher.match('misc') == (None, [])
+    assert matcher.match('P01:P01') == ('P01-1', ['P01'])
+    assert matcher.match('P02:ingest') == (None, ['P02', 'ingest'])
+    # Tags that map to the same issue are still reported as multiple matches
+    assert matcher.match('ingest:P01') == (None, ['P01', 'ingest'])
+
+    # Without a delimiter the tags string is a single tag
+    matcher = TagMatcher(issues_map, None)
+    assert matcher.match('P01') == ('P01-1', ['P01'])
+    assert matcher.match('misc:P02') == (None, [])
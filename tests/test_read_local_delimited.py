@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+from jiraworklog.configuration import read_conf
+from jiraworklog.read_local_common import NativeWorklogParseEntryError
+from jiraworklog.read_local_delimited import read_local_delimited
+import pytest
+
+
+@pytest.mark.parametrize('columnar', [False, True])
+def test_read_local_delimited_errors(tmp_path, columnar):
+    """Errors found while reading the rows and while parsing them are reported
+    together, ordered by row
+    """
+
+    conf = read_conf('tests/data/12-delim-start-duration/config.yaml')
+    conf.parse_delimited['columnar'] = columnar
+    worklogs_path = tmp_path / 'worklogs.csv'
+    worklogs_path.write_text(
+        'task,start,duration,tags\n'
+        'Data pipeline,2021-01-12 10:00,30m,p1\n'
+        'Write specifications,2021-01-12 13:15,1h,p1,extra\n'
+        'Add routines,2021-01-12 15:45,1x,p2\n'
+        'Review,2021-01-12 17:00\n'
+    )
+    with pytest.raises(NativeWorklogParseEntryError) as exc:
+        read_local_delimited(str(worklogs_path), conf)
+    assert str(exc.value) == '\n'.join([
+        'row 1: too many entries',
+        "row 2 'duration' field: '1x' doesn't satisfy the Jira-style parse format",
+        'row 3: not enough entries'
+    ])
+
+
+@pytest.mark.parametrize('input_dir', [
+    'tests/data/12-delim-start-duration/',
+    'tests/data/13-delim-end-duration/',
+    'tests/data/14-delim-start-end-duration/'
+])
+def test_read_local_delimited_columnar(input_dir):
+    """The columnar path gives the same worklogs as the row-at-a-time path"""
+
+    conf = read_conf(input_dir + 'config.yaml')
+    expected = read_local_delimited(input_dir + 'worklogs.csv', conf)
+    conf.parse_delimited['columnar'] = True
+    actual = read_local_delimited(input_dir + 'worklogs.csv', conf)
+    assert actual == expected
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+
+from datetime import datetime
+from jiraworklog.configuration import read_conf
+from jiraworklog.read_local_common import NativeWorklogParseEntryError
+from jiraworklog.read_local_excel import read_local_excel
+import openpyxl
+import pytest
+
+
+@pytest.mark.parametrize('columnar', [False, True])
+def test_read_local_excel_errors(tmp_path, columnar):
+    """Errors report the sheet and cell location, and sheets with an invalid
+    header are skipped
+    """
+
+    conf = read_conf('tests/data/99-excel-add-to-empty/config.yaml')
+    conf.parse_excel['columnar'] = columnar
+    workbook = openpyxl.Workbook()
+    sheet_1 = workbook.active
+    sheet_1.title = 'Worklogs'
+    sheet_1.append(['tags', 'task', 'start', 'end'])
+    sheet_1.append(['p1', 'Data pipeline', datetime(2021, 1, 12, 10), datetime(2021, 1, 12, 10, 30)])
+    sheet_1.append(['p2', 'Add routines', 'not a datetime', datetime(2021, 1, 12, 17)])
+    sheet_1.append(['p2', 'Review'])
+    sheet_2 = workbook.create_sheet('Notes')
+    sheet_2.append(['note'])
+    sheet_2.append([1234])
+    worklogs_path = str(tmp_path / 'worklogs.xlsx')
+    workbook.save(worklogs_path)
+
+    with pytest.raises(NativeWorklogParseEntryError) as exc:
+        read_local_excel(worklogs_path, conf)
+    msgs = str(exc.value).split('\n')
+    assert msgs[0].startswith("Worksheet 'Notes' header row: the following column names")
+    assert msgs[1:] == [
+        "Worksheet 'Worklogs' cell C3: expected a datetime but instead observed a string",
+        "Worksheet 'Worklogs' cell C4: expected a datetime but instead observed an empty cell",
+        "Worksheet 'Worklogs' cell D4: expected a datetime but instead observed an empty cell"
+    ]
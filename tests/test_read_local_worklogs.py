@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+from datetime import datetime
+from jiraworklog.configuration import read_conf
+from jiraworklog.read_local_worklogs import (
+    LocalWorklogsFilesError,
+    LocalWorklogsPatternError,
+    read_local_worklogs
+)
+import openpyxl
+import pytest
+
+
+def write_worklogs_csv(path, rows):
+    lines = ['task,start,duration,tags']
+    lines.extend(rows)
+    path.write_text('\n'.join(lines) + '\n')
+
+
+def canon_keys(local_wkls):
+    return {
+        issue_nm: [wkl.canon_key() for wkl in wkls]
+        for issue_nm, wkls
+        in local_wkls.items()
+    }
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_read_local_worklogs_delimited(tmp_path, max_workers):
+    """The worklogs from multiple files are merged in the order of the files"""
+
+    conf = read_conf('tests/data/12-delim-start-duration/config.yaml')
+    write_worklogs_csv(tmp_path / 'a.csv', [
+        'Data pipeline,2021-01-12 10:00,30m,p1',
+        'Add routines,2021-01-12 15:45,1h,p2'
+    ])
+    write_worklogs_csv(tmp_path / 'b.csv', [
+        'Review,2021-01-13 10:00,15m,p1'
+    ])
+    write_worklogs_csv(tmp_path / 'combined.csv.txt', [
+        'Data pipeline,2021-01-12 10:00,30m,p1',
+        'Add routines,2021-01-12 15:45,1h,p2',
+        'Review,2021-01-13 10:00,15m,p1'
+    ])
+    expected = read_local_worklogs(str(tmp_path / 'combined.csv.txt'), conf)
+    actual = read_local_worklogs([str(tmp_path / '*.csv')], conf, max_workers)
+    assert canon_keys(actual) == canon_keys(expected)
+
+    # A file that matches more than one pattern is only read once
+    actual = read_local_worklogs(
+        [str(tmp_path / 'b.csv'), str(tmp_path / '*.csv')],
+        conf,
+        max_workers
+    )
+    assert [wkl.canon['comment'] for wkl in actual['P01']] == [
+        'Review',
+        'Data pipeline'
+    ]
+
+    with pytest.raises(LocalWorklogsPatternError):
+        read_local_worklogs([str(tmp_path / '*.xlsx')], conf, max_workers)
+
+
+def test_read_local_worklogs_errors(tmp_path):
+    """Errors are reported for each file, ordered as for a single file"""
+
+    conf = read_conf('tests/data/12-delim-start-duration/config.yaml')
+    write_worklogs_csv(tmp_path / 'a.csv', [
+        'Data pipeline,2021-01-12 10:00,1x,p1',
+        'Review,2021-01-12 17:00'
+    ])
+    write_worklogs_csv(tmp_path / 'b.csv', [
+        'Add routines,2021-01-12 15:45,1h,p2'
+    ])
+    missing_path = str(tmp_path / 'c.csv')
+    with pytest.raises(LocalWorklogsFilesError) as exc:
+        read_local_worklogs([str(tmp_path / '*.csv'), missing_path], conf, 2)
+    assert [path for path, _ in exc.value.file_errors] == [
+        str(tmp_path / 'a.csv'),
+        missing_path
+    ]
+    assert exc.value.file_errors[0][1] == '\n'.join([
+        "row 0 'duration' field: '1x' doesn't satisfy the Jira-style parse format",
+        'row 1: not enough entries'
+    ])
+    assert 'No such file or directory' in exc.value.file_errors[1][1]
+
+
+def test_read_local_worklogs_excel(tmp_path):
+    """Each sheet of an Excel file is read separately and merged in order"""
+
+    conf = read_conf('tests/data/99-excel-add-to-empty/config.yaml')
+    paths = []
+    for i in range(2):
+        workbook = openpyxl.Workbook()
+        for j in range(2):
+            sheet = workbook.active if j == 0 else workbook.create_sheet()
+            sheet.title = f'Sheet {j}'
+            sheet.append(['tags', 'task', 'start', 'end'])
+            sheet.append([
+                'p1',
+                f'Task {i}-{j}',
+                datetime(2021, 1, 12 + i, 10 + j),
+                datetime(2021, 1, 12 + i, 11 + j)
+            ])
+        paths.append(str(tmp_path / f'worklogs-{i}.xlsx'))
+        workbook.save(paths[-1])
+
+    local_wkls = read_local_worklogs(paths, conf, 4)
+    assert [wkl.canon['comment'] for wkl in local_wkls['P01']] == [
+        'Task 0-0',
+        'Task 0-1',
+        'Task 1-0',
+        'Task 1-1'
+    ]
+
+
+def test_read_local_worklogs_conf_workers(tmp_path, monkeypatch):
+    """The number of workers is taken from the configuration when it isn't
+    provided, so a single worker parses the files without a process pool
+    """
+
+    def fail(*args, **kwargs):
+        raise AssertionError('Unexpected process pool')
+
+    conf = read_conf('tests/data/12-delim-start-duration/config.yaml')
+    conf.local = {'read_workers': 1}
+    write_worklogs_csv(tmp_path / 'a.csv', ['Data pipeline,2021-01-12 10:00,30m,p1'])
+    write_worklogs_csv(tmp_path / 'b.csv', ['Review,2021-01-13 10:00,15m,p1'])
+    monkeypatch.setattr('jiraworklog.read_local_worklogs.ProcessPoolExecutor', fail)
+    local_wkls = read_local_worklogs([str(tmp_path / '*.csv')], conf)
+    assert [wkl.canon['comment'] for wkl in local_wkls['P01']] == [
+        'Data pipeline',
+        'Review'
+    ]
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+from jira import JIRAError
+from jiraworklog.cmdline_args import parser
+from jiraworklog.configuration import read_conf
+from jiraworklog.read_remote_worklogs import (
+    ReadJiraWorkloadError,
+    read_remote_worklogs
+)
+from tests.jiramock import JIRAMock, init_jira
+import pytest
+
+
+class JIRAMockFailing(JIRAMock):
+
+    def _get_json(self, path, params=None):
+        raise JIRAError(status_code=404, text=f"Issue '{path}' not found")
+
+
+cmdline_args = parser.parse_args([])
+
+
+def read_remote_full(jira, conf):
+    remote_wkls = read_remote_worklogs(jira, conf, cmdline_args)
+    return {k: [w.full for w in v] for k, v in remote_wkls.items()}
+
+
+def test_read_remote_worklogs_concurrent():
+    """Concurrent reads give the same result as serial reads"""
+
+    conf = read_conf('tests/data/03-remove-to-empty/config.yaml')
+    jira = init_jira('tests/data/03-remove-to-empty/checkedin.json')
+
+    conf.remote = {'read_workers': 1}
+    serial = read_remote_full(jira, conf)
+    conf.remote = {'read_workers': 8}
+    concurrent = read_remote_full(jira, conf)
+    assert list(serial.keys()) == conf.issue_nms
+    assert list(concurrent.keys()) == conf.issue_nms
+    assert serial == concurrent
+
+
+def test_read_remote_worklogs_errors():
+    """All of the failing issues are reported in a single error"""
+
+    conf = read_conf('tests/data/03-remove-to-empty/config.yaml')
+    conf.remote = {'read_workers': 8}
+    with pytest.raises(ReadJiraWorkloadError) as exc:
+        read_remote_worklogs(JIRAMockFailing(), conf, cmdline_args)
+    assert [nm for nm, _ in exc.value.errors] == conf.issue_nms
+    for nm in conf.issue_nms:
+        assert f"Unable to read the Jira worklog '{nm}'" in str(exc.value)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+import json
+from jiraworklog.remote_cache import RemoteCache, refresh_remote_cache
+
+
+class ResponseMock:
+
+    def __init__(self, body):
+        self.ok = True
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+class FeedJIRAMock:
+    """Serves the worklog feeds one page at a time and the `worklog/list`
+    endpoint from a fixed set of worklogs, recording the `since` parameter of
+    each feed request.
+    """
+
+    def __init__(self, feeds, raw_wkls):
+        self.feeds = feeds
+        self.raw_wkls = {w['id']: w for w in raw_wkls}
+        self.requests = []
+        self._session = self
+
+    def _get_json(self, endpoint, params):
+        self.requests.append((endpoint, params['since']))
+        return self.feeds[endpoint].pop(0)
+
+    def _get_url(self, path):
+        return f'https://jira.example.com/rest/api/2/{path}'
+
+    def post(self, url, data):
+        ids = [str(x) for x in json.loads(data)['ids']]
+        return ResponseMock([self.raw_wkls[x] for x in ids if x in self.raw_wkls])
+
+
+def create_raw(wkl_id, issue_id, comment='Data pipeline'):
+    return {'id': wkl_id, 'issueId': issue_id, 'comment': comment}
+
+
+def create_cache(since=None):
+    return RemoteCache(
+        since,
+        {'P01': '10000', 'P02': '10001'},
+        {
+            'P01': [create_raw('1', '10000'), create_raw('2', '10000')],
+            'P02': [create_raw('3', '10001')]
+        }
+    )
+
+
+def feed_page(wkl_ids, until, last_page=True):
+    return {
+        'values': [{'worklogId': int(x)} for x in wkl_ids],
+        'until': until,
+        'lastPage': last_page
+    }
+
+
+def test_remote_cache_merge():
+    """Updated worklogs replace or are appended to the cached worklogs of their
+    issue, and deleted worklogs are dropped
+    """
+
+    cache = create_cache()
+    replaced = create_raw('2', '10000', 'Write specifications')
+    added = create_raw('4', '10000', 'Add routines')
+    untracked = create_raw('5', '99999')
+    cache.merge_updated([replaced, added, untracked, dict(added, comment='Review')])
+    assert cache.worklogs['P01'] == [
+        create_raw('1', '10000'),
+        replaced,
+        dict(added, comment='Review')
+    ]
+    assert cache.worklogs['P02'] == [create_raw('3', '10001')]
+
+    cache.merge_deleted(['1', '3', '77'])
+    assert cache.worklogs['P01'] == [replaced, dict(added, comment='Review')]
+    assert cache.worklogs['P02'] == []
+
+
+def test_refresh_remote_cache():
+    """The feeds are read page by page from the cache's mark, and the mark is
+    advanced to the earlier of the marks that the two feeds reached
+    """
+
+    feeds = {
+        'worklog/updated': [
+            feed_page(['2'], 200, last_page=False),
+            feed_page(['4', '5'], 300)
+        ],
+        'worklog/deleted': [feed_page(['3'], 250)]
+    }
+    raw_wkls = [
+        create_raw('2', '10000', 'Write specifications'),
+        create_raw('4', '10001', 'Add routines'),
+        create_raw('5', '99999')
+    ]
+    jira = FeedJIRAMock(feeds, raw_wkls)
+    cache = create_cache(since=100)
+    refresh_remote_cache(jira, cache)
+    assert jira.requests == [
+        ('worklog/updated', 100),
+        ('worklog/updated', 200),
+        ('worklog/deleted', 100)
+    ]
+    assert cache.worklogs == {
+        'P01': [create_raw('1', '10000'), raw_wkls[0]],
+        'P02': [raw_wkls[1]]
+    }
+    assert cache.since == 250
+
+    # Empty feeds leave the mark where it was
+    jira = FeedJIRAMock(
+        {'worklog/updated': [feed_page([], 0)], 'worklog/deleted': [feed_page([], 0)]},
+        []
+    )
+    refresh_remote_cache(jira, cache)
+    assert cache.since == 250
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+import io
+from jiraworklog.request_scheduler import (
+    RequestScheduler,
+    SchedulingAdapter,
+    TokenBucket,
+    parse_retry_after
+)
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class FakeClock:
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def create_response(status_code, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.raw = io.BytesIO(b'')
+    response.headers.update({} if headers is None else headers)
+    return response
+
+
+def create_adapter(monkeypatch, responses):
+    def send(self, request, **kwargs):
+        return responses.pop(0)
+    monkeypatch.setattr(HTTPAdapter, 'send', send)
+    fake = FakeClock()
+    scheduler = RequestScheduler(None, 10, 3, fake.clock, fake.sleep)
+    return (SchedulingAdapter(scheduler), fake)
+
+
+def test_parse_retry_after():
+    """Parse the two forms of the Retry-After header"""
+
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('3') == 3.0
+    assert parse_retry_after('1.5') == 1.5
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    assert parse_retry_after('not a date') is None
+
+
+def test_token_bucket():
+    """Requests beyond the burst size wait for a token"""
+
+    fake = FakeClock()
+    bucket = TokenBucket(2.0, 2, fake.clock, fake.sleep)
+    bucket.acquire()
+    bucket.acquire()
+    assert fake.sleeps == []
+    bucket.acquire()
+    assert fake.sleeps == [0.5]
+    bucket.pause(3.0)
+    bucket.acquire()
+    assert fake.sleeps == [0.5, 3.0]
+
+
+def test_scheduling_adapter_throttled(monkeypatch):
+    """HTTP 429 responses are retried after the Retry-After delay"""
+
+    responses = [
+        create_response(429, {'Retry-After': '2'}),
+        create_response(200)
+    ]
+    adapter, fake = create_adapter(monkeypatch, responses)
+    request = requests.Request('POST', 'https://jira.example.com').prepare()
+    response = adapter.send(request)
+    assert response.status_code == 200
+    assert fake.sleeps == [2.0]
+    assert adapter.scheduler.stats.to_dict() == {
+        'requests': 2,
+        'throttled': 1,
+        'retried': 1
+    }
+
+
+def test_scheduling_adapter_server_error(monkeypatch):
+    """Only idempotent requests are retried after a temporary server error"""
+
+    responses = [create_response(503), create_response(200)]
+    adapter, _ = create_adapter(monkeypatch, responses)
+    request = requests.Request('GET', 'https://jira.example.com').prepare()
+    assert adapter.send(request).status_code == 200
+    assert adapter.scheduler.stats.retried == 1
+
+    responses = [create_response(503), create_response(200)]
+    adapter, _ = create_adapter(monkeypatch, responses)
+    request = requests.Request('POST', 'https://jira.example.com').prepare()
+    assert adapter.send(request).status_code == 503
+    assert adapter.scheduler.stats.retried == 0
+
+    # The final response is returned once the retries are exhausted
+    responses = [create_response(429) for _ in range(4)]
+    adapter, _ = create_adapter(monkeypatch, responses)
+    request = requests.Request('GET', 'https://jira.example.com').prepare()
+    assert adapter.send(request).status_code == 429
+    assert adapter.scheduler.stats.retried == 3
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+from datetime import date, datetime, timedelta, timezone
+from jiraworklog.auth_jira import auth_jira
+from jiraworklog.cmdline_args import parser
+from jiraworklog.configuration import read_conf
+from jiraworklog.sync_window import (
+    SyncWindow,
+    SyncWindowParseError,
+    resolve_sync_window
+)
+from jiraworklog.sync_worklogs import sync_worklogs
+from jiraworklog.worklogs import WorklogCanon
+import json
+import pytest
+from tests.jiraserver import JiraServer
+
+EST = timezone(timedelta(hours=-5))
+
+
+def create_local_wkls(starteds):
+    wkls = [
+        WorklogCanon(
+            {'comment': 'Review', 'started': started, 'timeSpentSeconds': '60'},
+            'P01'
+        )
+        for started
+        in starteds
+    ]
+    return {'P01': wkls, 'P02': []}
+
+
+def test_resolve_sync_window():
+    """The window is taken from the command line, the configuration, or the
+    local worklogs
+    """
+
+    conf = read_conf('tests/data/03-remove-to-empty/config.yaml')
+    local_wkls = create_local_wkls([
+        '2021-01-12T13:15:00.000-0500',
+        '2021-01-12T10:00:00.000-0500'
+    ])
+
+    cmdline_args = parser.parse_args([])
+    assert resolve_sync_window(conf, cmdline_args, local_wkls) is None
+
+    # Bounds without a UTC offset are in the timezone of the local worklogs
+    cmdline_args = parser.parse_args(['--window-start', '2021-01-12 12:00'])
+    window = resolve_sync_window(conf, cmdline_args, local_wkls)
+    assert window.start == datetime(2021, 1, 12, 12, tzinfo=EST)
+    assert window.end is None
+    assert window.to_params() == {'startedAfter': 1610470799999}
+
+    conf.sync_window = {'end': date(2021, 1, 13), 'from_local': True}
+    window = resolve_sync_window(conf, parser.parse_args([]), local_wkls)
+    assert window.start == datetime(2021, 1, 12, 10, tzinfo=EST)
+    assert window.end == datetime(2021, 1, 13, tzinfo=EST)
+
+    conf.sync_window = {'from_local': True}
+    window = resolve_sync_window(conf, parser.parse_args([]), local_wkls)
+    assert window.contains(datetime(2021, 1, 12, 13, 15, tzinfo=EST))
+    assert not window.contains(datetime(2021, 1, 12, 13, 15, 1, tzinfo=EST))
+
+    # No local worklogs means that nothing is synced
+    window = resolve_sync_window(conf, parser.parse_args([]), create_local_wkls([]))
+    assert window.start == window.end
+
+    with pytest.raises(SyncWindowParseError) as exc:
+        resolve_sync_window(
+            conf,
+            parser.parse_args(['--window-start', 'yesterday']),
+            local_wkls
+        )
+    assert str(exc.value) == (
+        "Unable to parse the sync window start 'yesterday': must be a date or "
+        "datetime such as '2021-01-12 10:00'"
+    )
+
+
+def test_sync_window_run(tmp_path):
+    """Worklogs outside of the window are neither downloaded nor removed"""
+
+    data_dir = 'tests/data/03-remove-to-empty'
+    conf = read_conf(f'{data_dir}/config.yaml')
+    conf.checked_in_path = str(tmp_path / 'checkedin.json')
+    with open(f'{data_dir}/checkedin.json') as checkedin_file:
+        (tmp_path / 'checkedin.json').write_text(checkedin_file.read())
+    with open(f'{data_dir}/remote.json') as remote_file:
+        remote_full = json.load(remote_file)
+
+    with JiraServer(remote_full) as server:
+        conf.auth_token = {'server': server.url, 'user': 'u', 'api_token': 't'}
+        cmdline_args = parser.parse_args(
+            ['--auto-confirm', '--window-start', '2021-01-12 12:00']
+        )
+        _, checkedin_full, update_instrs = sync_worklogs(
+            auth_jira(conf),
+            conf,
+            cmdline_args,
+            f'{data_dir}/worklogs.csv',
+            True
+        )
+        remaining = server.to_full()
+
+    assert [w['comment'] for w in remaining['P01']] == ['Data pipeline']
+    assert remaining['P02'] == []
+    assert len(update_instrs.rmt_remove_listwkl) == 2
+    assert checkedin_full == {'P01': [remote_full['P01'][0]], 'P02': []}
+    with open(tmp_path / 'checkedin.json') as checkedin_file:
+        assert json.load(checkedin_file) == checkedin_full
+
+
+@pytest.mark.parametrize('started_after_exclusive', [False, True])
+def test_sync_window_boundary(tmp_path, started_after_exclusive):
+    """A worklog that started on the window's start is downloaded whether or not
+    the server includes worklogs that started on `startedAfter`, so removing it
+    locally removes it from the server
+    """
+
+    data_dir = 'tests/data/03-remove-to-empty'
+    conf = read_conf(f'{data_dir}/config.yaml')
+    conf.checked_in_path = str(tmp_path / 'checkedin.json')
+    with open(f'{data_dir}/checkedin.json') as checkedin_file:
+        (tmp_path / 'checkedin.json').write_text(checkedin_file.read())
+    with open(f'{data_dir}/remote.json') as remote_file:
+        remote_full = json.load(remote_file)
+
+    server = JiraServer(
+        remote_full,
+        started_after_exclusive=started_after_exclusive
+    )
+    with server:
+        conf.auth_token = {'server': server.url, 'user': 'u', 'api_token': 't'}
+        cmdline_args = parser.parse_args(
+            ['--auto-confirm', '--window-start', '2021-01-12 10:00']
+        )
+        _, checkedin_full, _ = sync_worklogs(
+            auth_jira(conf),
+            conf,
+            cmdline_args,
+            f'{data_dir}/worklogs.csv',
+            True
+        )
+        remaining = server.to_full()
+
+    assert remaining == {'P01': [], 'P02': []}
+    assert checkedin_full == {'P01': [], 'P02': []}
+
+
+def test_sync_window_contains_str():
+    """Worklog start times are compared across UTC offsets"""
+
+    window = SyncWindow(datetime(2021, 1, 12, 12, tzinfo=EST), None)
+    assert window.contains_str('2021-01-12T12:00:00.000-0500')
+    assert not window.contains_str('2021-01-12T16:59:59.999+0000')
@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 
 from copy import deepcopy
+from jira import JIRAError
 from jiraworklog.reconcile_diffs import reconcile_diffs
+from jiraworklog.update_instructions import UpdateInstructions
 from tests.data_diffs import *
 from tests.data_worklogs import *
-from tests.jiramock import BuildCheckedin, to_addentry, to_rementry
+from tests.jiramock import BuildCheckedin, JIRAMock, to_addentry, to_rementry
+import pytest
 
 
 def test_reconcile_diffs_no_changes():
@@ -148,3 +151,54 @@ def test_reconcile_diffs_bothlocal():
     entries = (to_addentry(local_1to3['P9992-3'][0:1])
                + to_rementry(checkedin_0to1['P9992-3'][0:1]))
     assert jiraclient.entries == entries
+
+
+class JIRAMockFailing(JIRAMock):
+
+    def add_worklog(self, issue, timeSpentSeconds, comment, started):
+        if issue == 'P7777-7':
+            raise JIRAError(status_code=500, text='Internal server error')
+        return super().add_worklog(issue, timeSpentSeconds, comment, started)
+
+
+def test_push_worklogs_parallel():
+    """Push updates for two issues in parallel"""
+
+    def create_instr():
+        rmt_add = localtwo_wkls['P7777-7'] + localtwo_wkls['P9992-3']
+        return UpdateInstructions([], [], rmt_add, [])
+
+    def create_chk():
+        return {'P7777-7': [], 'P9992-3': []}
+
+    def issue_entries(entries, issue_nm):
+        return [x for x in entries if x['worklog']['issue'] == issue_nm]
+
+    # The updates for each issue are made in the same order as a serial push
+    jira_serial = JIRAMock()
+    chk_serial = create_chk()
+    create_instr().push_worklogs(chk_serial, jira_serial)
+    jira_parallel = JIRAMock()
+    chk_parallel = create_chk()
+    create_instr().push_worklogs(chk_parallel, jira_parallel, max_workers=4)
+    for issue_nm in ['P7777-7', 'P9992-3']:
+        assert (
+            issue_entries(jira_serial.entries, issue_nm)
+            == issue_entries(jira_parallel.entries, issue_nm)
+        )
+        assert (
+            [w.canon for w in chk_serial[issue_nm]]
+            == [w.canon for w in chk_parallel[issue_nm]]
+        )
+
+    # A failure for one issue doesn't prevent the updates for the other issue,
+    # and the checked-in worklogs reflect the updates that were made
+    jira_failing = JIRAMockFailing()
+    chk_failing = create_chk()
+    with pytest.raises(JIRAError):
+        create_instr().push_worklogs(chk_failing, jira_failing, max_workers=4)
+    assert chk_failing['P7777-7'] == []
+    assert (
+        [w.canon['comment'] for w in chk_failing['P9992-3']]
+        == [w.canon['comment'] for w in localtwo_wkls['P9992-3']]
+    )
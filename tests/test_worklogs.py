@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+from jiraworklog.worklogs import WorklogCanon, WorklogCheckedin, WorklogJira
+import pickle
+import pytest
+from tests.jiramock import JIRAWklMock
+
+FULL = {
+    'author': 'Daffy Duck',
+    'comment': 'Data pipeline',
+    'created': '2021-10-03T17:21:55.764-0400',
+    'id': '1000001',
+    'issueId': 'P01',
+    'started': '2021-01-12T10:00:00.000000-0500',
+    'timeSpent': '30m',
+    'timeSpentSeconds': '1800',
+    'updateAuthor': 'Daffy Duck',
+    'updated': '2021-10-03T17:21:55.764-0400'
+}
+
+
+def test_worklogs_canon():
+    """Worklogs of every kind compare and hash by their canonical form"""
+
+    canon = {k: FULL[k] for k in ['comment', 'started', 'timeSpentSeconds']}
+    canon_wkl = WorklogCanon(canon, 'P01')
+    checkedin_wkl = WorklogCheckedin(dict(FULL), 'P01')
+    jira_wkl = WorklogJira(JIRAWklMock(**FULL), 'P01')
+    for wkl in [checkedin_wkl, jira_wkl]:
+        assert wkl.canon == canon
+        assert wkl.full == FULL
+        assert wkl == canon_wkl and canon_wkl == wkl
+        assert hash(wkl) == hash(canon_wkl)
+        assert type(wkl.to_canon()) is WorklogCanon
+        assert wkl.to_canon().canon_key() is wkl.canon_key()
+    assert jira_wkl.to_checkedin() == checkedin_wkl
+    assert canon_wkl != WorklogCanon(canon, 'P02')
+
+    # Checked-in worklogs are compared using every field
+    other_full = dict(FULL, id='1000002')
+    assert WorklogCheckedin(other_full, 'P01') != checkedin_wkl
+    assert WorklogCheckedin(other_full, 'P01') == canon_wkl
+
+
+def test_worklogs_full_key():
+    """The full key is calculated once, without creating the full form of a
+    remote worklog
+    """
+
+    jira_wkl = WorklogJira(JIRAWklMock(**FULL), 'P01')
+    full_key = jira_wkl.full_key()
+    assert jira_wkl.full_key() is full_key
+    assert jira_wkl._full is None
+    checkedin_wkl = jira_wkl.to_checkedin()
+    assert checkedin_wkl.full_key() is full_key
+    assert full_key == WorklogCheckedin(dict(FULL), 'P01').full_key()
+
+
+def test_worklogs_immutable():
+    """Worklogs can't be changed and survive a round-trip through pickle"""
+
+    wkl = WorklogCheckedin(dict(FULL), 'P01')
+    with pytest.raises(AttributeError):
+        wkl.issueKey = 'P02'
+    with pytest.raises(AttributeError):
+        wkl.extra = 1
+    copied = pickle.loads(pickle.dumps(wkl))
+    assert copied == wkl and copied.full == FULL